@@ -0,0 +1,288 @@
+import json
+from enum import Enum
+from typing import Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.data_access import transaction
+from pydantic import BaseModel, Field
+
+MAX_BULK_DRAFTS = 1000
+
+# Target status -> statuses a draft may move to it from. FINALIZED drafts are validated and final.
+ALLOWED_TRANSITIONS = {
+    prisma.enums.DraftStatus.GENERATED: (),
+    prisma.enums.DraftStatus.EDITED: (prisma.enums.DraftStatus.GENERATED,),
+    prisma.enums.DraftStatus.FINALIZED: (
+        prisma.enums.DraftStatus.GENERATED,
+        prisma.enums.DraftStatus.EDITED,
+    ),
+}
+
+# Statuses whose content may be replaced, which marks the draft EDITED: the transition to EDITED, or a
+# further edit of an already EDITED draft.
+EDITABLE_STATUSES = {
+    status.value
+    for status in ALLOWED_TRANSITIONS[prisma.enums.DraftStatus.EDITED]
+    + (prisma.enums.DraftStatus.EDITED,)
+}
+
+
+class DraftContentUpdate(BaseModel):
+    """
+    New content for one draft of a bulk update.
+    """
+
+    draftId: str
+    content: str
+
+
+class BulkUpdateDraftsRequest(BaseModel):
+    """
+    Replaces the content of many drafts at once, marking them EDITED like a single draft update.
+    """
+
+    updates: List[DraftContentUpdate] = Field(min_length=1, max_length=MAX_BULK_DRAFTS)
+
+
+class BulkTransitionDraftsRequest(BaseModel):
+    """
+    Moves many drafts to one status, e.g. finalizing a reviewed batch.
+    """
+
+    draftIds: List[str] = Field(min_length=1, max_length=MAX_BULK_DRAFTS)
+    status: prisma.enums.DraftStatus
+
+
+class BulkDeleteDraftsRequest(BaseModel):
+    """
+    Discards many drafts at once, together with their edit history.
+    """
+
+    draftIds: List[str] = Field(min_length=1, max_length=MAX_BULK_DRAFTS)
+
+
+class BulkDraftOutcome(Enum):
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+    INVALID_TRANSITION = "invalid_transition"
+
+
+class BulkDraftResult(BaseModel):
+    """
+    Outcome for one draft of a bulk operation, in the order the ids were given.
+    """
+
+    draftId: str
+    outcome: BulkDraftOutcome
+    error: Optional[str] = None
+
+
+class BulkDraftsResponse(BaseModel):
+    """
+    Per-draft outcomes of a bulk operation and how many drafts it applied to.
+    """
+
+    results: List[BulkDraftResult]
+    succeeded: int
+    failed: int
+
+
+def _unique(draft_ids: List[str]) -> List[str]:
+    if len(set(draft_ids)) != len(draft_ids):
+        raise ValueError("Each draftId may appear only once per request.")
+    return draft_ids
+
+
+async def _lock(tx: prisma.Prisma, draft_ids: List[str]) -> Dict[str, str]:
+    """
+    Locks the drafts that exist among `draft_ids` until the transaction ends, so that the writes that
+    follow affect exactly the drafts classified here. Rows are locked in id order, so concurrent bulk
+    requests over overlapping drafts wait for each other instead of deadlocking. Returns the status of each.
+    """
+    rows = await tx.query_raw(
+        'SELECT "id", "status"::text AS "status" FROM "Draft" '
+        'WHERE "id" IN (SELECT jsonb_array_elements_text($1::jsonb)) ORDER BY "id" FOR UPDATE',
+        json.dumps(draft_ids),
+    )
+    return {row["id"]: row["status"] for row in rows}
+
+
+def _response(results: List[BulkDraftResult]) -> BulkDraftsResponse:
+    succeeded = sum(
+        result.outcome
+        in (
+            BulkDraftOutcome.UPDATED,
+            BulkDraftOutcome.UNCHANGED,
+            BulkDraftOutcome.DELETED,
+        )
+        for result in results
+    )
+    return BulkDraftsResponse(
+        results=results, succeeded=succeeded, failed=len(results) - succeeded
+    )
+
+
+def _not_found(draft_id: str) -> BulkDraftResult:
+    return BulkDraftResult(
+        draftId=draft_id,
+        outcome=BulkDraftOutcome.NOT_FOUND,
+        error="Draft does not exist.",
+    )
+
+
+async def bulkUpdateDrafts(request: BulkUpdateDraftsRequest) -> BulkDraftsResponse:
+    """
+    Replaces the content of many drafts and records each new version in their edit history. All
+    drafts are written in one transaction with one UPDATE, since each gets its own content, and one
+    create_many for the Edit rows. Unknown ids and FINALIZED drafts, whose content is final, are reported
+    and do not fail the others.
+
+    Args:
+        request (BulkUpdateDraftsRequest): The drafts to update and their new content.
+
+    Returns:
+        BulkDraftsResponse: One result per draft, in request order.
+    """
+    draft_ids = _unique([update.draftId for update in request.updates])
+    async with transaction() as tx:
+        existing = await _lock(tx, draft_ids)
+        updates = [
+            update
+            for update in request.updates
+            if existing.get(update.draftId) in EDITABLE_STATUSES
+        ]
+        if updates:
+            await tx.execute_raw(
+                'UPDATE "Draft" d SET "content" = v."content", "status" = $2::"DraftStatus", '
+                '"updatedAt" = now() FROM jsonb_to_recordset($1::jsonb) AS v("id" text, '
+                '"content" text) WHERE d."id" = v."id"',
+                json.dumps(
+                    [
+                        {"id": update.draftId, "content": update.content}
+                        for update in updates
+                    ]
+                ),
+                prisma.enums.DraftStatus.EDITED.value,
+            )
+            await prisma.models.Edit.prisma(tx).create_many(
+                data=[
+                    {"draftId": update.draftId, "content": update.content}
+                    for update in updates
+                ]
+            )
+    results = []
+    for draft_id in draft_ids:
+        status = existing.get(draft_id)
+        if status is None:
+            results.append(_not_found(draft_id))
+        elif status in EDITABLE_STATUSES:
+            results.append(
+                BulkDraftResult(draftId=draft_id, outcome=BulkDraftOutcome.UPDATED)
+            )
+        else:
+            results.append(
+                BulkDraftResult(
+                    draftId=draft_id,
+                    outcome=BulkDraftOutcome.INVALID_TRANSITION,
+                    error=f"A {status} draft cannot be edited.",
+                )
+            )
+    return _response(results)
+
+
+async def bulkTransitionDrafts(
+    request: BulkTransitionDraftsRequest,
+) -> BulkDraftsResponse:
+    """
+    Moves many drafts to one status with a single update_many and records the change in each draft's
+    edit history with one create_many, in one transaction. Drafts already in the target status are
+    left unchanged; drafts whose status may not move to the target, such as FINALIZED ones, are
+    reported as invalid transitions.
+
+    Args:
+        request (BulkTransitionDraftsRequest): The drafts and the status to move them to.
+
+    Returns:
+        BulkDraftsResponse: One result per draft, in request order.
+    """
+    draft_ids = _unique(request.draftIds)
+    target = request.status
+    allowed = {status.value for status in ALLOWED_TRANSITIONS[target]}
+    async with transaction() as tx:
+        existing = await _lock(tx, draft_ids)
+        moving = [
+            draft_id for draft_id in draft_ids if existing.get(draft_id) in allowed
+        ]
+        if moving:
+            await prisma.models.Draft.prisma(tx).update_many(
+                where={"id": {"in": moving}}, data={"status": target}
+            )
+            await prisma.models.Edit.prisma(tx).create_many(
+                data=[
+                    {
+                        "draftId": draft_id,
+                        "content": f"Status changed from {existing[draft_id]} to {target.value}",
+                    }
+                    for draft_id in moving
+                ]
+            )
+    results = []
+    for draft_id in draft_ids:
+        status = existing.get(draft_id)
+        if status is None:
+            results.append(_not_found(draft_id))
+        elif status == target.value:
+            results.append(
+                BulkDraftResult(draftId=draft_id, outcome=BulkDraftOutcome.UNCHANGED)
+            )
+        elif status in allowed:
+            results.append(
+                BulkDraftResult(draftId=draft_id, outcome=BulkDraftOutcome.UPDATED)
+            )
+        else:
+            results.append(
+                BulkDraftResult(
+                    draftId=draft_id,
+                    outcome=BulkDraftOutcome.INVALID_TRANSITION,
+                    error=f"A {status} draft cannot become {target.value}.",
+                )
+            )
+    return _response(results)
+
+
+async def bulkDeleteDrafts(request: BulkDeleteDraftsRequest) -> BulkDraftsResponse:
+    """
+    Deletes many drafts and their edit history with two delete_many statements in one transaction.
+    Unknown ids are reported and do not fail the others.
+
+    Args:
+        request (BulkDeleteDraftsRequest): The drafts to delete.
+
+    Returns:
+        BulkDraftsResponse: One result per draft, in request order.
+    """
+    draft_ids = _unique(request.draftIds)
+    async with transaction() as tx:
+        existing = await _lock(tx, draft_ids)
+        if existing:
+            found = list(existing)
+            await prisma.models.Edit.prisma(tx).delete_many(
+                where={"draftId": {"in": found}}
+            )
+            await prisma.models.Draft.prisma(tx).delete_many(
+                where={"id": {"in": found}}
+            )
+    return _response(
+        [
+            (
+                BulkDraftResult(draftId=draft_id, outcome=BulkDraftOutcome.DELETED)
+                if draft_id in existing
+                else _not_found(draft_id)
+            )
+            for draft_id in draft_ids
+        ]
+    )
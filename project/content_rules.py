@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class ContentRule(BaseModel):
+    """
+    One declarative validation rule.
+
+    kind:
+        'forbidden' - reported when any pattern occurs in the content.
+        'required'  - reported when no pattern occurs in the content.
+        'max_count' - reported when patterns occur more than `limit` times.
+        'min_length' / 'max_length' - reported when the content length is outside `limit`.
+    Patterns are literal phrases matched case-insensitively on word boundaries, unless `regex` is set.
+    """
+
+    name: str
+    kind: str
+    severity: str = "suggestion"
+    message: str
+    patterns: List[str] = []
+    regex: bool = False
+    limit: int = 0
+
+
+RULE_KINDS = {"forbidden", "required", "max_count", "min_length", "max_length"}
+
+
+class RuleReport(BaseModel):
+    """
+    Errors and suggestions produced by the local rules for one piece of content.
+    """
+
+    errors: List[str]
+    suggestions: List[str]
+
+
+DEFAULT_RULES: List[Dict] = [
+    {
+        "name": "generic_greeting",
+        "kind": "forbidden",
+        "message": "Consider personalizing the greeting with the recipient's name.",
+        "patterns": [
+            "Dear Partner",
+            "Dear Sir or Madam",
+            "Dear Sir/Madam",
+            "To whom it may concern",
+            "Dear Customer",
+            "Hello there",
+        ],
+    },
+    {
+        "name": "spam_trigger_words",
+        "kind": "forbidden",
+        "severity": "error",
+        "message": "Content contains spam trigger words that are likely to be filtered.",
+        "patterns": [
+            "100% free",
+            "act now",
+            "buy now",
+            "cash bonus",
+            "click here",
+            "guaranteed",
+            "limited time offer",
+            "no obligation",
+            "risk-free",
+            "winner",
+            "urgent",
+            "$$$",
+        ],
+    },
+    {
+        "name": "too_many_links",
+        "kind": "max_count",
+        "message": "Cold emails with many links look like spam; keep it to two links or fewer.",
+        "patterns": [r"https?://\S+", r"www\.\S+"],
+        "regex": True,
+        "limit": 2,
+    },
+    {
+        "name": "unsubscribe_text",
+        "kind": "required",
+        "message": "Add an unsubscribe or opt-out line to comply with email marketing rules.",
+        "patterns": ["unsubscribe", "opt out", "opt-out"],
+    },
+    {
+        "name": "min_length",
+        "kind": "min_length",
+        "severity": "error",
+        "message": "Content is too short, consider adding more detailed information.",
+        "limit": 100,
+    },
+    {
+        "name": "max_length",
+        "kind": "max_length",
+        "message": "Cold emails perform best under 2000 characters; consider shortening the content.",
+        "limit": 2000,
+    },
+]
+
+
+def _trie_source(phrases: List[Tuple[str, str]]) -> str:
+    """
+    Builds a regex for literal phrases factored by common prefixes, so the engine follows one branch per
+    character instead of trying every phrase at every position. Each phrase ends in an empty marker group
+    whose name identifies it through Match.lastgroup.
+    """
+    trie: Dict = {}
+    for phrase, marker in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = (phrase, marker)
+
+    def build(node: Dict) -> str:
+        alternatives = []
+        if "" in node:
+            phrase, marker = node[""]
+            boundary = r"\b" if phrase[-1].isalnum() else ""
+            alternatives.append(f"{boundary}(?P<{marker}>)")
+        for char in sorted(c for c in node if c):
+            alternatives.append(re.escape(char) + build(node[char]))
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    # Phrases starting with a word character must start on a word boundary. The lookbehind is applied once
+    # to all of them rather than per branch, which keeps the engine's first-character fast path.
+    words = {c: node for c, node in trie.items() if c.isalnum()}
+    symbols = {c: node for c, node in trie.items() if not c.isalnum()}
+    sources = []
+    if words:
+        sources.append(r"(?<!\w)" + build(words))
+    if symbols:
+        sources.append(build(symbols))
+    return "|".join(sources)
+
+
+class RuleSet:
+    """
+    A rule list compiled into a single regex: all literal phrases share one prefix trie and regex patterns
+    are appended as further alternatives, so every validation is one pass over the content regardless of
+    how many phrases are configured.
+    """
+
+    def __init__(self, rules: List[ContentRule]):
+        self.rules = rules
+        self._marker_rule: Dict[str, int] = {}
+        phrases: List[Tuple[str, str]] = []
+        regexes: List[str] = []
+        for i, rule in enumerate(rules):
+            if rule.kind not in RULE_KINDS:
+                raise ValueError(f"Unknown rule kind {rule.kind} in rule {rule.name}")
+            for pattern in rule.patterns:
+                marker = f"m{len(self._marker_rule)}"
+                self._marker_rule[marker] = i
+                if rule.regex:
+                    regexes.append(f"(?i:{pattern})(?P<{marker}>)")
+                else:
+                    phrases.append((pattern.lower(), marker))
+        sources = ([_trie_source(phrases)] if phrases else []) + regexes
+        self._matcher = re.compile("|".join(sources)) if sources else None
+
+    def evaluate(self, content: str) -> RuleReport:
+        counts = [0] * len(self.rules)
+        if self._matcher is not None:
+            for match in self._matcher.finditer(content.lower()):
+                counts[self._marker_rule[match.lastgroup]] += 1
+        errors: List[str] = []
+        suggestions: List[str] = []
+        length = len(content)
+        for rule, count in zip(self.rules, counts):
+            if rule.kind == "forbidden":
+                failed = count > 0
+            elif rule.kind == "required":
+                failed = count == 0
+            elif rule.kind == "max_count":
+                failed = count > rule.limit
+            elif rule.kind == "min_length":
+                failed = length < rule.limit
+            else:
+                failed = length > rule.limit
+            if failed:
+                (errors if rule.severity == "error" else suggestions).append(
+                    rule.message
+                )
+        return RuleReport(errors=errors, suggestions=suggestions)
+
+
+class _RuleSetLoader:
+    """
+    Holds the compiled rule set and recompiles it when the CONTENT_RULES_PATH file changes. The file is
+    checked at most every CONTENT_RULES_RELOAD_SECONDS; a broken file keeps the previous rules.
+    """
+
+    def __init__(self):
+        self.path: Optional[str] = os.getenv("CONTENT_RULES_PATH")
+        self.reload_interval = float(os.getenv("CONTENT_RULES_RELOAD_SECONDS", "5"))
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self._rule_set = RuleSet([ContentRule(**rule) for rule in DEFAULT_RULES])
+
+    def get(self) -> RuleSet:
+        if self.path is None:
+            return self._rule_set
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return self._rule_set
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                with open(self.path) as f:
+                    rules = [ContentRule(**rule) for rule in json.load(f)]
+                self._rule_set = RuleSet(rules)
+                self._mtime = mtime
+                logger.info("Loaded %d content rules from %s", len(rules), self.path)
+        except Exception:
+            logger.exception("Failed to load content rules from %s", self.path)
+        return self._rule_set
+
+
+_loader = _RuleSetLoader()
+
+
+def rule_set() -> RuleSet:
+    """
+    Returns the current compiled rule set, reloading it first if its file changed.
+    """
+    return _loader.get()
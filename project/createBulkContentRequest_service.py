@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.createContentRequest_service import (
+    ContentParameters,
+    generate_content,
+    get_ai_model,
+)
+from pydantic import BaseModel
+
+BULK_CONCURRENCY = int(os.getenv("BULK_GENERATION_CONCURRENCY", "32"))
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_GENERATION_CHUNK_SIZE", "100"))
+
+
+class BulkItemResult(BaseModel):
+    """
+    Outcome for one item of a bulk generation batch, streamed back as soon as it is known.
+    """
+
+    index: int
+    contentId: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+
+def draft_id_for(batch_id: str, index: int) -> str:
+    """
+    Drafts of a batch get deterministic ids, so a resumed batch can tell which items are already stored.
+    """
+    return f"{batch_id}-{index}"
+
+
+def _line(payload: BaseModel | Dict) -> str:
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json() + "\n"
+    return json.dumps(payload) + "\n"
+
+
+async def _completed_indices(batch_id: str, total: int) -> set[int]:
+    # Exact primary key lookups: a LIKE prefix cannot use the id index and would also match the drafts
+    # of another batch whose id starts with this one.
+    indices = {draft_id_for(batch_id, index): index for index in range(total)}
+    rows = await prisma.get_client().query_raw(
+        'SELECT "id" FROM "Draft" WHERE "id" IN (SELECT jsonb_array_elements_text($1::jsonb))',
+        json.dumps(list(indices)),
+    )
+    return {indices[row["id"]] for row in rows}
+
+
+async def _run_batch(batch: prisma.models.GenerationBatch) -> AsyncIterator[str]:
+    items = [ContentParameters(**item) for item in batch.items]
+    modelType = batch.modelType
+    ai_model = await get_ai_model(modelType)
+    yield _line({"batchId": batch.id, "total": len(items)})
+
+    done = await _completed_indices(batch.id, len(items))
+    for index in sorted(done):
+        yield _line(
+            BulkItemResult(
+                index=index, contentId=draft_id_for(batch.id, index), status="success"
+            )
+        )
+
+    pending: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(len(items)):
+        if index not in done:
+            pending.put_nowait(index)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        while True:
+            try:
+                index = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                generated = await generate_content(items[index], modelType, ai_model.id)
+                await results.put((index, generated, None))
+            except Exception as e:
+                await results.put((index, None, str(e)))
+
+    workers = [
+        asyncio.create_task(worker())
+        for _ in range(min(BULK_CONCURRENCY, pending.qsize()))
+    ]
+    remaining = pending.qsize()
+    failed = 0
+    chunk: List[Dict] = []
+    try:
+        while remaining:
+            index, generated, error = await results.get()
+            remaining -= 1
+            if error is not None:
+                failed += 1
+                yield _line(BulkItemResult(index=index, status="failed", error=error))
+            else:
+                chunk.append(
+                    {
+                        "id": draft_id_for(batch.id, index),
+                        "content": generated.content,
+                        "status": prisma.enums.DraftStatus.GENERATED,
+                        "userId": batch.userId,
+                        "modelId": ai_model.id,
+                        **generated.timings,
+                    }
+                )
+            # Flush when the chunk is full or nothing else is ready right now, so results are
+            # persisted in large batches under load without delaying them when generation is slow.
+            if chunk and (len(chunk) >= BULK_CHUNK_SIZE or results.empty()):
+                await prisma.models.Draft.prisma().create_many(
+                    data=chunk, skip_duplicates=True
+                )
+                for draft in chunk:
+                    yield _line(
+                        BulkItemResult(
+                            index=int(draft["id"].rsplit("-", 1)[1]),
+                            contentId=draft["id"],
+                            status="success",
+                        )
+                    )
+                chunk = []
+    finally:
+        for task in workers:
+            task.cancel()
+    status = (
+        prisma.enums.BatchStatus.FAILED
+        if failed
+        else prisma.enums.BatchStatus.COMPLETED
+    )
+    await prisma.models.GenerationBatch.prisma().update(
+        where={"id": batch.id}, data={"status": status}
+    )
+    yield _line({"batchId": batch.id, "status": status, "failed": failed})
+
+
+async def createBulkContentRequest(
+    userId: str, items: List[ContentParameters], modelType: prisma.enums.ModelType
+) -> AsyncIterator[str]:
+    """
+    Generates drafts for a whole campaign in one request. Items are fanned out to the model with bounded
+    parallelism, drafts are written with create_many in chunks, and per-item results are streamed back as
+    newline-delimited JSON as soon as they are stored.
+
+    Args:
+        userId (str): Unique identifier of the user requesting content generation.
+        items (List[ContentParameters]): One set of content parameters per prospect.
+        modelType (prisma.enums.ModelType): Type of AI model to use for generation, e.g., 'GPT_4_TURBO'.
+
+    Returns:
+        AsyncIterator[str]: NDJSON lines; the first carries the batch id needed to resume the batch, then one BulkItemResult per item, then a final status line.
+    """
+    batch = await prisma.models.GenerationBatch.prisma().create(
+        data={
+            "userId": userId,
+            "modelType": modelType.name,
+            "items": prisma.Json([item.model_dump() for item in items]),
+            "total": len(items),
+            "status": prisma.enums.BatchStatus.RUNNING,
+        }
+    )
+    return _run_batch(batch)
+
+
+async def resumeBulkContentRequest(batchId: str) -> AsyncIterator[str]:
+    """
+    Resumes a bulk generation batch, e.g. after the process died mid-batch. Items whose drafts already
+    exist are reported as done without calling the model again; failed and missing items are regenerated.
+
+    Args:
+        batchId (str): The batch id returned in the first line of the original bulk response.
+
+    Returns:
+        AsyncIterator[str]: NDJSON lines in the same format as createBulkContentRequest.
+    """
+    batch = await prisma.models.GenerationBatch.prisma().update(
+        where={"id": batchId}, data={"status": prisma.enums.BatchStatus.RUNNING}
+    )
+    if batch is None:
+        raise ValueError(f"No generation batch found with ID {batchId}")
+    return _run_batch(batch)
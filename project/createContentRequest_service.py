@@ -1,8 +1,20 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
 from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional
 
 import prisma
 import prisma.enums
 import prisma.models
+from project import job_queue
+from project.database import database
+from project.generation_cache import cache_key, generation_cache
+from project.model_registry import model_registry
+from project.quality_pipeline import ContentRejectedError, QualityPipeline
+from project.semantic_cache import semantic_cache
 from pydantic import BaseModel
 
 
@@ -25,6 +37,16 @@ class ModelType(Enum):
     CUSTOM_CHECKER: str
 
 
+class GeneratedContent(BaseModel):
+    """
+    Approved email body for one request, together with what should be stored on its draft.
+    """
+
+    content: str
+    embedding: Optional[List[float]] = None
+    timings: Dict[str, Optional[int]] = {}
+
+
 class ContentGenerationResponse(BaseModel):
     """
     Model representing the output after generating content. Includes content ID and status.
@@ -34,8 +56,84 @@ class ContentGenerationResponse(BaseModel):
     status: str
 
 
+def build_messages(contentParameters: ContentParameters) -> List[Dict[str, str]]:
+    """
+    Turns the user's content parameters into the chat prompt sent to the writer model.
+
+    Args:
+        contentParameters (ContentParameters): Parameters that influence how the AI models generate the content.
+
+    Returns:
+        List[Dict[str, str]]: System and user messages for the writer model.
+    """
+    return [
+        {
+            "role": "system",
+            "content": "You are an expert copywriter for B2B and B2C cold emails. Write one complete, ready-to-send email that is concise, personal and has a clear call to action. Reply with the email body only.",
+        },
+        {
+            "role": "user",
+            "content": f"Opening: {contentParameters.intro}\nContext: {contentParameters.context}\nClosing: {contentParameters.closing}",
+        },
+    ]
+
+
+async def get_ai_model(modelType: prisma.enums.ModelType) -> prisma.models.AIModel:
+    """
+    Returns the AIModel row for the given model type, creating it on first use.
+    """
+    return await model_registry.ensure(modelType)
+
+
+async def generate_content(
+    contentParameters: ContentParameters,
+    modelType: prisma.enums.ModelType,
+    model_id: str,
+) -> GeneratedContent:
+    """
+    Produces the email body for one request, trying the exact generation cache, then the semantic cache,
+    and only then the writer/checker pipeline. Only approved content is cached.
+
+    Args:
+        contentParameters (ContentParameters): Parameters that influence how the AI models generate the content.
+        modelType (prisma.enums.ModelType): Type of AI model to use for generation, e.g., 'GPT_4_TURBO'.
+        model_id (str): Id of the AIModel row the draft will be attached to.
+
+    Returns:
+        GeneratedContent: The content, plus the prompt embedding and stage timings to store on the new draft when it was freshly generated.
+
+    Raises:
+        ContentRejectedError: If the checker model rejected the generated content.
+    """
+    key = cache_key(
+        contentParameters.intro,
+        contentParameters.context,
+        contentParameters.closing,
+        modelType.name,
+    )
+    draft_content = await generation_cache.get(key)
+    embedding = None
+    if draft_content is None and semantic_cache.enabled:
+        embedding = await semantic_cache.embed(contentParameters.context)
+        match = await semantic_cache.lookup(
+            embedding, model_id, contentParameters.intro, contentParameters.closing
+        )
+        if match is not None:
+            draft_content = match.content
+            embedding = None
+            await generation_cache.set(key, draft_content, modelType.name)
+    if draft_content is not None:
+        return GeneratedContent(content=draft_content)
+    pipeline = QualityPipeline(modelType.name, build_messages(contentParameters))
+    draft_content = await pipeline.run()
+    await generation_cache.set(key, draft_content, modelType.name)
+    return GeneratedContent(
+        content=draft_content, embedding=embedding, timings=pipeline.timings()
+    )
+
+
 async def createContentRequest(
-    userId: str, contentParameters: ContentParameters, modelType: ModelType
+    userId: str, contentParameters: ContentParameters, modelType: prisma.enums.ModelType
 ) -> ContentGenerationResponse:
     """
     Creates a new content generation request using the gpt-4-turbo model, potentially redirected by the Model Selection Module based on availability and suitability. Once content is generated, it's submitted to the Quality Check Module for validation. Expected to return the new content's ID and a status of the creation process.
@@ -43,31 +141,231 @@ async def createContentRequest(
     Args:
         userId (str): Unique identifier of the user requesting content generation, to associate creation metrics and permissions.
         contentParameters (ContentParameters): Parameters that influence how the AI models generate the content.
-        modelType (ModelType): Type of AI model to use for generation, e.g., 'GPT_4_TURBO'.
+        modelType (prisma.enums.ModelType): Type of AI model to use for generation, e.g., 'GPT_4_TURBO'.
 
     Returns:
         ContentGenerationResponse: Model representing the output after generating content. Includes content ID and status.
     """
-    ai_model = await prisma.models.AIModel.prisma().find_first(
-        where={"modelType": modelType}
-    )
-    if not ai_model:
-        feature_id = "default-feature-id"
-        ai_model = await prisma.models.AIModel.prisma().create(
-            data={"modelType": modelType, "featureId": feature_id}
-        )
-    draft_content = f"{contentParameters.intro}\n{contentParameters.context}\n{contentParameters.closing}"
+    ai_model = await get_ai_model(modelType)
+    try:
+        generated = await generate_content(contentParameters, modelType, ai_model.id)
+    except ContentRejectedError:
+        return ContentGenerationResponse(contentId="", status="failed")
     draft = await prisma.models.Draft.prisma().create(
         data={
-            "content": draft_content,
+            "content": generated.content,
             "status": prisma.enums.DraftStatus.GENERATED,
             "userId": userId,
             "modelId": ai_model.id,
+            **generated.timings,
         }
     )
-    content_approved = True
-    if content_approved:
-        return ContentGenerationResponse(contentId=draft.id, status="success")
-    else:
-        await prisma.models.Draft.prisma().delete(where={"id": draft.id})
-        return ContentGenerationResponse(contentId="", status="failed")
+    if generated.embedding is not None:
+        await semantic_cache.store(
+            draft.id,
+            generated.embedding,
+            contentParameters.intro,
+            contentParameters.closing,
+        )
+    return ContentGenerationResponse(contentId=draft.id, status="success")
+
+
+STREAM_FLUSH_CHARS = 512
+
+
+def sse_event(event: str, data: dict) -> str:
+    """
+    Formats one server-sent event frame.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def streamContentRequest(
+    userId: str, contentParameters: ContentParameters, modelType: prisma.enums.ModelType
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of createContentRequest. Writer tokens are forwarded as server-sent events as soon as
+    they arrive while the checker model scores them alongside, and the draft row is created concurrently and its content is appended in chunks of
+    STREAM_FLUSH_CHARS, so the full email is never buffered in memory.
+
+    Args:
+        userId (str): Unique identifier of the user requesting content generation, to associate creation metrics and permissions.
+        contentParameters (ContentParameters): Parameters that influence how the AI models generate the content.
+        modelType (prisma.enums.ModelType): Type of AI model to use for generation, e.g., 'GPT_4_TURBO'.
+
+    Yields:
+        str: SSE frames; 'token' events carry text deltas, and the stream ends with a 'done' event carrying the content ID, or a 'rejected' event if the checker rejected the content.
+    """
+
+    async def create_draft() -> prisma.models.Draft:
+        ai_model = await get_ai_model(modelType)
+        return await prisma.models.Draft.prisma().create(
+            data={
+                "content": "",
+                "status": prisma.enums.DraftStatus.GENERATED,
+                "userId": userId,
+                "modelId": ai_model.id,
+            }
+        )
+
+    async def append(draft_id: str, text: str) -> None:
+        await prisma.get_client().execute_raw(
+            'UPDATE "Draft" SET "content" = "content" || $1, "updatedAt" = now() WHERE "id" = $2',
+            text,
+            draft_id,
+        )
+
+    draft_task = asyncio.create_task(create_draft())
+    pipeline = QualityPipeline(modelType.name, build_messages(contentParameters))
+    pending: List[str] = []
+    pending_chars = 0
+    try:
+        async for token in pipeline.tokens():
+            yield sse_event("token", {"text": token})
+            pending.append(token)
+            pending_chars += len(token)
+            if pending_chars >= STREAM_FLUSH_CHARS:
+                draft = await draft_task
+                await append(draft.id, "".join(pending))
+                pending.clear()
+                pending_chars = 0
+        draft = await draft_task
+        if pending:
+            await append(draft.id, "".join(pending))
+        await prisma.models.Draft.prisma().update(
+            where={"id": draft.id}, data=pipeline.timings()
+        )
+    except BaseException as e:
+        if not draft_task.done():
+            draft_task.cancel()
+        elif not draft_task.cancelled() and draft_task.exception() is None:
+            await prisma.models.Draft.prisma().delete(
+                where={"id": draft_task.result().id}
+            )
+        if isinstance(e, ContentRejectedError):
+            yield sse_event("rejected", {"reason": e.reason, "status": "failed"})
+            return
+        if isinstance(e, Exception):
+            yield sse_event("error", {"error": str(e)})
+            return
+        raise
+    yield sse_event("done", {"contentId": draft.id, "status": "success"})
+
+
+async def enqueueContentRequest(
+    userId: str, contentParameters: ContentParameters, modelType: prisma.enums.ModelType
+) -> job_queue.JobEnqueuedResponse:
+    """
+    Deferred variant of createContentRequest. The request is queued on the 'generation' queue and the job id
+    is returned immediately; the outcome can be polled from the job status endpoint.
+
+    Args:
+        userId (str): Unique identifier of the user requesting content generation, to associate creation metrics and permissions.
+        contentParameters (ContentParameters): Parameters that influence how the AI models generate the content.
+        modelType (prisma.enums.ModelType): Type of AI model to use for generation, e.g., 'GPT_4_TURBO'.
+
+    Returns:
+        job_queue.JobEnqueuedResponse: The queued job's id and status.
+    """
+    return await job_queue.enqueue(
+        "generation",
+        {
+            "userId": userId,
+            "contentParameters": contentParameters.model_dump(),
+            "modelType": modelType.name,
+        },
+    )
+
+
+@job_queue.handler("generation")
+async def run_content_job(payload: Dict) -> Dict:
+    response = await createContentRequest(
+        payload["userId"],
+        ContentParameters(**payload["contentParameters"]),
+        prisma.enums.ModelType[payload["modelType"]],
+    )
+    return response.model_dump()
+
+
+def _median_ms(samples: List[float]) -> float:
+    return sorted(samples)[len(samples) // 2] * 1000
+
+
+async def bench(requests: int) -> Dict[str, Dict[str, float]]:
+    """
+    Measures time to the first content byte for createContentRequest, which answers only after the whole
+    email was generated and checked, and for streamContentRequest, whose first 'token' event is the first
+    byte. Every request uses new parameters so the caches do not answer it. Drafts are created for a
+    throwaway user that is deleted afterwards.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per variant, the median milliseconds to the first byte and to the end.
+    """
+    user = await prisma.models.User.prisma().create(
+        data={
+            "email": f"bench-{uuid.uuid4().hex}@example.com",
+            "password": "",
+            "role": prisma.enums.UserRole.EDITOR,
+        }
+    )
+    model_type = prisma.enums.ModelType.GPT_4_TURBO
+    first: Dict[str, List[float]] = {"buffered": [], "streamed": []}
+    total: Dict[str, List[float]] = {"buffered": [], "streamed": []}
+    try:
+        for _ in range(requests):
+            parameters = ContentParameters(
+                intro="Hi Dana,",
+                context=f"Routing software for logistics teams, run {uuid.uuid4().hex}",
+                closing="Best regards, Sam",
+            )
+            started = time.perf_counter()
+            await createContentRequest(user.id, parameters, model_type)
+            first["buffered"].append(time.perf_counter() - started)
+            total["buffered"].append(time.perf_counter() - started)
+            parameters.context += " streamed"
+            started = time.perf_counter()
+            first_token = None
+            async for frame in streamContentRequest(user.id, parameters, model_type):
+                if first_token is None and frame.startswith("event: token"):
+                    first_token = time.perf_counter() - started
+            first["streamed"].append(first_token or 0.0)
+            total["streamed"].append(time.perf_counter() - started)
+    finally:
+        await prisma.models.Draft.prisma().delete_many(where={"userId": user.id})
+        await prisma.models.User.prisma().delete(where={"id": user.id})
+    return {
+        label: {
+            "first_byte_ms": _median_ms(first[label]),
+            "total_ms": _median_ms(total[label]),
+        }
+        for label in first
+    }
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    database.register()
+    await database.connect()
+    try:
+        for label, numbers in (await bench(args.requests)).items():
+            print(
+                f"{label:9} first byte {numbers['first_byte_ms']:8.1f} ms   "
+                f"complete {numbers['total_ms']:8.1f} ms"
+            )
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Time to first byte, buffered against streamed, with a simulated model:
+    `LLM_PROVIDER=stub LLM_STUB_LATENCY_MS=300 LLM_STUB_TOKEN_DELAY_MS=20 python -m project.createContentRequest_service`.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark generation time to first byte."
+    )
+    parser.add_argument("--requests", type=int, default=20)
+    asyncio.run(_bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 from typing import Optional
 
 import prisma
+import prisma.errors
 import prisma.models
+from project.data_access import missing_reference
 from pydantic import BaseModel
 
 
@@ -28,16 +30,19 @@ async def createDraft(
     Returns:
         CreateDraftResponse: Response model returned after creating a new draft, indicating success and providing the draft ID.
     """
-    user = await prisma.models.User.prisma().find_unique(where={"id": userId})
-    if not user:
-        raise ValueError("User ID does not exist in the database.")
-    draft = await prisma.models.Draft.prisma().create(
-        data={
-            "content": content,
-            "status": "GENERATED",
-            "userId": userId,
-            "modelId": modelId or None,
-        }
-    )
+    try:
+        draft = await prisma.models.Draft.prisma().create(
+            data={
+                "content": content,
+                "status": "GENERATED",
+                "userId": userId,
+                "modelId": modelId or None,
+            }
+        )
+    except prisma.errors.ForeignKeyViolationError as e:
+        # The foreign key replaces looking the user up first.
+        if missing_reference(e) == "userId":
+            raise ValueError("User ID does not exist in the database.") from e
+        raise
     response = CreateDraftResponse(draftId=draft.id, created=True)
     return response
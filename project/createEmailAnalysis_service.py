@@ -1,8 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-import prisma
-import prisma.models
+from project import metric_rollups
 from pydantic import BaseModel
 
 
@@ -31,7 +30,7 @@ async def createEmailAnalysis(
     date_from: datetime, date_to: datetime, campaign_id: Optional[str] = None
 ) -> EmailAnalysisResponse:
     """
-    Initiates a detailed analysis of newly sent emails within a given date range and possibly for a specific campaign.
+    Initiates a detailed analysis of newly sent emails within a given date range and possibly for a specific campaign. Metrics are summed per campaign from the campaign metric rollups plus the metrics newer than the last rollup refresh, so detailed_metrics holds one entry per campaign.
 
     Args:
         date_from (datetime): Starting date for fetching emails for analytics.
@@ -41,30 +40,26 @@ async def createEmailAnalysis(
     Returns:
         EmailAnalysisResponse: Provides detailed analytics including open rates and conversion rates.
     """
-    query_conditions = {
-        "where": {"sentAt": {"gte": date_from, "lte": date_to}},
-        "include": {"Metrics": True},
-    }
+    conditions = [
+        "c.\"sentAt\" >= $1::timestamptz AT TIME ZONE 'UTC'",
+        "c.\"sentAt\" <= $2::timestamptz AT TIME ZONE 'UTC'",
+    ]
+    params = [date_from, date_to]
     if campaign_id:
-        query_conditions["where"].update({"id": campaign_id})
-    campaigns = await prisma.models.EmailCampaign.prisma().find_many(**query_conditions)
-    total_emails = 0
-    total_open_rate = 0.0
-    total_conversion_rate = 0.0
-    campaign_details = []
-    for campaign in campaigns:
-        if campaign.Metrics:
-            for metric in campaign.Metrics:
-                total_emails += 1
-                total_open_rate += metric.openRate
-                total_conversion_rate += metric.conversionRate
-                campaign_details.append(
-                    CampaignDetail(
-                        campaign_id=campaign.id,
-                        open_rate=metric.openRate,
-                        conversion_rate=metric.conversionRate,
-                    )
-                )
+        params.append(campaign_id)
+        conditions.append('c."id" = $3')
+    campaigns = await metric_rollups.campaign_totals(conditions, params)
+    total_emails = sum((campaign.count for campaign in campaigns))
+    total_open_rate = sum((campaign.openRateSum for campaign in campaigns))
+    total_conversion_rate = sum((campaign.conversionRateSum for campaign in campaigns))
+    campaign_details = [
+        CampaignDetail(
+            campaign_id=campaign.key,
+            open_rate=campaign.average_open_rate,
+            conversion_rate=campaign.average_conversion_rate,
+        )
+        for campaign in campaigns
+    ]
     if total_emails > 0:
         average_open_rate = total_open_rate / total_emails
         average_conversion_rate = total_conversion_rate / total_emails
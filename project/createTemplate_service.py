@@ -38,6 +38,7 @@ async def createTemplate(
     category_guess = "General"
     new_template = await prisma.models.Template.prisma().create(
         data={
+            "title": title,
             "content": content,
             "category": category_guess,
             "featureId": "appropriate_feature_id",
@@ -45,7 +46,7 @@ async def createTemplate(
     )
     return CreateTemplateResponse(
         id=new_template.id,
-        title=title,
+        title=new_template.title,
         content=new_template.content,
         category=new_template.category,
         createdAt=new_template.createdAt,
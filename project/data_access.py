@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import contextlib
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import prisma
+import prisma.engine
+import prisma.enums
+import prisma.errors
+import prisma.models
+from project.database import database, primary_reads
+
+TRANSACTION_TIMEOUT = timedelta(seconds=10)
+
+
+def _writer() -> prisma.Prisma:
+    # Writes and the reads that go with them always go to the primary, even from read-only contexts.
+    with primary_reads():
+        return prisma.get_client()
+
+
+async def update_by_id(
+    model: Any, record_id: str, data: Dict, **conditions: Any
+) -> bool:
+    """
+    Updates one row by id in a single UPDATE statement, optionally only if it also matches
+    `conditions`, so a condition such as the current status is checked by the database instead of by
+    a read beforehand.
+
+    Returns:
+        bool: False if no row with that id (and those conditions) exists.
+    """
+    updated = await model.prisma(_writer()).update_many(
+        where={"id": record_id, **conditions}, data=data
+    )
+    return updated == 1
+
+
+async def update_returning(model: Any, record_id: str, data: Dict) -> Optional[Any]:
+    """
+    Updates one row by id and returns it in the same round-trip. `data` may contain nested writes,
+    such as creating related rows, which run in the same transaction.
+
+    Returns:
+        Optional[Any]: The updated row, or None if no row with that id exists.
+    """
+    return await model.prisma(_writer()).update(where={"id": record_id}, data=data)
+
+
+async def delete_by_id(model: Any, record_id: str, **conditions: Any) -> bool:
+    """
+    Deletes one row by id, optionally only if it also matches `conditions`.
+
+    Returns:
+        bool: False if no row with that id (and those conditions) exists.
+    """
+    deleted = await model.prisma(_writer()).delete_many(
+        where={"id": record_id, **conditions}
+    )
+    return deleted == 1
+
+
+@asynccontextmanager
+async def transaction(
+    timeout: timedelta = TRANSACTION_TIMEOUT,
+) -> AsyncIterator[prisma.Prisma]:
+    """
+    Runs a multi-step write in one transaction on the primary. Queries made through `model.prisma(tx)`
+    or the yielded client are part of it, and all of them are rolled back if the block raises.
+    """
+    async with _writer().tx(timeout=timeout) as tx:
+        yield tx
+
+
+def missing_reference(error: prisma.errors.ForeignKeyViolationError) -> str:
+    """
+    The foreign key column a failed write referenced a missing row through, e.g. "userId".
+    """
+    constraint = str((error.meta or {}).get("field_name", ""))
+    # Constraint names look like Draft_userId_fkey (index).
+    return constraint.split(" ")[0].split("_")[1] if "_" in constraint else constraint
+
+
+@contextlib.contextmanager
+def count_round_trips() -> Iterator[List[int]]:
+    """
+    Counts the requests sent to the query engine inside the block: queries, batches and transaction
+    begin/commit/rollback. Each one costs at least one database round-trip.
+    """
+    counter = [0]
+    engine = prisma.engine.AsyncQueryEngine
+    originals = {
+        name: getattr(engine, name)
+        for name in (
+            "query",
+            "start_transaction",
+            "commit_transaction",
+            "rollback_transaction",
+        )
+    }
+
+    def counting(method):
+        async def wrapper(*args, **kwargs):
+            counter[0] += 1
+            return await method(*args, **kwargs)
+
+        return wrapper
+
+    for name, method in originals.items():
+        setattr(engine, name, counting(method))
+    try:
+        yield counter
+    finally:
+        for name, method in originals.items():
+            setattr(engine, name, method)
+
+
+def _read_then_write(fixture: Dict[str, str]) -> Dict[str, Any]:
+    """
+    The query sequences the services ran before they used this module.
+    """
+    draft, template = fixture["draftId"], fixture["templateId"]
+    return {
+        "updateDraft": [
+            lambda: prisma.models.Draft.prisma().find_unique(where={"id": draft}),
+            lambda: prisma.models.Draft.prisma().update(
+                where={"id": draft},
+                data={"content": "edited", "status": prisma.enums.DraftStatus.EDITED},
+            ),
+        ],
+        "updateTemplate": [
+            lambda: prisma.models.Template.prisma().find_unique(
+                where={"id": template}, include={"Feature": True}
+            ),
+            lambda: prisma.models.Template.prisma().update(
+                where={"id": template}, data={"title": "t", "content": "c"}
+            ),
+        ],
+        "createDraft": [
+            lambda: prisma.models.User.prisma().find_unique(
+                where={"id": fixture["userId"]}
+            ),
+            lambda: prisma.models.Draft.prisma().create(
+                data={
+                    "content": "new",
+                    "status": "GENERATED",
+                    "userId": fixture["userId"],
+                    "modelId": fixture["modelId"],
+                }
+            ),
+        ],
+        "updateValidation": [
+            lambda: prisma.models.Draft.prisma().find_unique(where={"id": draft}),
+            lambda: prisma.models.Draft.prisma().update(
+                where={"id": draft}, data={"content": "revalidated"}
+            ),
+            lambda: prisma.models.Edit.prisma().create(
+                data={"content": "notes", "draftId": draft}
+            ),
+        ],
+    }
+
+
+async def bench(iterations: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Counts query-engine round-trips and measures latency per write endpoint for the previous
+    read-before-write query sequences and the current services, against fixture rows that are
+    deleted afterwards.
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, float]]]: Per endpoint, "before" and "after" with round-trips
+            per call and milliseconds per call.
+    """
+    from project.createDraft_service import createDraft
+    from project.model_registry import model_registry
+    from project.updateDraft_service import updateDraft
+    from project.updateTemplate_service import updateTemplate
+    from project.updateValidation_service import updateValidation
+
+    model = await model_registry.ensure("GPT_4_TURBO")
+    user = await prisma.models.User.prisma().create(
+        data={
+            "email": f"bench-{uuid.uuid4().hex}@example.com",
+            "password": "",
+            "role": prisma.enums.UserRole.EDITOR,
+        }
+    )
+    template = await prisma.models.Template.prisma().create(
+        data={"content": "c", "category": "bench", "featureId": model.featureId}
+    )
+    draft = await prisma.models.Draft.prisma().create(
+        data={
+            "content": "c",
+            "status": "GENERATED",
+            "userId": user.id,
+            "modelId": model.id,
+        }
+    )
+    fixture = {
+        "userId": user.id,
+        "modelId": model.id,
+        "templateId": template.id,
+        "draftId": draft.id,
+    }
+    current = {
+        "updateDraft": lambda: updateDraft(draft.id, "edited"),
+        "updateTemplate": lambda: updateTemplate(template.id, "t", "c"),
+        "createDraft": lambda: createDraft("new", model.id, user.id),
+        "updateValidation": lambda: updateValidation(
+            draft.id, "revalidated", None, "notes"
+        ),
+    }
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    try:
+        for endpoint, steps in _read_then_write(fixture).items():
+
+            async def before():
+                for step in steps:
+                    await step()
+
+            results[endpoint] = {}
+            for label, call in (("before", before), ("after", current[endpoint])):
+                with count_round_trips() as trips:
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        await call()
+                    elapsed = time.perf_counter() - started
+                results[endpoint][label] = {
+                    "round_trips": trips[0] / iterations,
+                    "ms": elapsed / iterations * 1000,
+                }
+    finally:
+        await prisma.models.Edit.prisma().delete_many(
+            where={"Draft": {"userId": user.id}}
+        )
+        await prisma.models.Draft.prisma().delete_many(where={"userId": user.id})
+        await prisma.models.Template.prisma().delete(where={"id": template.id})
+        await prisma.models.User.prisma().delete(where={"id": user.id})
+    return results
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    database.register()
+    await database.connect()
+    try:
+        for endpoint, runs in (await bench(args.iterations)).items():
+            for label, numbers in runs.items():
+                print(
+                    f"{endpoint:18} {label:6} {numbers['round_trips']:4.1f} round-trips "
+                    f"{numbers['ms']:8.2f} ms"
+                )
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Round-trips per write endpoint before and after: `python -m project.data_access`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark write round-trips.")
+    parser.add_argument("--iterations", type=int, default=100)
+    asyncio.run(_bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import prisma
+import prisma.engine.errors
+import prisma.errors
+from prisma import Prisma
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+CONSISTENCY_HEADER = "x-read-consistency"
+STICKY_COOKIE = "read_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Errors that mean the replica could not answer, as opposed to errors in the query itself.
+UNAVAILABLE_ERRORS = (
+    prisma.engine.errors.EngineError,
+    prisma.errors.ClientNotConnectedError,
+    prisma.errors.HTTPClientClosedError,
+    httpx.TransportError,
+)
+
+_prefer_replica: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "prefer_replica", default=False
+)
+_require_primary: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "require_primary", default=False
+)
+
+
+def pooled_url(
+    url: str,
+    pool_size: Optional[int] = None,
+    pool_timeout: Optional[int] = None,
+    connect_timeout: Optional[int] = None,
+    socket_timeout: Optional[int] = None,
+) -> str:
+    """
+    Adds the query engine's connection pool parameters to a PostgreSQL URL. The engine only accepts
+    whole numbers, timeouts in seconds. Parameters left as None keep the value already in the URL or
+    the engine default (2 * CPUs + 1 connections, 10 s pool timeout, 5 s connect timeout, no socket
+    timeout).
+    """
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query))
+    for name, value in (
+        ("connection_limit", pool_size),
+        ("pool_timeout", pool_timeout),
+        ("connect_timeout", connect_timeout),
+        ("socket_timeout", socket_timeout),
+    ):
+        if value is not None:
+            params[name] = str(int(value))
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+class DatabaseStats(BaseModel):
+    replica_configured: bool
+    replica_healthy: bool
+    replica_lag_seconds: Optional[float]
+    replica_reads: int
+    primary_reads: int
+    fallbacks: int
+
+
+class Database:
+    """
+    The primary Prisma client and, when DATABASE_REPLICA_URL is set, a second client bound to a read
+    replica. `client()` is registered as the Prisma client getter, so model queries and
+    `prisma.get_client()` go to the replica inside `replica_reads()` (see `read_only`) and to the
+    primary everywhere else. The replica is skipped while it is disconnected, lagging more than
+    `max_lag` seconds behind, or failing, and inside `primary_reads()`, which read-your-writes paths use.
+    """
+
+    def __init__(
+        self,
+        primary: Prisma,
+        replica: Optional[Prisma] = None,
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replica_healthy = False
+        self.replica_lag: Optional[float] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_env(cls) -> "Database":
+        pool = {
+            "pool_size": _env_int("DATABASE_POOL_SIZE"),
+            "pool_timeout": _env_int("DATABASE_POOL_TIMEOUT_SECONDS"),
+            "connect_timeout": _env_int("DATABASE_CONNECT_TIMEOUT_SECONDS"),
+            "socket_timeout": _env_int("DATABASE_SOCKET_TIMEOUT_SECONDS"),
+        }
+        primary_url = os.getenv("DATABASE_URL")
+        primary = Prisma(
+            datasource={"url": pooled_url(primary_url, **pool)} if primary_url else None
+        )
+        replica = None
+        replica_url = os.getenv("DATABASE_REPLICA_URL")
+        if replica_url:
+            replica_pool = dict(pool)
+            replica_size = _env_int("DATABASE_REPLICA_POOL_SIZE")
+            if replica_size is not None:
+                replica_pool["pool_size"] = replica_size
+            replica = Prisma(
+                datasource={"url": pooled_url(replica_url, **replica_pool)}
+            )
+        return cls(
+            primary,
+            replica,
+            max_lag=float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "5")),
+            check_interval=float(os.getenv("DATABASE_REPLICA_CHECK_SECONDS", "5")),
+        )
+
+    def register(self) -> None:
+        prisma.register(self.client)
+
+    def replica_available(self) -> bool:
+        return (
+            self.replica is not None
+            and self.replica_healthy
+            and self.replica.is_connected()
+        )
+
+    def client(self) -> Prisma:
+        """
+        The client for the current context: the replica for read-only services while it is available,
+        otherwise the primary.
+        """
+        if _prefer_replica.get() and not _require_primary.get():
+            if self.replica_available():
+                self.replica_reads += 1
+                return self.replica
+            self.primary_reads += 1
+        return self.primary
+
+    async def connect(self) -> None:
+        await self.primary.connect()
+        if self.replica is not None:
+            try:
+                await self.replica.connect()
+                await self.check_replica()
+            except Exception:
+                logger.exception("Read replica unavailable, reading from the primary")
+
+    async def disconnect(self) -> None:
+        if self.replica is not None and self.replica.is_connected():
+            await self.replica.disconnect()
+        await self.primary.disconnect()
+
+    def mark_replica_unavailable(self) -> None:
+        if self.replica_healthy:
+            logger.warning("Read replica marked unavailable, reading from the primary")
+        self.replica_healthy = False
+
+    async def check_replica(self) -> None:
+        """
+        Measures replication lag on the replica. A replica that has replayed everything it received
+        counts as current even if the primary has been idle since the last replayed transaction.
+        """
+        if self.replica is None:
+            return
+        try:
+            if not self.replica.is_connected():
+                await self.replica.connect()
+            rows = await self.replica.query_raw("""
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery()
+                        OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END::float8 AS lag
+                """)
+        except Exception:
+            logger.exception("Read replica health check failed")
+            self.replica_lag = None
+            self.mark_replica_unavailable()
+            return
+        self.replica_lag = float(rows[0]["lag"])
+        healthy = self.replica_lag <= self.max_lag
+        if healthy and not self.replica_healthy:
+            logger.info("Read replica available, lag %.1fs", self.replica_lag)
+        elif not healthy and self.replica_healthy:
+            logger.warning(
+                "Read replica lag %.1fs exceeds %.1fs, reading from the primary",
+                self.replica_lag,
+                self.max_lag,
+            )
+        self.replica_healthy = healthy
+
+    async def monitor_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_replica()
+
+    def stats(self) -> DatabaseStats:
+        return DatabaseStats(
+            replica_configured=self.replica is not None,
+            replica_healthy=self.replica_available(),
+            replica_lag_seconds=self.replica_lag,
+            replica_reads=self.replica_reads,
+            primary_reads=self.primary_reads,
+            fallbacks=self.fallbacks,
+        )
+
+
+database = Database.from_env()
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    token = _prefer_replica.set(True)
+    try:
+        yield
+    finally:
+        _prefer_replica.reset(token)
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """
+    Sends every query in the block to the primary, even inside `replica_reads()`. Use it wherever a
+    read must see the caller's own recent writes or fills a cache shared across requests.
+    """
+    token = _require_primary.set(True)
+    try:
+        yield
+    finally:
+        _require_primary.reset(token)
+
+
+def read_only(func):
+    """
+    Runs an async service function that only reads against the read replica. If the replica fails to
+    answer, it is marked unavailable and the function is run again against the primary.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        use_replica = database.replica_available() and not _require_primary.get()
+        with replica_reads():
+            if not use_replica:
+                return await func(*args, **kwargs)
+            try:
+                return await func(*args, **kwargs)
+            except UNAVAILABLE_ERRORS:
+                logger.exception("Read replica query failed, retrying on the primary")
+                database.mark_replica_unavailable()
+                database.fallbacks += 1
+                return await func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReadConsistencyMiddleware:
+    """
+    Gives clients read-your-writes on top of replica routing. Requests that may write are served
+    entirely by the primary, and a successful one sets a short-lived cookie that keeps the client's
+    following reads on the primary until the replica has caught up. Clients without cookies can
+    send `X-Read-Consistency: strong` instead.
+    """
+
+    def __init__(self, app: ASGIApp, sticky_seconds: float = 5.0):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    @classmethod
+    def options_from_env(cls) -> Dict[str, float]:
+        return {
+            "sticky_seconds": float(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or database.replica is None:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        writes = scope["method"] not in SAFE_METHODS
+        strong = (
+            writes
+            or headers.get(CONSISTENCY_HEADER, "").lower() == "strong"
+            or f"{STICKY_COOKIE}=" in headers.get("cookie", "")
+        )
+
+        async def send_with_cookie(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and self.sticky_seconds > 0
+            ):
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie",
+                    f"{STICKY_COOKIE}=1; Max-Age={self.sticky_seconds:g}; Path=/; "
+                    "HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        if not strong:
+            await self.app(scope, receive, send)
+            return
+        with primary_reads():
+            await self.app(scope, receive, send_with_cookie if writes else send)
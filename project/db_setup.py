@@ -0,0 +1,29 @@
+import logging
+from typing import List
+
+from prisma import Prisma
+from project.template_search import SEARCH_VECTOR_SQL
+
+logger = logging.getLogger(__name__)
+
+# Objects that schema.prisma cannot express. Every statement must be idempotent because it
+# runs on each application start.
+DDL_STATEMENTS: List[str] = [
+    'CREATE INDEX IF NOT EXISTS "Draft_promptEmbedding_hnsw_idx" ON "Draft" USING hnsw ("promptEmbedding" vector_cosine_ops)',
+    f'CREATE INDEX IF NOT EXISTS "Template_search_idx" ON "Template" USING gin ({SEARCH_VECTOR_SQL})',
+    'CREATE INDEX IF NOT EXISTS "Template_title_trgm_idx" ON "Template" USING gin ("title" gin_trgm_ops)',
+]
+
+
+async def ensure_database_objects(client: Prisma) -> None:
+    """
+    Creates indexes and other database objects that are managed outside of `prisma db push`.
+
+    Args:
+        client (Prisma): Connected Prisma client to run the statements with.
+    """
+    for statement in DDL_STATEMENTS:
+        try:
+            await client.execute_raw(statement)
+        except Exception:
+            logger.exception("Failed to apply database setup statement: %s", statement)
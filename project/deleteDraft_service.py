@@ -1,5 +1,6 @@
 import prisma
 import prisma.models
+from project.data_access import delete_by_id
 from pydantic import BaseModel
 
 
@@ -21,5 +22,5 @@ async def deleteDraft(draftId: str) -> DeleteDraftResponse:
     Returns:
     DeleteDraftResponse: Response indicating the result of the delete operation on a draft.
     """
-    delete_result = await prisma.models.Draft.prisma().delete(where={"id": draftId})
-    return DeleteDraftResponse(deleted=delete_result is not None)
+    deleted = await delete_by_id(prisma.models.Draft, draftId)
+    return DeleteDraftResponse(deleted=deleted)
@@ -1,5 +1,6 @@
 import prisma
 import prisma.models
+from project import metric_rollups
 from pydantic import BaseModel
 
 
@@ -30,6 +31,7 @@ async def deleteEmailAnalytics(emailId: str) -> DeleteEmailAnalyticsResponse:
     await prisma.models.CampaignMetric.prisma().delete_many(
         where={"emailCampaignId": emailId}
     )
+    await metric_rollups.refresh_campaign(emailId)
     response = DeleteEmailAnalyticsResponse(
         status="success", message="Email analytics data successfully deleted."
     )
@@ -1,5 +1,7 @@
 import prisma
 import prisma.models
+from project.data_access import delete_by_id
+from project.template_engine import template_store
 from pydantic import BaseModel
 
 
@@ -21,10 +23,9 @@ async def deleteTemplate(templateId: str) -> DeleteTemplateResponse:
     Returns:
     DeleteTemplateResponse: Response model for deleting a template. This endpoint does not provide a response body upon successful deletion, hence no fields are necessary in the response model.
     """
-    delete_result = await prisma.models.Template.prisma().delete(
-        where={"id": templateId}
-    )
-    if delete_result:
+    deleted = await delete_by_id(prisma.models.Template, templateId)
+    template_store.invalidate(templateId)
+    if deleted:
         return DeleteTemplateResponse()
     else:
         raise ValueError("Template deletion unsuccessful. Template ID may not exist.")
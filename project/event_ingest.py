@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+import prisma
+import prisma.models
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+_COUNTER_COLUMNS = {
+    "DELIVERED": "deliveredCount",
+    "OPEN": "openCount",
+    "CLICK": "clickCount",
+    "CONVERSION": "conversionCount",
+}
+
+
+class BufferFullError(Exception):
+    """
+    Raised when the event buffer has no room for a batch within the allowed wait.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Event buffer is full, retry later")
+        self.retry_after = retry_after
+
+
+class EventIngestStats(BaseModel):
+    """
+    Counters of the in-memory event buffer of this process.
+    """
+
+    buffered: int
+    capacity: int
+    accepted: int
+    rejected: int
+    flushed: int
+    dropped: int
+    failed_flushes: int
+    last_flush_ms: Optional[float]
+
+
+class EventBuffer:
+    """
+    Bounded in-memory buffer between the ingestion endpoint and Postgres. Events are written in batches
+    of up to `batch_size` with create_many, once a batch is full or every `flush_interval` seconds.
+    Events leave the buffer only after their batch is stored, so while the database is slow or down the
+    buffer fills up and `add` pushes back on the senders instead of growing without bound.
+    Events still buffered when the process dies are lost; senders get 202 Accepted, not a durable ack.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        batch_size: int,
+        flush_interval: float,
+        max_wait: float,
+    ):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_wait = max_wait
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self._last_flush: Optional[float] = None
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "EventBuffer":
+        return cls(
+            capacity=int(os.getenv("EVENT_BUFFER_CAPACITY", "100000")),
+            batch_size=int(os.getenv("EVENT_FLUSH_BATCH_SIZE", "5000")),
+            flush_interval=float(os.getenv("EVENT_FLUSH_INTERVAL_SECONDS", "1")),
+            max_wait=float(os.getenv("EVENT_BUFFER_MAX_WAIT_SECONDS", "2")),
+        )
+
+    async def add(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Buffers a batch of events as a whole, waiting up to `max_wait` seconds for room.
+
+        Args:
+            events (List[Dict[str, Any]]): CampaignEvent create inputs.
+
+        Returns:
+            int: Number of events now buffered.
+
+        Raises:
+            ValueError: If the batch is larger than the whole buffer.
+            BufferFullError: If there was no room within `max_wait`.
+        """
+        if len(events) > self.capacity:
+            raise ValueError(
+                f"Batch of {len(events)} events exceeds the buffer capacity of {self.capacity}"
+            )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(self._events) + len(events) > self.capacity:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self.rejected += len(events)
+                raise BufferFullError(retry_after=self.flush_interval)
+            self._drained.clear()
+            try:
+                async with asyncio.timeout(remaining):
+                    await self._drained.wait()
+            except TimeoutError:
+                pass
+        self._events.extend(events)
+        self.accepted += len(events)
+        if len(self._events) >= self.batch_size:
+            self._ready.set()
+        return len(self._events)
+
+    async def _store(self, batch: List[Dict[str, Any]]) -> None:
+        campaign_ids = list({event["emailCampaignId"] for event in batch})
+        known = {
+            campaign.id
+            for campaign in await prisma.models.EmailCampaign.prisma().find_many(
+                where={"id": {"in": campaign_ids}}
+            )
+        }
+        rows = [event for event in batch if event["emailCampaignId"] in known]
+        if len(rows) < len(batch):
+            self.dropped += len(batch) - len(rows)
+            logger.warning(
+                "Dropped %d events for unknown campaigns", len(batch) - len(rows)
+            )
+        if not rows:
+            return
+        counts: Dict[str, Dict[str, int]] = {}
+        for event in rows:
+            counter = counts.setdefault(
+                event["emailCampaignId"], dict.fromkeys(_COUNTER_COLUMNS.values(), 0)
+            )
+            counter[_COUNTER_COLUMNS[event["type"]]] += 1
+        # The counters are the campaign's event-derived rates; they are kept apart from the
+        # CampaignMetric rows so that they do not skew the metric averages and rollups.
+        async with prisma.get_client().tx() as tx:
+            await prisma.models.CampaignEvent.prisma(tx).create_many(data=rows)
+            await tx.execute_raw(
+                'UPDATE "EmailCampaign" c SET '
+                + ", ".join(
+                    f'"{column}" = c."{column}" + v."{column}"'
+                    for column in _COUNTER_COLUMNS.values()
+                )
+                + ' FROM jsonb_to_recordset($1::jsonb) AS v("id" text, '
+                + ", ".join(f'"{column}" int' for column in _COUNTER_COLUMNS.values())
+                + ') WHERE c."id" = v."id"',
+                json.dumps([{"id": key, **value} for key, value in counts.items()]),
+            )
+
+    async def flush(self) -> None:
+        """
+        Stores buffered events batch by batch until the buffer is empty or a batch fails.
+        """
+        while self._events:
+            batch = list(islice(self._events, self.batch_size))
+            started = time.perf_counter()
+            try:
+                await self._store(batch)
+            except Exception:
+                self.failed_flushes += 1
+                logger.exception("Failed to store %d buffered events", len(batch))
+                return
+            # _store returns as soon as its transaction commits. Nothing may be awaited before the
+            # batch leaves the buffer, or a cancellation in between would store it a second time.
+            for _ in batch:
+                self._events.popleft()
+            self.flushed += len(batch)
+            self._last_flush = time.perf_counter() - started
+            self._drained.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    await self._ready.wait()
+            except TimeoutError:
+                pass
+            self._ready.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the periodic flushing and stores what is still buffered.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> EventIngestStats:
+        return EventIngestStats(
+            buffered=len(self._events),
+            capacity=self.capacity,
+            accepted=self.accepted,
+            rejected=self.rejected,
+            flushed=self.flushed,
+            dropped=self.dropped,
+            failed_flushes=self.failed_flushes,
+            last_flush_ms=(
+                self._last_flush * 1000 if self._last_flush is not None else None
+            ),
+        )
+
+
+event_buffer = EventBuffer.from_env()
@@ -0,0 +1,178 @@
+import csv
+import io
+import os
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Optional
+
+import prisma
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_COLUMNS = [
+    "metricId",
+    "campaignId",
+    "subject",
+    "sentAt",
+    "openRate",
+    "conversionRate",
+    "createdAt",
+]
+
+
+class ExportFormat(Enum):
+    """
+    File formats the email analytics export can be streamed in.
+    """
+
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+async def _batches(
+    date_from: datetime, date_to: datetime, campaign_id: Optional[str]
+) -> AsyncIterator[List[Dict]]:
+    """
+    Yields the metric rows of the matching campaigns in (createdAt, id) order, EXPORT_BATCH_SIZE at a
+    time. Each batch continues after the last row of the previous one, so every query is an index range
+    scan and only one batch is held in memory.
+    """
+    conditions = [
+        "c.\"sentAt\" >= $1::timestamptz AT TIME ZONE 'UTC'",
+        "c.\"sentAt\" <= $2::timestamptz AT TIME ZONE 'UTC'",
+        '(m."createdAt", m."id") > ($3::timestamp, $4)',
+    ]
+    params = [date_from, date_to]
+    if campaign_id:
+        conditions.append('c."id" = $6')
+    last_created, last_id = "-infinity", ""
+    while True:
+        rows = await prisma.get_client().query_raw(
+            'SELECT m."id" AS "metricId", m."emailCampaignId" AS "campaignId", c."subject", '
+            'c."sentAt", m."openRate", m."conversionRate", m."createdAt" '
+            'FROM "CampaignMetric" m JOIN "EmailCampaign" c ON c."id" = m."emailCampaignId" '
+            f"WHERE {' AND '.join(conditions)} "
+            'ORDER BY m."createdAt", m."id" LIMIT $5',
+            *params,
+            last_created,
+            last_id,
+            EXPORT_BATCH_SIZE,
+            *([campaign_id] if campaign_id else []),
+        )
+        if not rows:
+            return
+        yield rows
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        last = rows[-1]
+        last_created = (
+            last["createdAt"].isoformat()
+            if isinstance(last["createdAt"], datetime)
+            else last["createdAt"]
+        )
+        last_id = last["metricId"]
+
+
+async def _csv(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that hands out what was written since the last call, so the Parquet writer
+    can stream row groups instead of building the whole file in memory.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _parquet(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = pyarrow.schema(
+        [
+            ("metricId", pyarrow.string()),
+            ("campaignId", pyarrow.string()),
+            ("subject", pyarrow.string()),
+            ("sentAt", pyarrow.timestamp("ms", tz="UTC")),
+            ("openRate", pyarrow.float64()),
+            ("conversionRate", pyarrow.float64()),
+            ("createdAt", pyarrow.timestamp("ms", tz="UTC")),
+        ]
+    )
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    async for rows in batches:
+        # Each batch becomes one row group, flushed to the client before the next batch is read.
+        for row in rows:
+            # query_raw hands timestamps back as ISO strings.
+            for column in ("sentAt", "createdAt"):
+                if isinstance(row[column], str):
+                    row[column] = datetime.fromisoformat(row[column])
+        writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+async def exportEmailAnalytics(
+    date_from: datetime,
+    date_to: datetime,
+    campaign_id: Optional[str] = None,
+    format: ExportFormat = ExportFormat.CSV,
+) -> AsyncIterator[bytes]:
+    """
+    Exports every campaign metric of the emails sent within a date range as a CSV or Parquet file. Rows are read in keyset-ordered batches and written out as they arrive, so memory use does not depend on the size of the range.
+
+    Args:
+        date_from (datetime): Starting date for fetching emails for analytics.
+        date_to (datetime): Ending date for fetching emails for analytics.
+        campaign_id (Optional[str]): Optional campaign identifier to filter emails.
+        format (ExportFormat): 'csv' or 'parquet'. Parquet needs the optional pyarrow dependency.
+
+    Returns:
+        AsyncIterator[bytes]: The file contents, chunk by chunk.
+    """
+    if format == ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError(
+                "Parquet export is unavailable: the parquet extra (pyarrow) is not installed"
+            )
+        return _parquet(_batches(date_from, date_to, campaign_id))
+    return _csv(_batches(date_from, date_to, campaign_id))
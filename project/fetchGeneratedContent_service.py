@@ -1,7 +1,10 @@
+from datetime import datetime
 from enum import Enum
+from typing import Optional
 
 import prisma
 import prisma.models
+from project.http_caching import Version, version
 from pydantic import BaseModel
 
 
@@ -33,6 +36,28 @@ class GetAIContentResponse(BaseModel):
     validationStatus: str
 
 
+async def getContentVersion(contentId: str) -> Optional[Version]:
+    """
+    Reads only the draft's updatedAt and model, so that a client holding the current version can be
+    answered without loading the content.
+
+    Args:
+        contentId (str): Unique identifier for the generated content.
+
+    Returns:
+        Optional[Version]: None if the content does not exist.
+    """
+    rows = await prisma.get_client().query_raw(
+        'SELECT "updatedAt", "modelId" FROM "Draft" WHERE "id" = $1', contentId
+    )
+    if not rows:
+        return None
+    updated_at = datetime.fromisoformat(rows[0]["updatedAt"])
+    return version(
+        "content", contentId, updated_at, rows[0]["modelId"], last_modified=updated_at
+    )
+
+
 async def fetchGeneratedContent(contentId: str) -> GetAIContentResponse:
     """
     Retrieves the generated content from a prior request, identified by contentId. It outputs the full content if it's been validated by the Quality Check Module,
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Tuple
+
+import prisma
+import prisma.models
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    """
+    Hit/miss counters of the generation cache, split per tier.
+    """
+
+    entries: int
+    max_entries: int
+    memory_hits: int
+    db_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    db_enabled: bool
+
+
+def cache_key(intro: str, context: str, closing: str, model_type: str) -> str:
+    """
+    Hashes the content parameters and model type into a cache key. Whitespace is collapsed so that
+    requests differing only in spacing or line breaks share an entry.
+    """
+    normalized = [" ".join(part.split()) for part in (intro, context, closing)]
+    payload = json.dumps([model_type, *normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Size-bounded in-process LRU with a per-entry TTL, keyed by string.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class GenerationCache:
+    """
+    Two-tier cache of generated email bodies. The in-process LRU answers repeated requests without any
+    I/O; the optional Postgres tier (GenerationCache table) shares entries across workers and restarts.
+    """
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, max_entries: int, ttl: float, db_enabled: bool = False):
+        self.memory = LRUCache(max_entries, ttl)
+        self.ttl = ttl
+        self.db_enabled = db_enabled
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    @classmethod
+    def from_env(cls) -> "GenerationCache":
+        return cls(
+            max_entries=int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "10000")),
+            ttl=float(os.getenv("GENERATION_CACHE_TTL_SECONDS", "86400")),
+            db_enabled=os.getenv("GENERATION_CACHE_DB", "false").lower() == "true",
+        )
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Looks the key up in memory first, then in Postgres. Postgres hits are promoted into memory
+        for the remainder of their TTL.
+        """
+        content = self.memory.get(key)
+        if content is not None:
+            self.memory_hits += 1
+            return content
+        if self.db_enabled:
+            now = datetime.now(timezone.utc)
+            row = await prisma.models.GenerationCache.prisma().find_first(
+                where={"key": key, "expiresAt": {"gt": now}}
+            )
+            if row is not None:
+                self.db_hits += 1
+                self.memory.set(key, row.content, (row.expiresAt - now).total_seconds())
+                return row.content
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, content: str, model_type: str) -> None:
+        self.memory.set(key, content)
+        if not self.db_enabled:
+            return
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        await prisma.models.GenerationCache.prisma().upsert(
+            where={"key": key},
+            data={
+                "create": {
+                    "key": key,
+                    "modelType": model_type,
+                    "content": content,
+                    "expiresAt": expires_at,
+                },
+                "update": {"content": content, "expiresAt": expires_at},
+            },
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            await self.prune()
+
+    async def prune(self) -> int:
+        """
+        Deletes expired rows from the Postgres tier.
+
+        Returns:
+            int: Number of rows removed.
+        """
+        if not self.db_enabled:
+            return 0
+        return await prisma.models.GenerationCache.prisma().delete_many(
+            where={"expiresAt": {"lte": datetime.now(timezone.utc)}}
+        )
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            entries=len(self.memory),
+            max_entries=self.memory.max_entries,
+            memory_hits=self.memory_hits,
+            db_hits=self.db_hits,
+            misses=self.misses,
+            evictions=self.memory.evictions,
+            expirations=self.memory.expirations,
+            db_enabled=self.db_enabled,
+        )
+
+
+generation_cache = GenerationCache.from_env()
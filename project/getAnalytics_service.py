@@ -1,17 +1,32 @@
+import asyncio
 from datetime import datetime
-from typing import List
+from enum import Enum
+from typing import List, Optional
 
-import prisma
-import prisma.models
-from pydantic import BaseModel
+from project import metric_rollups
+from project.database import read_only
+from pydantic import BaseModel, Field
+
+
+class TrendBucket(Enum):
+    """
+    Width of one trend data point.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
 
 
 class GetEmailAnalyticsRequest(BaseModel):
     """
-    This request model for retrieving email analytics doesn’t require user input fields but will ensure appropriate user roles.
+    This request model for retrieving email analytics doesn’t require user input fields but will ensure appropriate user roles. Optionally selects the trend bucket width, how many of the most recent buckets to return, and a user whose campaigns the statistics are restricted to.
     """
 
-    pass
+    bucket: TrendBucket = TrendBucket.DAY
+    limit: int = Field(default=90, ge=1, le=1000)
+    userId: Optional[str] = None
 
 
 class EmailMetricTrends(BaseModel):
@@ -35,11 +50,15 @@ class EmailAnalyticsResponse(BaseModel):
     trend_data: List[EmailMetricTrends]
 
 
+@read_only
 async def getAnalytics(request: GetEmailAnalyticsRequest) -> EmailAnalyticsResponse:
     """
     Retrieves overall performance statistics of sent emails. It pulls email outcome data from the
     AI Writing Module to provide key metrics and trends such as open rate, click-through rate,
     and conversion metrics. This endpoint serves aggregated data suitable for dashboards and reports.
+    Averages and counts are read from the campaign metric rollups plus the metrics newer than the last
+    rollup refresh, and the trend holds the average open rate of each of the most recent `limit` time
+    buckets.
 
     Args:
         request (GetEmailAnalyticsRequest): This request model for retrieving email analytics doesn’t require user input fields but will ensure appropriate user roles.
@@ -47,8 +66,13 @@ async def getAnalytics(request: GetEmailAnalyticsRequest) -> EmailAnalyticsRespo
     Returns:
         EmailAnalyticsResponse: Aggregated data suitable for dashboards and reports showing email performance statistics.
     """
-    campaign_metrics = await prisma.models.CampaignMetric.prisma().find_many()
-    if not campaign_metrics:
+    totals, trend = await asyncio.gather(
+        metric_rollups.totals(user_id=request.userId),
+        metric_rollups.trend(
+            request.bucket.value, request.limit, user_id=request.userId
+        ),
+    )
+    if not totals.count:
         return EmailAnalyticsResponse(
             total_emails_sent=0,
             average_open_rate=0.0,
@@ -56,25 +80,15 @@ async def getAnalytics(request: GetEmailAnalyticsRequest) -> EmailAnalyticsRespo
             average_conversion_rate=0.0,
             trend_data=[],
         )
-    total_open_rate = sum((metric.openRate for metric in campaign_metrics))
-    total_conversion_rate = sum((metric.conversionRate for metric in campaign_metrics))
-    total_emails_sent = len(campaign_metrics)
-    average_open_rate = (
-        total_open_rate / total_emails_sent if total_emails_sent > 0 else 0
-    )
-    average_conversion_rate = (
-        total_conversion_rate / total_emails_sent if total_emails_sent > 0 else 0
-    )
+    average_open_rate = totals.average_open_rate
+    average_conversion_rate = totals.average_conversion_rate
     average_click_through_rate = (average_open_rate + average_conversion_rate) / 2
-    trend_data = sorted(
-        [
-            EmailMetricTrends(date=metric.createdAt, metric_value=metric.openRate)
-            for metric in campaign_metrics
-        ],
-        key=lambda x: x.date,
-    )
+    trend_data = [
+        EmailMetricTrends(date=point.key, metric_value=point.average_open_rate)
+        for point in trend
+    ]
     response = EmailAnalyticsResponse(
-        total_emails_sent=total_emails_sent,
+        total_emails_sent=totals.count,
         average_open_rate=average_open_rate,
         average_click_through_rate=average_click_through_rate,
         average_conversion_rate=average_conversion_rate,
@@ -1,7 +1,9 @@
 from datetime import datetime
+from typing import Optional
 
 import prisma
 import prisma.models
+from project.http_caching import Version, version
 from pydantic import BaseModel
 
 
@@ -16,6 +18,26 @@ class FetchDraftResponse(BaseModel):
     lastEdited: datetime
 
 
+async def getDraftVersion(draftId: str) -> Optional[Version]:
+    """
+    Reads only the draft's updatedAt, so that a client holding the current version can be answered
+    without loading the content.
+
+    Args:
+        draftId (str): The unique identifier of the draft.
+
+    Returns:
+        Optional[Version]: None if the draft does not exist.
+    """
+    rows = await prisma.get_client().query_raw(
+        'SELECT "updatedAt" FROM "Draft" WHERE "id" = $1', draftId
+    )
+    if not rows:
+        return None
+    updated_at = datetime.fromisoformat(rows[0]["updatedAt"])
+    return version("draft", draftId, updated_at, last_modified=updated_at)
+
+
 async def getDraftById(draftId: str) -> FetchDraftResponse:
     """
     Fetches a specific draft by its unique identifier. This route is used to retrieve detailed information
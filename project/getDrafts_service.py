@@ -1,16 +1,25 @@
-from typing import List
+from typing import List, Optional
 
 import prisma
 import prisma.models
-from pydantic import BaseModel
+from project.database import read_only
+from project.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    approximate_count,
+    fetch_page,
+)
+from pydantic import BaseModel, Field
 
 
 class GetDraftsRequest(BaseModel):
     """
-    Request model for retrieving all drafts. No parameters are needed since it fetches all available drafts.
+    Request model for retrieving editable drafts one page at a time.
     """
 
-    pass
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
+    includeTotal: bool = False
 
 
 class DraftInfo(BaseModel):
@@ -29,24 +38,35 @@ class GetDraftsResponse(BaseModel):
     """
 
     drafts: List[DraftInfo]
+    nextCursor: Optional[str] = None
+    approximateTotal: Optional[int] = None
 
 
+@read_only
 async def getDrafts(request: GetDraftsRequest) -> GetDraftsResponse:
     """
-    Retrieves a list of all editable drafts generated by the AI Writing Module. Each draft includes unique identifiers and editable content fields, making it easier for users to select and modify. Expected response structure: [{draftId: string, content: string, editable: boolean}].
+    Retrieves a page of the editable drafts generated by the AI Writing Module, newest first. Each draft includes unique identifiers and editable content fields, making it easier for users to select and modify. Expected response structure: [{draftId: string, content: string, editable: boolean}].
 
     Args:
-    request (GetDraftsRequest): Request model for retrieving all drafts. No parameters are needed since it fetches all available drafts.
+    request (GetDraftsRequest): Page size, the nextCursor of the previous page and whether to include an approximate total.
 
     Returns:
     GetDraftsResponse: Response model containing a list of drafts. Each draft includes an ID, content, and a flag indicating whether the draft is editable.
     """
-    editable_drafts = await prisma.models.Draft.prisma().find_many(
-        where={"status": "EDITED"}
+    editable_drafts, next_cursor = await fetch_page(
+        prisma.models.Draft, {"status": "EDITED"}, request.limit, request.cursor
     )
     draft_infos = [
         DraftInfo(draftId=draft.id, content=draft.content, editable=True)
         for draft in editable_drafts
     ]
-    response = GetDraftsResponse(drafts=draft_infos)
+    response = GetDraftsResponse(
+        drafts=draft_infos,
+        nextCursor=next_cursor,
+        approximateTotal=(
+            await approximate_count('"Draft"', "\"status\" = 'EDITED'")
+            if request.includeTotal
+            else None
+        ),
+    )
     return response
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Any, Optional
+
+import prisma
+import prisma.models
+from pydantic import BaseModel
+
+
+class JobStatusResponse(BaseModel):
+    """
+    Current state of a queued generation or validation job, including its result once it has succeeded.
+    """
+
+    jobId: str
+    queue: str
+    status: str
+    attempts: int
+    maxAttempts: int
+    result: Optional[Any] = None
+    lastError: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+
+
+async def getJobStatus(jobId: str) -> JobStatusResponse:
+    """
+    Retrieves the status of a job created by one of the deferred endpoints, such as queued content generation or validation.
+
+    Args:
+        jobId (str): The id returned when the job was enqueued.
+
+    Returns:
+        JobStatusResponse: Current state of the job, including its result once it has succeeded.
+    """
+    job = await prisma.models.Job.prisma().find_unique(where={"id": jobId})
+    if job is None:
+        raise ValueError(f"No job found with ID {jobId}")
+    return JobStatusResponse(
+        jobId=job.id,
+        queue=job.queue,
+        status=job.status,
+        attempts=job.attempts,
+        maxAttempts=job.maxAttempts,
+        result=job.result,
+        lastError=job.lastError,
+        createdAt=job.createdAt,
+        updatedAt=job.updatedAt,
+    )
@@ -1,8 +1,7 @@
 from datetime import date, datetime
 from typing import List, Tuple
 
-import prisma
-import prisma.models
+from project.model_registry import model_registry
 from pydantic import BaseModel
 
 
@@ -47,9 +46,7 @@ async def getModelFeedback(
         response = await getModelFeedback(model_id, date_range, feedback_type)
         print(response)
     """
-    model = await prisma.models.AIModel.prisma().find_unique(
-        where={"id": model_id}, include={"Feature": True}
-    )
+    model = await model_registry.get_by_id(model_id)
     if model is None:
         raise ValueError("No model found with the specified ID")
     if model.Feature is None:
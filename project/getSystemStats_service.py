@@ -0,0 +1,48 @@
+from typing import List
+
+from project.database import DatabaseStats, database
+from project.event_ingest import EventIngestStats, event_buffer
+from project.generation_cache import CacheStats, generation_cache
+from project.job_queue import QueueStats, queue_stats
+from project.llm_engine import ProviderStats, engine
+from project.model_registry import RegistryStats, model_registry
+from project.model_router import DeploymentHealth
+from project.semantic_cache import SemanticCacheStats, semantic_cache
+from project.template_engine import TemplateStoreStats, template_store
+from pydantic import BaseModel
+
+
+class SystemStatsResponse(BaseModel):
+    """
+    Snapshot of the in-process runtime state, meant for operators and load tests rather than end users.
+    """
+
+    generation: List[ProviderStats]
+    routing: List[DeploymentHealth]
+    generation_cache: CacheStats
+    semantic_cache: SemanticCacheStats
+    job_queues: List[QueueStats]
+    model_registry: RegistryStats
+    event_ingest: EventIngestStats
+    template_store: TemplateStoreStats
+    database: DatabaseStats
+
+
+async def getSystemStats() -> SystemStatsResponse:
+    """
+    Reports live runtime counters such as generation queue depth, in-flight model calls per provider, deployment latency, error rate and cost, generation, semantic cache and model registry hit rates, job queue throughput, event buffer fill level, compiled template cache hit rate, and read replica health and routing.
+
+    Returns:
+        SystemStatsResponse: Snapshot of the in-process runtime state.
+    """
+    return SystemStatsResponse(
+        generation=engine.stats(),
+        routing=engine.router.health(),
+        generation_cache=generation_cache.stats(),
+        semantic_cache=semantic_cache.stats(),
+        job_queues=queue_stats(),
+        model_registry=model_registry.stats(),
+        event_ingest=event_buffer.stats(),
+        template_store=template_store.stats(),
+        database=database.stats(),
+    )
@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Optional
 
-import prisma
-import prisma.models
+from project.http_caching import Version, version
+from project.template_engine import template_store
 from pydantic import BaseModel
 
 
@@ -11,11 +12,29 @@ class GetTemplateResponse(BaseModel):
     """
 
     id: str
+    title: str
     content: str
     category: str
     createdAt: datetime
 
 
+async def getTemplateVersion(templateId: str) -> Optional[Version]:
+    """
+    Version of the template as held by the compiled template cache, which also serves the body.
+
+    Args:
+        templateId (str): Unique identifier of the template.
+
+    Returns:
+        Optional[Version]: None if the template does not exist.
+    """
+    compiled = await template_store.get(templateId)
+    if compiled is None:
+        return None
+    updated_at = compiled.record.updatedAt
+    return version("template", templateId, updated_at, last_modified=updated_at)
+
+
 async def getTemplate(templateId: str) -> GetTemplateResponse:
     """
     Fetches a specific template by its unique identifier, 'templateId'. The response includes complete details of the template such as title, content, and creation date. Useful for template previews or editing.
@@ -26,13 +45,13 @@ async def getTemplate(templateId: str) -> GetTemplateResponse:
     Returns:
         GetTemplateResponse: This response model outlines the structure of the data returned for a single email template, directly reflecting the database structure to ensure all relevant details are included.
     """
-    template = await prisma.models.Template.prisma().find_unique(
-        where={"id": templateId}
-    )
-    if not template:
+    compiled = await template_store.get(templateId)
+    if compiled is None:
         raise ValueError(f"No template found with ID {templateId}")
+    template = compiled.record
     return GetTemplateResponse(
         id=template.id,
+        title=template.title,
         content=template.content,
         category=template.category,
         createdAt=template.createdAt,
@@ -0,0 +1,290 @@
+import argparse
+import gzip
+import json
+import os
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli is an optional extra; gzip is always available.
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, which is several times faster than the standard library encoder
+    and produces the same compact output. Used as the app-wide default response class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Picks the content coding for an Accept-Encoding header: the supported coding with the highest
+    q-value, preferring brotli over gzip on ties. Returns None when the client accepts neither.
+    """
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                weight = 0.0
+        if coding == "*":
+            for name in supported:
+                weights.setdefault(name, weight)
+        elif coding in supported:
+            weights[coding] = weight
+    best = max(supported, key=lambda name: weights.get(name, 0.0))
+    return best if weights.get(best, 0.0) > 0 else None
+
+
+class _Compressor:
+    """
+    Incremental compressor that flushes after every chunk, so streamed responses such as NDJSON and
+    server-sent events still reach the client chunk by chunk.
+    """
+
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        self.coding = coding
+        if coding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.coding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.coding == "br":
+            return self._br.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, coding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if coding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip as negotiated through Accept-Encoding. Complete bodies
+    smaller than `minimum_size` and types that do not compress, like Parquet exports, are sent as is.
+    Streamed bodies are compressed chunk by chunk. A strong ETag on a compressed response is made weak,
+    since it no longer describes the bytes sent; conditional requests compare ETags weakly anyway.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    @classmethod
+    def options_from_env(cls) -> Dict[str, int]:
+        return {
+            "minimum_size": int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+            "gzip_level": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+            "brotli_quality": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                data = compressor.chunk(body) if body else b""
+                if not more_body:
+                    data += compressor.finish()
+                await send(
+                    {"type": "http.response.body", "body": data, "more_body": more_body}
+                )
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            if not self._compressible(start["status"], headers) or (
+                not more_body and len(body) < self.minimum_size
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            headers["Content-Encoding"] = coding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                # The compressed bytes differ from the ones the strong ETag was computed for.
+                headers["ETag"] = f"W/{etag}"
+            if not more_body:
+                body = compress(body, coding, self.gzip_level, self.brotli_quality)
+                headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            compressor = _Compressor(coding, self.gzip_level, self.brotli_quality)
+            await send(start)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": compressor.chunk(body) if body else b"",
+                    "more_body": True,
+                }
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(status: int, headers: MutableHeaders) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+def _sample_payloads() -> Dict[str, Any]:
+    now = datetime.now(timezone.utc)
+    return {
+        "analytics": {
+            "open_rate": 0.41,
+            "click_through_rate": 0.12,
+            "conversion_rate": 0.03,
+            "trend_data": [
+                {
+                    "bucket": (now - timedelta(hours=hour)).isoformat(),
+                    "open_rate": 0.4 + hour % 7 / 100,
+                    "conversion_rate": 0.03 + hour % 5 / 1000,
+                    "count": 100 + hour,
+                }
+                for hour in range(1000)
+            ],
+        },
+        "drafts": {
+            "drafts": [
+                {
+                    "draftId": f"clx{index:021d}",
+                    "content": "Hi there, I noticed your team is scaling outbound and wanted to "
+                    "share how we help companies like yours book more meetings. " * 4,
+                    "editable": True,
+                }
+                for index in range(500)
+            ],
+            "nextCursor": "WyIyMDI0LTAxLTAxVDAwOjAwOjAwIiwiYWJjIl0",
+        },
+        "templates": {
+            "templates": [
+                {
+                    "templateId": f"clt{index:021d}",
+                    "title": f"Quarterly update {index}",
+                    "content": "Dear {{ first_name }}, here is what changed this quarter at "
+                    "{{ company.name }}. " * 6,
+                    "category": "newsletter",
+                }
+                for index in range(500)
+            ],
+            "nextCursor": None,
+        },
+    }
+
+
+def bench(iterations: int) -> List[Dict[str, Any]]:
+    """
+    Measures encoding CPU time and bytes on the wire for representative large responses: the standard
+    library JSON encoder FastAPI uses by default against orjson, and the body sizes with gzip and,
+    when installed, brotli at the configured levels.
+
+    Returns:
+        List[Dict[str, Any]]: One row per payload with microseconds per encode and sizes in bytes.
+    """
+    options = CompressionMiddleware.options_from_env()
+    results = []
+    for name, payload in _sample_payloads().items():
+        row: Dict[str, Any] = {"payload": name}
+        started = time.perf_counter()
+        for _ in range(iterations):
+            body = JSONResponse(payload).body
+        row["stdlib_us"] = (time.perf_counter() - started) / iterations * 1e6
+        started = time.perf_counter()
+        for _ in range(iterations):
+            body = FastJSONResponse(payload).body
+        row["orjson_us"] = (time.perf_counter() - started) / iterations * 1e6
+        assert json.loads(body) == json.loads(JSONResponse(payload).body)
+        row["identity_bytes"] = len(body)
+        codings = ["gzip"] + (["br"] if brotli is not None else [])
+        for coding in codings:
+            started = time.perf_counter()
+            compressed = compress(
+                body, coding, options["gzip_level"], options["brotli_quality"]
+            )
+            row[f"{coding}_us"] = (time.perf_counter() - started) * 1e6
+            row[f"{coding}_bytes"] = len(compressed)
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    """
+    Serialization and compression benchmark: `python -m project.http_encoding`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark response encoding.")
+    parser.add_argument("--iterations", type=int, default=200)
+    for row in bench(parser.parse_args().iterations):
+        print(
+            "  ".join(
+                f"{key}={value:.0f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in row.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
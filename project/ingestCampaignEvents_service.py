@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import List, Optional
+
+from project.event_ingest import event_buffer
+from pydantic import BaseModel
+
+
+class EventType(Enum):
+    """
+    Kinds of per-email events reported by the email service provider.
+    """
+
+    DELIVERED = "DELIVERED"
+    OPEN = "OPEN"
+    CLICK = "CLICK"
+    CONVERSION = "CONVERSION"
+
+
+class CampaignEventInput(BaseModel):
+    """
+    One open, click, conversion or delivery event of a campaign email.
+    """
+
+    emailCampaignId: str
+    type: EventType
+    recipient: Optional[str] = None
+    occurredAt: Optional[datetime] = None
+
+
+class EventIngestResponse(BaseModel):
+    """
+    Acknowledges that a batch of events was buffered for storage.
+    """
+
+    accepted: int
+    buffered: int
+
+
+async def ingestCampaignEvents(
+    events: List[CampaignEventInput],
+) -> EventIngestResponse:
+    """
+    Accepts a batch of email events, typically from an email service provider webhook. Events are buffered in memory and stored in bulk shortly afterwards, when they also update the campaign's delivery, open, click and conversion counts that its event-derived rates are computed from.
+
+    Args:
+        events (List[CampaignEventInput]): The events to record.
+
+    Returns:
+        EventIngestResponse: How many events were accepted and how many are waiting to be stored.
+
+    Raises:
+        BufferFullError: When the buffer stays full, so the sender should retry later.
+    """
+    received = datetime.now(timezone.utc)
+    buffered = await event_buffer.add(
+        [
+            {
+                "emailCampaignId": event.emailCampaignId,
+                "type": event.type.value,
+                "recipient": event.recipient,
+                "occurredAt": event.occurredAt or received,
+            }
+            for event in events
+        ]
+    )
+    return EventIngestResponse(accepted=len(events), buffered=buffered)
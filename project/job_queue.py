@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.database import database
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Modules whose import registers job handlers; imported by every worker before polling.
+HANDLER_MODULES = [
+    "project.createContentRequest_service",
+    "project.validateContent_service",
+]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+class JobEnqueuedResponse(BaseModel):
+    """
+    Returned when work is deferred to the job queue instead of running inside the request.
+    """
+
+    jobId: str
+    status: str
+
+
+class QueueStats(BaseModel):
+    """
+    Per-queue throughput counters of this process.
+    """
+
+    queue: str
+    enqueued: int
+    claimed: int
+    succeeded: int
+    failed: int
+    retried: int
+    average_duration_ms: float
+    throughput_per_minute: int
+
+
+def handler(queue: str) -> Callable[[JobHandler], JobHandler]:
+    """
+    Registers the decorated coroutine as the handler for jobs on `queue`. The handler receives the job
+    payload and its return value is stored as the job result.
+    """
+
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[queue] = func
+        return func
+
+    return register
+
+
+class _QueueCounters:
+    def __init__(self, queue: str):
+        self.queue = queue
+        self.enqueued = 0
+        self.claimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.duration = 0.0
+        self.finished: Deque[float] = deque()
+
+    def record_finish(self, duration: float) -> None:
+        now = time.monotonic()
+        self.duration += duration
+        self.finished.append(now)
+        while self.finished and self.finished[0] < now - 60:
+            self.finished.popleft()
+
+    def stats(self) -> QueueStats:
+        done = self.succeeded + self.failed + self.retried
+        cutoff = time.monotonic() - 60
+        return QueueStats(
+            queue=self.queue,
+            enqueued=self.enqueued,
+            claimed=self.claimed,
+            succeeded=self.succeeded,
+            failed=self.failed,
+            retried=self.retried,
+            average_duration_ms=self.duration / done * 1000 if done else 0.0,
+            throughput_per_minute=sum(1 for t in self.finished if t >= cutoff),
+        )
+
+
+_counters: Dict[str, _QueueCounters] = {}
+
+
+def _counter(queue: str) -> _QueueCounters:
+    counter = _counters.get(queue)
+    if counter is None:
+        counter = _counters[queue] = _QueueCounters(queue)
+    return counter
+
+
+def queue_stats() -> List[QueueStats]:
+    return [counter.stats() for counter in _counters.values()]
+
+
+async def enqueue(
+    queue: str, payload: Dict[str, Any], max_attempts: Optional[int] = None
+) -> JobEnqueuedResponse:
+    """
+    Adds a job to a queue.
+
+    Args:
+        queue (str): Name of the queue, which selects the handler.
+        payload (Dict[str, Any]): JSON-serializable arguments for the handler.
+        max_attempts (Optional[int]): Attempts before the job is marked FAILED; defaults to JOB_MAX_ATTEMPTS.
+
+    Returns:
+        JobEnqueuedResponse: The new job's id and status.
+    """
+    job = await prisma.models.Job.prisma().create(
+        data={
+            "queue": queue,
+            "payload": prisma.Json(payload),
+            "status": prisma.enums.JobStatus.QUEUED,
+            "maxAttempts": max_attempts or int(os.getenv("JOB_MAX_ATTEMPTS", "5")),
+        }
+    )
+    _counter(queue).enqueued += 1
+    return JobEnqueuedResponse(jobId=job.id, status=job.status)
+
+
+async def claim(queue: str, visibility_timeout: float, limit: int = 1) -> List[Dict]:
+    """
+    Atomically claims up to `limit` due jobs. Rows locked by other workers are skipped instead of waited
+    on, and RUNNING jobs whose visibility timeout expired (their worker died) are claimed again.
+    """
+    return await prisma.get_client().query_raw(
+        """
+        UPDATE "Job" SET "status" = 'RUNNING'::"JobStatus", "attempts" = "attempts" + 1,
+            "lockedUntil" = now() + make_interval(secs => $2), "updatedAt" = now()
+        WHERE "id" IN (
+            SELECT "id" FROM "Job"
+            WHERE "queue" = $1 AND (
+                ("status" = 'QUEUED'::"JobStatus" AND "runAt" <= now())
+                OR ("status" = 'RUNNING'::"JobStatus" AND "lockedUntil" < now())
+            )
+            ORDER BY "runAt"
+            LIMIT $3
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING "id", "payload", "attempts", "maxAttempts"
+        """,
+        queue,
+        visibility_timeout,
+        limit,
+    )
+
+
+def backoff_seconds(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, capped at JOB_BACKOFF_MAX_SECONDS.
+    """
+    base = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "2"))
+    cap = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "300"))
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+async def _run_job(queue: str, job: Dict, visibility_timeout: float) -> None:
+    counter = _counter(queue)
+    counter.claimed += 1
+    started = time.monotonic()
+    try:
+        if job["attempts"] > job["maxAttempts"]:
+            raise RuntimeError("Job exceeded its attempts after its worker stopped")
+        payload = job["payload"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        async with asyncio.timeout(visibility_timeout):
+            result = await _handlers[queue](payload)
+    except Exception as e:
+        counter.record_finish(time.monotonic() - started)
+        if job["attempts"] >= job["maxAttempts"]:
+            counter.failed += 1
+            logger.exception("Job %s on %s failed permanently", job["id"], queue)
+            data = {"status": prisma.enums.JobStatus.FAILED}
+        else:
+            counter.retried += 1
+            logger.warning("Job %s on %s failed, retrying: %s", job["id"], queue, e)
+            data = {
+                "status": prisma.enums.JobStatus.QUEUED,
+                "runAt": datetime.now(timezone.utc)
+                + timedelta(seconds=backoff_seconds(job["attempts"])),
+            }
+        await prisma.models.Job.prisma().update(
+            where={"id": job["id"]},
+            data={**data, "lockedUntil": None, "lastError": str(e) or repr(e)},
+        )
+        return
+    counter.record_finish(time.monotonic() - started)
+    counter.succeeded += 1
+    await prisma.models.Job.prisma().update(
+        where={"id": job["id"]},
+        data={
+            "status": prisma.enums.JobStatus.SUCCEEDED,
+            "lockedUntil": None,
+            "result": prisma.Json(result),
+        },
+    )
+
+
+class WorkerPool:
+    """
+    A fixed number of asyncio workers polling the given queues. Each worker claims one job at a time,
+    so `concurrency` bounds how many jobs this process runs in parallel.
+    """
+
+    def __init__(
+        self,
+        queues: List[str],
+        concurrency: int,
+        poll_interval: float = 1.0,
+        visibility_timeout: float = 300.0,
+    ):
+        self.queues = queues
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        return cls(
+            queues=os.getenv("JOB_QUEUES", "generation,validation").split(","),
+            concurrency=int(os.getenv("JOB_WORKERS", "4")),
+            poll_interval=float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1")),
+            visibility_timeout=float(
+                os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "300")
+            ),
+        )
+
+    async def _work(self) -> None:
+        while True:
+            claimed = False
+            for queue in self.queues:
+                try:
+                    jobs = await claim(queue, self.visibility_timeout)
+                except Exception:
+                    logger.exception("Failed to poll queue %s", queue)
+                    continue
+                for job in jobs:
+                    claimed = True
+                    try:
+                        await _run_job(queue, job, self.visibility_timeout)
+                    except Exception:
+                        logger.exception(
+                            "Failed to record outcome of job %s", job["id"]
+                        )
+            if not claimed:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def _serve(pool: WorkerPool) -> None:
+    database.register()
+    await database.connect()
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+        await database.disconnect()
+
+
+def _process_main(concurrency: int) -> None:
+    pool = WorkerPool.from_env()
+    pool.concurrency = concurrency
+    asyncio.run(_serve(pool))
+
+
+def main() -> None:
+    """
+    Runs dedicated worker processes, used with JOB_WORKER_MODE=process so that slow jobs never share an
+    event loop with the API: `python -m project.job_queue --processes 4 --concurrency 8`.
+    """
+    parser = argparse.ArgumentParser(description="Run job queue workers.")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("JOB_WORKERS", "4"))
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    processes = [
+        multiprocessing.Process(target=_process_main, args=(args.concurrency,))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from enum import Enum
 from typing import List
 
-import prisma
-import prisma.models
+from project.http_caching import Version, version
+from project.llm_engine import engine
+from project.model_registry import model_registry
 from pydantic import BaseModel
 
 
@@ -42,9 +43,34 @@ class GetModelsResponse(BaseModel):
     models: List[AIModelDetail]
 
 
+async def listModelsVersion() -> Version:
+    """
+    Version of the model list, derived from the in-memory registry and the current availability of
+    each model, so that it costs neither a query nor building the response.
+
+    Returns:
+        Version: Changes whenever a model, its feature or its availability changes.
+    """
+    models_in_db = await model_registry.all()
+    return version(
+        "models",
+        *(
+            (
+                model.id,
+                model.modelType.name,
+                model.Feature.name,
+                model.Feature.description,
+                engine.router.available(model.modelType.name),
+            )
+            for model in models_in_db
+            if model.Feature is not None
+        ),
+    )
+
+
 async def listModels(request: GetModelsRequest) -> GetModelsResponse:
     """
-    Retrieves a list of available AI models for content generation, including critical details.
+    Retrieves a list of available AI models for content generation, including critical details. A model is available while at least one of its deployments is not taken out of rotation by the model router.
 
     Args:
         request (GetModelsRequest): Request object for fetching AI models.
@@ -52,15 +78,13 @@ async def listModels(request: GetModelsRequest) -> GetModelsResponse:
     Returns:
         GetModelsResponse: Response object containing a list of AI models details.
     """
-    models_in_db = await prisma.models.AIModel.prisma().find_many(
-        include={"Feature": True}
-    )
+    models_in_db = await model_registry.all()
     models_details = [
         AIModelDetail(
             name=model.Feature.name,
             description=model.Feature.description,
             modelType=ModelType[model.modelType.name],
-            availability=True,
+            availability=engine.router.available(model.modelType.name),
         )
         for model in models_in_db
         if model.Feature is not None
@@ -1,8 +1,9 @@
-import math
 from typing import List, Optional
 
 import prisma
 import prisma.models
+from project.database import read_only
+from project.pagination import approximate_count, fetch_page
 from pydantic import BaseModel
 
 
@@ -23,50 +24,57 @@ class GetTemplatesResponse(BaseModel):
     """
 
     templates: List[Template]
-    totalTemplates: int
-    currentPage: int
-    totalPages: int
+    nextCursor: Optional[str] = None
+    approximateTotal: Optional[int] = None
 
 
+@read_only
 async def listTemplates(
-    page: int, limit: int, category: Optional[str], sortBy: str
+    limit: int,
+    category: Optional[str],
+    sortBy: str,
+    cursor: Optional[str] = None,
+    includeTotal: bool = False,
 ) -> GetTemplatesResponse:
     """
-    Retrieves a list of all available email templates. It returns an array of template objects, sorted by the date they were updated. This endpoint supports pagination and filtering parameters to handle large volumes of data.
+    Retrieves a list of all available email templates. It returns an array of template objects, sorted by the date they were created. Pages are addressed with opaque cursors, so deep pages cost the same as the first one.
 
     Args:
-    page (int): Specifies the page number in the pagination of template listings.
     limit (int): Specifies the number of templates to return per page.
     category (Optional[str]): Optional filter to list templates by specific categories.
-    sortBy (str): Parameter to specify the sorting order of the templates based on the date updated. Default is 'desc' for descending.
+    sortBy (str): Parameter to specify the sorting order of the templates based on the creation date. Default is 'desc' for descending.
+    cursor (Optional[str]): The nextCursor of the previous page; omitted for the first page.
+    includeTotal (bool): Whether to include an approximate total number of matching templates.
 
     Returns:
     GetTemplatesResponse: The response model that returns an array of email templates. Includes pagination details to handle the navigation through the template listings.
     """
-    query_parameters = {
-        "skip": (page - 1) * limit,
-        "take": limit,
-        "order": {"createdAt": "desc" if sortBy.lower() == "desc" else "asc"},
-    }
-    if category:
-        query_parameters["where"] = {"category": category}
-    templates = await prisma.models.Template.prisma().find_many(**query_parameters)
-    total_count = await prisma.models.Template.prisma().count(
-        where=query_parameters.get("where", {})
+    where = {"category": category} if category else {}
+    templates, next_cursor = await fetch_page(
+        prisma.models.Template,
+        where,
+        limit,
+        cursor,
+        descending=sortBy.lower() == "desc",
     )
     template_objects = [
         Template(
             templateId=template.id,
-            title=template.content[:30],
+            title=template.title or template.content[:30],
             content=template.content,
             category=template.category,
         )
         for template in templates
     ]
-    total_pages = math.ceil(total_count / limit) if limit > 0 else 0
+    approximate_total = None
+    if includeTotal:
+        approximate_total = (
+            await approximate_count('"Template"', '"category" = $1', category)
+            if category
+            else await approximate_count('"Template"')
+        )
     return GetTemplatesResponse(
         templates=template_objects,
-        totalTemplates=total_count,
-        currentPage=page,
-        totalPages=total_pages,
+        nextCursor=next_cursor,
+        approximateTotal=approximate_total,
     )
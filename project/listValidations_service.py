@@ -3,6 +3,7 @@ from typing import List, Optional
 
 import prisma
 import prisma.models
+from project.pagination import DEFAULT_PAGE_SIZE, approximate_count, fetch_page
 from pydantic import BaseModel
 
 
@@ -22,23 +23,31 @@ class ListQualityChecksResponse(BaseModel):
     """
 
     validations: List[QualityCheckSummary]
+    nextCursor: Optional[str] = None
+    approximateTotal: Optional[int] = None
 
 
 async def listValidations(
-    limit: Optional[int] = None, offset: Optional[int] = None
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    includeTotal: bool = False,
 ) -> ListQualityChecksResponse:
     """
     Lists recent content validations submitted to the module. Provides a summary of each validation, including IDs, submission times, and status.
 
     Args:
-        limit (Optional[int]): Limits the number of validation summaries returned.
-        offset (Optional[int]): Skips the specified number of records before beginning to return the summaries.
+        limit (Optional[int]): Limits the number of validation summaries returned. Defaults to DEFAULT_PAGE_SIZE.
+        cursor (Optional[str]): The nextCursor of the previous page; omitted for the first page.
+        includeTotal (bool): Whether to include an approximate total number of validations.
 
     Returns:
         ListQualityChecksResponse: Provides a list of quality checks along with relevant data such as ID, submission time, and current status.
     """
-    drafts = await prisma.models.Draft.prisma().find_many(
-        take=limit, skip=offset, where={"status": "EDITED"}, order={"createdAt": "desc"}
+    drafts, next_cursor = await fetch_page(
+        prisma.models.Draft,
+        {"status": "EDITED"},
+        limit or DEFAULT_PAGE_SIZE,
+        cursor,
     )
     summaries = [
         QualityCheckSummary(
@@ -46,4 +55,12 @@ async def listValidations(
         )
         for draft in drafts
     ]
-    return ListQualityChecksResponse(validations=summaries)
+    return ListQualityChecksResponse(
+        validations=summaries,
+        nextCursor=next_cursor,
+        approximateTotal=(
+            await approximate_count('"Draft"', "\"status\" = 'EDITED'")
+            if includeTotal
+            else None
+        ),
+    )
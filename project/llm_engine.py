@@ -0,0 +1,450 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from project.model_router import ModelRouter
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAMES = {
+    "GPT_4_TURBO": "gpt-4-turbo",
+    "CUSTOM_CHECKER": "gpt-3.5-turbo",
+}
+
+# Model types with a concurrency budget of their own, so the checker's short calls never queue behind
+# long writer streams of the same provider. Overridden with LLM_CONCURRENCY_<TYPE>.
+DEFAULT_TYPE_CONCURRENCY = {"CUSTOM_CHECKER": 8}
+
+
+@dataclass
+class Completion:
+    """
+    Result of a single non-streaming model call.
+    """
+
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class ProviderStats(BaseModel):
+    """
+    Live counters for one upstream provider, used to observe saturation of the generation engine. Model
+    types with their own budget are reported separately, e.g. as 'openai:CUSTOM_CHECKER'.
+    """
+
+    provider: str
+    concurrency_limit: int
+    in_flight: int
+    queued: int
+    completed: int
+    failed: int
+    timed_out: int
+
+
+class StubProvider:
+    """
+    Local, deterministic provider that echoes the prompt back word by word. It never touches the
+    network, so it is used for local development, tests and benchmarks (LLM_PROVIDER=stub). Per-model
+    latencies and failure rates simulate degraded deployments to exercise the model router.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        model_latencies: Optional[Dict[str, float]] = None,
+        failure_rates: Optional[Dict[str, float]] = None,
+    ):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.model_latencies = model_latencies or {}
+        self.failure_rates = failure_rates or {}
+
+    @staticmethod
+    def _tokens(messages: List[Dict[str, str]]) -> List[str]:
+        words = messages[-1]["content"].split() if messages else []
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    async def _connect(self, model: str) -> None:
+        await asyncio.sleep(self.model_latencies.get(model, self.latency))
+        if random.random() < self.failure_rates.get(model, 0.0):
+            raise ConnectionError(f"Simulated failure of {model}")
+
+    async def complete(self, model: str, messages: List[Dict[str, str]]) -> Completion:
+        tokens = self._tokens(messages)
+        await self._connect(model)
+        await asyncio.sleep(self.token_delay * len(tokens))
+        return Completion(
+            text="".join(tokens),
+            model=model,
+            prompt_tokens=sum(len(m["content"].split()) for m in messages),
+            completion_tokens=len(tokens),
+        )
+
+    async def stream(
+        self, model: str, messages: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        await self._connect(model)
+        for token in self._tokens(messages):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def aclose(self) -> None:
+        pass
+
+
+class LiteLLMProvider:
+    """
+    Provider backed by LiteLLM. All calls share one pooled httpx client so that concurrent
+    requests reuse keep-alive connections instead of opening a new one per call.
+    """
+
+    def __init__(self, max_connections: int = 100, timeout: float = 60.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.timeout = timeout
+        self._session: Optional[httpx.AsyncClient] = None
+
+    def _ensure_session(self) -> None:
+        import litellm
+
+        if self._session is None or self._session.is_closed:
+            self._session = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            litellm.aclient_session = self._session
+
+    async def complete(self, model: str, messages: List[Dict[str, str]]) -> Completion:
+        import litellm
+
+        self._ensure_session()
+        response = await litellm.acompletion(
+            model=model, messages=messages, timeout=self.timeout
+        )
+        usage = getattr(response, "usage", None)
+        return Completion(
+            text=response.choices[0].message.content or "",
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    async def stream(
+        self, model: str, messages: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        import litellm
+
+        self._ensure_session()
+        response = await litellm.acompletion(
+            model=model, messages=messages, timeout=self.timeout, stream=True
+        )
+        async for chunk in response:
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+
+class _ProviderSlot:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def stats(self) -> ProviderStats:
+        return ProviderStats(
+            provider=self.name,
+            concurrency_limit=self.limit,
+            in_flight=self.in_flight,
+            queued=self.queued,
+            completed=self.completed,
+            failed=self.failed,
+            timed_out=self.timed_out,
+        )
+
+
+def _parse_model_values(value: str) -> Dict[str, float]:
+    """
+    Parses "model=value,model=value" settings such as LLM_STUB_MODEL_LATENCY_MS.
+    """
+    pairs = [item.rsplit("=", 1) for item in value.split(",") if "=" in item]
+    return {model.strip(): float(number) for model, number in pairs}
+
+
+class GenerationEngine:
+    """
+    Async front door for every model call. Each upstream provider (openai, azure, anthropic, ...)
+    gets its own concurrency semaphore so a burst of requests queues inside the event loop instead
+    of exhausting sockets or provider rate limits, and every call is bounded by a timeout. Model
+    types listed in `type_concurrency` get a separate semaphore per provider with their own limit. The model
+    router picks the deployment for each call, and a failed call is retried on the next best
+    deployment of the same model type.
+    """
+
+    def __init__(
+        self,
+        provider,
+        concurrency: int = 16,
+        timeout: float = 60.0,
+        router: Optional[ModelRouter] = None,
+        type_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.provider = provider
+        self.concurrency = concurrency
+        self.type_concurrency = type_concurrency or {}
+        self.timeout = timeout
+        self.router = router or ModelRouter(
+            {model_type: [model] for model_type, model in DEFAULT_MODEL_NAMES.items()}
+        )
+        self._slots: Dict[str, _ProviderSlot] = {}
+
+    @classmethod
+    def from_env(cls) -> "GenerationEngine":
+        """
+        Builds the engine from LLM_* environment variables.
+
+        Returns:
+            GenerationEngine: Engine using the stub provider when LLM_PROVIDER=stub, LiteLLM otherwise.
+        """
+        concurrency = int(os.getenv("LLM_CONCURRENCY", "16"))
+        timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+        if os.getenv("LLM_PROVIDER", "litellm") == "stub":
+            model_latencies = _parse_model_values(
+                os.getenv("LLM_STUB_MODEL_LATENCY_MS", "")
+            )
+            provider = StubProvider(
+                latency=float(os.getenv("LLM_STUB_LATENCY_MS", "0")) / 1000,
+                token_delay=float(os.getenv("LLM_STUB_TOKEN_DELAY_MS", "0")) / 1000,
+                model_latencies={
+                    model: ms / 1000 for model, ms in model_latencies.items()
+                },
+                failure_rates=_parse_model_values(
+                    os.getenv("LLM_STUB_MODEL_FAILURE_RATE", "")
+                ),
+            )
+        else:
+            provider = LiteLLMProvider(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+                timeout=timeout,
+            )
+        type_concurrency = {
+            model_type: int(os.getenv(f"LLM_CONCURRENCY_{model_type}", limit))
+            for model_type, limit in DEFAULT_TYPE_CONCURRENCY.items()
+        }
+        return cls(
+            provider,
+            concurrency,
+            timeout,
+            ModelRouter.from_env(DEFAULT_MODEL_NAMES),
+            type_concurrency,
+        )
+
+    def resolve_model(self, model_type: str) -> str:
+        """
+        Maps a ModelType name (e.g. 'GPT_4_TURBO') to the model string the router currently prefers.
+
+        Raises:
+            ValueError: If no deployment of the model type is configured or available.
+        """
+        candidates = self.router.candidates(model_type)
+        if not candidates:
+            raise ValueError(f"No deployment of model type {model_type} is available")
+        return candidates[0]
+
+    @staticmethod
+    def provider_of(model: str) -> str:
+        return model.split("/", 1)[0] if "/" in model else "openai"
+
+    def _slot(self, model_type: str, model: str) -> _ProviderSlot:
+        name = self.provider_of(model)
+        limit = self.concurrency
+        if model_type in self.type_concurrency:
+            name = f"{name}:{model_type}"
+            limit = self.type_concurrency[model_type]
+        slot = self._slots.get(name)
+        if slot is None:
+            slot = self._slots[name] = _ProviderSlot(name, limit)
+        return slot
+
+    async def _acquire(self, slot: _ProviderSlot) -> None:
+        slot.queued += 1
+        try:
+            await slot.semaphore.acquire()
+        finally:
+            slot.queued -= 1
+        slot.in_flight += 1
+
+    @staticmethod
+    def _release(slot: _ProviderSlot) -> None:
+        slot.in_flight -= 1
+        slot.semaphore.release()
+
+    def _release_probes(self, model_type: str, candidates: List[str]) -> None:
+        # A probe reserved by candidates() but never tried, e.g. after an earlier deployment answered, is
+        # handed back; deployments that were tried already reported their outcome.
+        for model in candidates:
+            self.router.abandon(model_type, model)
+
+    async def _complete(
+        self, model_type: str, model: str, messages: List[Dict[str, str]]
+    ) -> Completion:
+        slot = self._slot(model_type, model)
+        await self._acquire(slot)
+        self.router.begin(model_type, model)
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout):
+                completion = await self.provider.complete(model, messages)
+        except TimeoutError:
+            slot.timed_out += 1
+            self.router.record_failure(model_type, model)
+            raise TimeoutError(
+                f"Generation with {model} timed out after {self.timeout}s"
+            )
+        except asyncio.CancelledError:
+            self.router.abandon(model_type, model)
+            raise
+        except Exception:
+            slot.failed += 1
+            self.router.record_failure(model_type, model)
+            raise
+        finally:
+            self._release(slot)
+        slot.completed += 1
+        self.router.record_success(
+            model_type,
+            model,
+            time.perf_counter() - started,
+            completion.prompt_tokens,
+            completion.completion_tokens,
+        )
+        return completion
+
+    async def generate(
+        self, model_type: str, messages: List[Dict[str, str]]
+    ) -> Completion:
+        """
+        Runs one completion on the best available deployment, falling back to the next one if it fails.
+
+        Args:
+            model_type (str): ModelType name used to pick the underlying model.
+            messages (List[Dict[str, str]]): Chat messages sent to the model.
+
+        Returns:
+            Completion: Generated text and token usage.
+
+        Raises:
+            Exception: The last deployment's error when every deployment failed.
+        """
+        candidates = self.router.candidates(model_type, probe=True)
+        if not candidates:
+            raise ValueError(f"No deployment of model type {model_type} is available")
+        try:
+            for model in candidates[:-1]:
+                try:
+                    return await self._complete(model_type, model, messages)
+                except Exception as e:
+                    logger.warning("Falling back from %s: %s", model, e)
+            return await self._complete(model_type, candidates[-1], messages)
+        finally:
+            self._release_probes(model_type, candidates)
+
+    async def stream(
+        self, model_type: str, messages: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """
+        Streams completion tokens. The provider slot is held until the stream is exhausted or closed,
+        and the timeout applies to the whole stream. A deployment that fails before its first token is
+        replaced by the next best one; once tokens were yielded the error is raised instead. The latency
+        reported to the router is the time spent waiting for the provider, not for the consumer.
+
+        Args:
+            model_type (str): ModelType name used to pick the underlying model.
+            messages (List[Dict[str, str]]): Chat messages sent to the model.
+
+        Yields:
+            str: Text deltas in the order the model produced them.
+        """
+        candidates = self.router.candidates(model_type, probe=True)
+        if not candidates:
+            raise ValueError(f"No deployment of model type {model_type} is available")
+        try:
+            for attempt, model in enumerate(candidates):
+                slot = self._slot(model_type, model)
+                await self._acquire(slot)
+                self.router.begin(model_type, model)
+                waited = 0.0
+                deadline = asyncio.get_running_loop().time() + self.timeout
+                tokens = self.provider.stream(model, messages)
+                completion_tokens = 0
+                try:
+                    while True:
+                        started = time.perf_counter()
+                        try:
+                            async with asyncio.timeout_at(deadline):
+                                token = await anext(tokens)
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            waited += time.perf_counter() - started
+                        completion_tokens += 1
+                        yield token
+                except (Exception, GeneratorExit, asyncio.CancelledError) as e:
+                    if isinstance(e, TimeoutError):
+                        slot.timed_out += 1
+                        self.router.record_failure(model_type, model)
+                        error = TimeoutError(
+                            f"Generation with {model} timed out after {self.timeout}s"
+                        )
+                    elif isinstance(e, Exception):
+                        slot.failed += 1
+                        self.router.record_failure(model_type, model)
+                        error = e
+                    else:
+                        self.router.abandon(model_type, model)
+                        raise
+                    if completion_tokens or attempt == len(candidates) - 1:
+                        raise error
+                    logger.warning("Falling back from %s: %s", model, error)
+                    continue
+                finally:
+                    await tokens.aclose()
+                    self._release(slot)
+                slot.completed += 1
+                self.router.record_success(
+                    model_type,
+                    model,
+                    waited,
+                    sum(len(m["content"].split()) for m in messages),
+                    completion_tokens,
+                )
+                return
+        finally:
+            self._release_probes(model_type, candidates)
+
+    def stats(self) -> List[ProviderStats]:
+        return [slot.stats() for slot in self._slots.values()]
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+
+engine = GenerationEngine.from_env()
@@ -0,0 +1,408 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import prisma
+from project.database import database
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionedTable(BaseModel):
+    """
+    A table stored as monthly range partitions, with the constraints and indexes that schema.prisma
+    declares for it, recreated by `migrate` under the names Prisma expects.
+    """
+
+    name: str
+    key: str
+    foreign_keys: List[str]
+    indexes: Dict[str, List[str]]
+
+
+PARTITIONED_TABLES = [
+    PartitionedTable(
+        name="CampaignMetric",
+        key="createdAt",
+        foreign_keys=[
+            'ADD CONSTRAINT "CampaignMetric_emailCampaignId_fkey" FOREIGN KEY ("emailCampaignId") '
+            'REFERENCES "EmailCampaign"("id") ON DELETE RESTRICT ON UPDATE CASCADE'
+        ],
+        indexes={
+            "CampaignMetric_emailCampaignId_createdAt_idx": [
+                "emailCampaignId",
+                "createdAt",
+            ],
+            "CampaignMetric_createdAt_idx": ["createdAt"],
+        },
+    ),
+    PartitionedTable(
+        name="CampaignEvent",
+        key="occurredAt",
+        foreign_keys=[
+            'ADD CONSTRAINT "CampaignEvent_emailCampaignId_fkey" FOREIGN KEY ("emailCampaignId") '
+            'REFERENCES "EmailCampaign"("id") ON DELETE RESTRICT ON UPDATE CASCADE'
+        ],
+        indexes={
+            "CampaignEvent_emailCampaignId_occurredAt_idx": [
+                "emailCampaignId",
+                "occurredAt",
+            ],
+        },
+    ),
+]
+
+
+def retention_months() -> int:
+    """
+    Months of raw metric and event data to keep; 0 keeps everything.
+    """
+    return int(os.getenv("METRIC_RETENTION_MONTHS", "0"))
+
+
+def retention_cutoff_sql() -> str:
+    """
+    SQL expression for the oldest timestamp still kept in the partitioned tables.
+    """
+    months = retention_months()
+    if months <= 0:
+        return "'-infinity'::timestamp"
+    return (
+        "date_trunc('month', now() AT TIME ZONE 'UTC') "
+        f"- make_interval(months => {months})"
+    )
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _this_month() -> date:
+    today = datetime.now(timezone.utc).date()
+    return date(today.year, today.month, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def _partition_month(table: str, name: str) -> Optional[date]:
+    suffix = name[len(table) + 2 :]
+    if not name.startswith(f"{table}_p") or len(suffix) != 7:
+        return None
+    return date(int(suffix[:4]), int(suffix[5:]), 1)
+
+
+def _create_partition_sql(table: str, month: date) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+async def is_partitioned(client, table: str) -> bool:
+    rows = await client.query_raw(
+        'SELECT count(*)::int AS "n" FROM pg_partitioned_table p '
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = $1",
+        table,
+    )
+    return bool(rows and rows[0]["n"])
+
+
+async def partitions(client, table: str) -> List[str]:
+    rows = await client.query_raw(
+        'SELECT c.relname AS "name" FROM pg_inherits i '
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = $1 ORDER BY 1",
+        table,
+    )
+    return [row["name"] for row in rows]
+
+
+async def migrate(table: PartitionedTable, months_ahead: int = 3) -> None:
+    """
+    Converts an existing table into a partitioned one in a single transaction: the table is renamed,
+    recreated as PARTITION BY RANGE on its key with one partition per month of existing data plus
+    `months_ahead` future months and a default partition, the rows are copied over, and the constraints
+    and indexes are recreated. Writes to the table block until the copy commits, so run it in a
+    maintenance window: `python -m project.metric_partitions migrate`.
+
+    Args:
+        table (PartitionedTable): The table to convert.
+        months_ahead (int): Future months to create partitions for.
+    """
+    client = prisma.get_client()
+    if await is_partitioned(client, table.name):
+        logger.info("%s is already partitioned", table.name)
+        return
+    legacy = f"{table.name}_unpartitioned"
+    async with client.tx(timeout=timedelta(hours=12)) as tx:
+        await tx.execute_raw(f'ALTER TABLE "{table.name}" RENAME TO "{legacy}"')
+        await tx.execute_raw(
+            f'CREATE TABLE "{table.name}" (LIKE "{legacy}" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ("{table.key}")'
+        )
+        rows = await tx.query_raw(
+            f'SELECT min("{table.key}") AS "first" FROM "{legacy}"'
+        )
+        first = rows[0]["first"] if rows else None
+        if isinstance(first, str):
+            first = datetime.fromisoformat(first)
+        month = date(first.year, first.month, 1) if first else _this_month()
+        last = _add_months(_this_month(), months_ahead)
+        while month <= last:
+            await tx.execute_raw(_create_partition_sql(table.name, month))
+            month = _add_months(month, 1)
+        await tx.execute_raw(
+            f'CREATE TABLE "{table.name}_default" PARTITION OF "{table.name}" DEFAULT'
+        )
+        await tx.execute_raw(f'INSERT INTO "{table.name}" SELECT * FROM "{legacy}"')
+        await tx.execute_raw(f'DROP TABLE "{legacy}"')
+        await tx.execute_raw(
+            f'ALTER TABLE "{table.name}" ADD CONSTRAINT "{table.name}_pkey" '
+            f'PRIMARY KEY ("id", "{table.key}")'
+        )
+        for foreign_key in table.foreign_keys:
+            await tx.execute_raw(f'ALTER TABLE "{table.name}" {foreign_key}')
+        for index, columns in table.indexes.items():
+            await tx.execute_raw(
+                f'CREATE INDEX "{index}" ON "{table.name}" ('
+                + ", ".join(f'"{column}"' for column in columns)
+                + ")"
+            )
+    logger.info("Migrated %s to monthly partitions", table.name)
+
+
+async def _add_partition(client, table: PartitionedTable, month: date) -> None:
+    """
+    Adds the partition of one month. Rows of that month that already fell through to the default
+    partition would make a plain CREATE ... PARTITION OF fail, so the partition is created as a
+    standalone table, those rows are moved into it and it is then attached, all in one transaction.
+    """
+    name = partition_name(table.name, month)
+    default = f"{table.name}_default"
+    start, end = month.isoformat(), _add_months(month, 1).isoformat()
+    async with client.tx(timeout=timedelta(minutes=30)) as tx:
+        await tx.execute_raw(f'LOCK TABLE "{default}" IN EXCLUSIVE MODE')
+        await tx.execute_raw(
+            f'CREATE TABLE "{name}" (LIKE "{table.name}" INCLUDING DEFAULTS)'
+        )
+        moved = await tx.execute_raw(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE "{table.key}" >= $1::timestamp '
+            f'AND "{table.key}" < $2::timestamp RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            start,
+            end,
+        )
+        await tx.execute_raw(
+            f'ALTER TABLE "{table.name}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    if moved:
+        logger.info("Moved %d rows from %s into %s", moved, default, name)
+
+
+async def ensure_partitions(months_ahead: int = 3) -> None:
+    """
+    Creates the partitions for the current month and the next `months_ahead` months of every
+    partitioned table, so inserts never fall through to the default partition. A month that cannot be
+    added is logged and retried on the next run; the other months and tables are still handled.
+    """
+    client = prisma.get_client()
+    for table in PARTITIONED_TABLES:
+        if not await is_partitioned(client, table.name):
+            logger.info(
+                "%s is not partitioned yet; run `python -m project.metric_partitions migrate`",
+                table.name,
+            )
+            continue
+        existing = set(await partitions(client, table.name))
+        for offset in range(months_ahead + 1):
+            month = _add_months(_this_month(), offset)
+            if partition_name(table.name, month) in existing:
+                continue
+            try:
+                if f"{table.name}_default" in existing:
+                    await _add_partition(client, table, month)
+                else:
+                    await client.execute_raw(_create_partition_sql(table.name, month))
+            except Exception:
+                logger.exception(
+                    "Failed to create partition %s", partition_name(table.name, month)
+                )
+
+
+async def prune(months: Optional[int] = None) -> List[str]:
+    """
+    Drops the partitions that lie entirely before the retention cutoff, which is far cheaper than
+    deleting their rows, and deletes expired rows that landed in the default partition. Rollups keep
+    the aggregated history of dropped months.
+
+    Args:
+        months (Optional[int]): Months to keep; defaults to METRIC_RETENTION_MONTHS. 0 keeps everything.
+
+    Returns:
+        List[str]: Names of the dropped partitions.
+    """
+    months = retention_months() if months is None else months
+    if months <= 0:
+        return []
+    cutoff = _add_months(_this_month(), -months)
+    client = prisma.get_client()
+    dropped = []
+    for table in PARTITIONED_TABLES:
+        if not await is_partitioned(client, table.name):
+            continue
+        for name in await partitions(client, table.name):
+            month = _partition_month(table.name, name)
+            if month is not None and month < cutoff:
+                await client.execute_raw(f'DROP TABLE "{name}"')
+                dropped.append(name)
+        await client.execute_raw(
+            f'DELETE FROM "{table.name}_default" WHERE "{table.key}" < $1::timestamp',
+            cutoff.isoformat(),
+        )
+    if dropped:
+        logger.info("Dropped expired partitions %s", ", ".join(dropped))
+    return dropped
+
+
+async def maintain_forever(interval: float) -> None:
+    """
+    Creates upcoming partitions and drops expired ones every `interval` seconds until cancelled.
+    """
+    while True:
+        try:
+            await ensure_partitions()
+        except Exception:
+            logger.exception("Failed to create metric partitions")
+        try:
+            await prune()
+        except Exception:
+            logger.exception("Failed to prune metric partitions")
+        await asyncio.sleep(interval)
+
+
+_BENCH_QUERIES = {
+    "campaign_90_days": (
+        'SELECT count(*) AS "n", avg("openRate") AS "v" FROM "{table}" '
+        "WHERE \"emailCampaignId\" = 'c42' AND \"createdAt\" >= now() - interval '90 days'"
+    ),
+    "campaign_all_time": (
+        'SELECT count(*) AS "n", avg("openRate") AS "v" FROM "{table}" '
+        "WHERE \"emailCampaignId\" = 'c42'"
+    ),
+    "live_tail_hour": (
+        'SELECT count(*) AS "n", avg("openRate") AS "v" FROM "{table}" '
+        "WHERE \"createdAt\" >= now() - interval '1 hour'"
+    ),
+}
+
+
+async def bench(rows: int, campaigns: int) -> Dict[str, Dict[str, float]]:
+    """
+    Loads the same synthetic CampaignMetric-shaped data spread over the last 24 months into a plain
+    and a monthly partitioned scratch table, times the dashboard query shapes and retention on both,
+    and drops the scratch tables again.
+
+    Args:
+        rows (int): Rows per table, e.g. 50000000.
+        campaigns (int): Distinct campaign ids the rows are spread over.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Seconds per measurement, keyed by table variant.
+    """
+    client = prisma.get_client()
+    results: Dict[str, Dict[str, float]] = {}
+    first = _add_months(_this_month(), -23)
+    for variant in ("plain", "partitioned"):
+        table = f"bench_metric_{variant}"
+        timings: Dict[str, float] = {}
+        await client.execute_raw(f'DROP TABLE IF EXISTS "{table}"')
+        definition = (
+            f'CREATE TABLE "{table}" ("id" text, "emailCampaignId" text, '
+            '"openRate" double precision, "conversionRate" double precision, '
+            '"createdAt" timestamp(3))'
+        )
+        if variant == "partitioned":
+            definition += ' PARTITION BY RANGE ("createdAt")'
+        await client.execute_raw(definition)
+        if variant == "partitioned":
+            for offset in range(25):
+                await client.execute_raw(
+                    _create_partition_sql(table, _add_months(first, offset))
+                )
+        started = time.perf_counter()
+        await client.execute_raw(
+            f"INSERT INTO \"{table}\" SELECT md5(i::text), 'c' || (i % $2), random(), random(), "
+            f"timestamp '{first.isoformat()}' + (i::double precision / $1) "
+            "* (date_trunc('hour', now() AT TIME ZONE 'UTC') - "
+            f"timestamp '{first.isoformat()}') FROM generate_series(1, $1) i",
+            rows,
+            campaigns,
+        )
+        await client.execute_raw(
+            f'CREATE INDEX ON "{table}" ("emailCampaignId", "createdAt")'
+        )
+        await client.execute_raw(f'CREATE INDEX ON "{table}" ("createdAt")')
+        await client.execute_raw(f'ANALYZE "{table}"')
+        timings["load"] = time.perf_counter() - started
+        for name, query in _BENCH_QUERIES.items():
+            started = time.perf_counter()
+            await client.query_raw(query.format(table=table))
+            timings[name] = time.perf_counter() - started
+        started = time.perf_counter()
+        if variant == "partitioned":
+            await client.execute_raw(f'DROP TABLE "{partition_name(table, first)}"')
+        else:
+            await client.execute_raw(
+                f'DELETE FROM "{table}" WHERE "createdAt" < $1::timestamp',
+                _add_months(first, 1).isoformat(),
+            )
+        timings["retention_one_month"] = time.perf_counter() - started
+        await client.execute_raw(f'DROP TABLE "{table}"')
+        results[variant] = timings
+    return results
+
+
+async def _run(command: str, args: argparse.Namespace) -> None:
+    database.register()
+    await database.connect()
+    try:
+        if command == "migrate":
+            for table in PARTITIONED_TABLES:
+                await migrate(table, args.months_ahead)
+        elif command == "ensure":
+            await ensure_partitions(args.months_ahead)
+        elif command == "prune":
+            await prune()
+        elif command == "bench":
+            for variant, timings in (await bench(args.rows, args.campaigns)).items():
+                for name, seconds in timings.items():
+                    print(f"{variant:12} {name:22} {seconds * 1000:12.1f} ms")
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Partition maintenance: `python -m project.metric_partitions migrate|ensure|prune|bench`.
+    """
+    parser = argparse.ArgumentParser(description="Manage metric table partitions.")
+    parser.add_argument("command", choices=["migrate", "ensure", "prune", "bench"])
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--campaigns", type=int, default=10_000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args.command, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Union
+
+import prisma
+from project.database import database
+from project.metric_partitions import retention_cutoff_sql
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "campaign_metrics"
+
+# The first refresh backfills the whole metric history, far beyond Prisma's default 5s transaction.
+REFRESH_TIMEOUT = timedelta(minutes=30)
+
+# Metrics created at or after the watermark are not in the rollups yet and are aggregated live.
+WATERMARK_SQL = (
+    'COALESCE((SELECT "through" FROM "RollupWatermark" '
+    f"WHERE \"name\" = '{WATERMARK_NAME}'), '-infinity'::timestamp)"
+)
+
+_UPSERT = (
+    'INSERT INTO "CampaignMetricRollup" ("granularity", "bucket", "emailCampaignId", "userId", '
+    '"metricCount", "openRateSum", "conversionRateSum") {select} '
+    'ON CONFLICT ("granularity", "emailCampaignId", "bucket") DO UPDATE SET '
+    '"metricCount" = EXCLUDED."metricCount", "openRateSum" = EXCLUDED."openRateSum", '
+    '"conversionRateSum" = EXCLUDED."conversionRateSum"'
+)
+
+_HOURLY_SELECT = (
+    "SELECT 'HOUR'::\"RollupGranularity\", date_trunc('hour', m.\"createdAt\"), "
+    'm."emailCampaignId", c."userId", count(*), sum(m."openRate"), sum(m."conversionRate") '
+    'FROM "CampaignMetric" m JOIN "EmailCampaign" c ON c."id" = m."emailCampaignId" '
+    "WHERE {where} GROUP BY 2, 3, 4"
+)
+
+_DAILY_SELECT = (
+    "SELECT 'DAY'::\"RollupGranularity\", date_trunc('day', r.\"bucket\"), "
+    'r."emailCampaignId", r."userId", sum(r."metricCount"), sum(r."openRateSum"), '
+    'sum(r."conversionRateSum") FROM "CampaignMetricRollup" r '
+    "WHERE r.\"granularity\" = 'HOUR' AND {where} GROUP BY 2, 3, 4"
+)
+
+# The new watermark lags behind now() so that rows from transactions still in flight, whose
+# createdAt is already in the past, are not skipped by the rollup.
+_THROUGH_SQL = (
+    "date_trunc('hour', now() AT TIME ZONE 'UTC' - make_interval(secs => $1))"
+)
+
+
+class MetricTotals(BaseModel):
+    """
+    Summed CampaignMetric values for one group, e.g. a time bucket or a campaign.
+    """
+
+    key: Optional[Union[datetime, str]] = None
+    count: int
+    openRateSum: float
+    conversionRateSum: float
+
+    @property
+    def average_open_rate(self) -> float:
+        return self.openRateSum / self.count if self.count else 0.0
+
+    @property
+    def average_conversion_rate(self) -> float:
+        return self.conversionRateSum / self.count if self.count else 0.0
+
+
+async def refresh_rollups(settle_seconds: Optional[float] = None) -> None:
+    """
+    Rolls up every metric created between the watermark and the start of the current hour into hourly
+    rows, recomputes the daily rows of the affected days from them and advances the watermark, all in
+    one transaction. Each bucket is recomputed in full, so running this concurrently or repeatedly is
+    harmless.
+
+    Args:
+        settle_seconds (Optional[float]): How far behind now() the watermark stays; defaults to ROLLUP_SETTLE_SECONDS.
+    """
+    if settle_seconds is None:
+        settle_seconds = float(os.getenv("ROLLUP_SETTLE_SECONDS", "300"))
+    async with prisma.get_client().tx(timeout=REFRESH_TIMEOUT) as tx:
+        await tx.execute_raw(
+            _UPSERT.format(
+                select=_HOURLY_SELECT.format(
+                    where=f'm."createdAt" >= {WATERMARK_SQL} '
+                    f'AND m."createdAt" < {_THROUGH_SQL}'
+                )
+            ),
+            settle_seconds,
+        )
+        await tx.execute_raw(
+            _UPSERT.format(
+                select=_DAILY_SELECT.format(
+                    where=f"r.\"bucket\" >= date_trunc('day', {WATERMARK_SQL}) "
+                    f'AND r."bucket" < {_THROUGH_SQL}'
+                )
+            ),
+            settle_seconds,
+        )
+        await tx.execute_raw(
+            'INSERT INTO "RollupWatermark" ("name", "through") '
+            f"VALUES ('{WATERMARK_NAME}', {_THROUGH_SQL}) "
+            'ON CONFLICT ("name") DO UPDATE SET "through" = '
+            'GREATEST("RollupWatermark"."through", EXCLUDED."through")',
+            settle_seconds,
+        )
+
+
+async def refresh_campaign(campaign_id: str) -> None:
+    """
+    Rebuilds the rollups of one campaign from its raw metrics. Called after metrics of the campaign are
+    changed or deleted, which the watermark alone cannot detect. Buckets older than the raw data
+    retention are kept, since their metrics no longer exist.
+
+    Args:
+        campaign_id (str): The EmailCampaign whose rollups are rebuilt.
+    """
+    cutoff = retention_cutoff_sql()
+    async with prisma.get_client().tx(timeout=REFRESH_TIMEOUT) as tx:
+        await tx.execute_raw(
+            'DELETE FROM "CampaignMetricRollup" WHERE "emailCampaignId" = $1 '
+            f'AND "bucket" >= {cutoff}',
+            campaign_id,
+        )
+        await tx.execute_raw(
+            _UPSERT.format(
+                select=_HOURLY_SELECT.format(
+                    where=f'm."emailCampaignId" = $1 AND m."createdAt" >= {cutoff} '
+                    f'AND m."createdAt" < {WATERMARK_SQL}'
+                )
+            ),
+            campaign_id,
+        )
+        await tx.execute_raw(
+            _UPSERT.format(
+                select=_DAILY_SELECT.format(
+                    where=f'r."emailCampaignId" = $1 AND r."bucket" >= {cutoff}'
+                )
+            ),
+            campaign_id,
+        )
+
+
+def _union_sql(granularity: str, conditions: List[str]) -> str:
+    """
+    Rollup rows of the given granularity plus the raw metrics past the watermark, as one row source with
+    the columns emailCampaignId, bucket, metricCount, openRateSum and conversionRateSum. Conditions may
+    refer to the row's time as {bucket} and to the campaign as alias c.
+    """
+    rollup_where = [f"r.\"granularity\" = '{granularity}'"] + [
+        condition.format(bucket='r."bucket"') for condition in conditions
+    ]
+    raw_where = [f'm."createdAt" >= {WATERMARK_SQL}'] + [
+        condition.format(bucket='m."createdAt"') for condition in conditions
+    ]
+    join = ' JOIN "EmailCampaign" c ON c."id" = {}."emailCampaignId"'
+    return (
+        'SELECT r."emailCampaignId", r."bucket", r."metricCount", r."openRateSum", '
+        'r."conversionRateSum" FROM "CampaignMetricRollup" r'
+        + (join.format("r") if conditions else "")
+        + " WHERE "
+        + " AND ".join(rollup_where)
+        + ' UNION ALL SELECT m."emailCampaignId", m."createdAt", 1, m."openRate", '
+        'm."conversionRate" FROM "CampaignMetric" m'
+        + (join.format("m") if conditions else "")
+        + " WHERE "
+        + " AND ".join(raw_where)
+    )
+
+
+_SUMS = (
+    'COALESCE(sum(t."metricCount"), 0)::int AS "count", '
+    'COALESCE(sum(t."openRateSum"), 0) AS "openRateSum", '
+    'COALESCE(sum(t."conversionRateSum"), 0) AS "conversionRateSum"'
+)
+
+
+def _scope(
+    campaign_id: Optional[str], user_id: Optional[str], params: List
+) -> List[str]:
+    conditions = []
+    if campaign_id is not None:
+        params.append(campaign_id)
+        conditions.append(f'c."id" = ${len(params)}')
+    if user_id is not None:
+        params.append(user_id)
+        conditions.append(f'c."userId" = ${len(params)}')
+    return conditions
+
+
+async def totals(
+    campaign_id: Optional[str] = None, user_id: Optional[str] = None
+) -> MetricTotals:
+    """
+    Sums all metrics, optionally of one campaign or one user, from the daily rollups plus the live tail.
+    """
+    params: List = []
+    conditions = _scope(campaign_id, user_id, params)
+    rows = await prisma.get_client().query_raw(
+        f"SELECT {_SUMS} FROM ({_union_sql('DAY', conditions)}) t", *params
+    )
+    return MetricTotals(**rows[0])
+
+
+async def trend(
+    bucket: str,
+    limit: int,
+    campaign_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> List[MetricTotals]:
+    """
+    Sums metrics per time bucket for the most recent `limit` buckets, oldest first.
+
+    Args:
+        bucket (str): 'hour', 'day', 'week' or 'month'. Hourly trends read the hourly rollups, all others the daily ones.
+        limit (int): Number of buckets, counting the current partial one.
+        campaign_id (Optional[str]): Restricts the trend to one campaign.
+        user_id (Optional[str]): Restricts the trend to the campaigns of one user.
+
+    Returns:
+        List[MetricTotals]: One entry per non-empty bucket, keyed by the bucket start in ISO format.
+    """
+    params: List = [bucket, f"{limit - 1} {bucket}"]
+    conditions = [
+        "{bucket} >= date_trunc($1, now() AT TIME ZONE 'UTC') - $2::interval"
+    ] + _scope(campaign_id, user_id, params)
+    granularity = "HOUR" if bucket == "hour" else "DAY"
+    rows = await prisma.get_client().query_raw(
+        f'SELECT date_trunc($1, t."bucket") AS "key", {_SUMS} '
+        f"FROM ({_union_sql(granularity, conditions)}) t GROUP BY 1 ORDER BY 1",
+        *params,
+    )
+    return [MetricTotals(**row) for row in rows]
+
+
+async def campaign_totals(conditions: List[str], params: List) -> List[MetricTotals]:
+    """
+    Sums metrics per campaign for the campaigns matching `conditions`, which refer to the campaign as
+    alias c and to `params` as $1, $2, ...
+
+    Returns:
+        List[MetricTotals]: One entry per campaign with metrics, keyed by campaign id.
+    """
+    rows = await prisma.get_client().query_raw(
+        f'SELECT t."emailCampaignId" AS "key", {_SUMS} '
+        f"FROM ({_union_sql('DAY', conditions)}) t GROUP BY 1 ORDER BY 1",
+        *params,
+    )
+    return [MetricTotals(**row) for row in rows]
+
+
+async def refresh_forever(interval: float) -> None:
+    """
+    Refreshes the rollups every `interval` seconds until cancelled.
+    """
+    while True:
+        try:
+            await refresh_rollups()
+        except Exception:
+            logger.exception("Failed to refresh campaign metric rollups")
+        await asyncio.sleep(interval)
+
+
+async def _refresh_once() -> None:
+    database.register()
+    await database.connect()
+    try:
+        await refresh_rollups()
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Refreshes the rollups once, for deployments that run it from cron instead of inside the API
+    (ROLLUP_REFRESH_SECONDS=0): `python -m project.metric_rollups`.
+    """
+    argparse.ArgumentParser(description="Refresh campaign metric rollups.").parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_refresh_once())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import prisma
+import prisma.models
+from project.database import primary_reads
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_ID = "default-feature-id"
+
+
+class RegistryStats(BaseModel):
+    """
+    Counters of the in-process AIModel registry.
+    """
+
+    models: int
+    hits: int
+    misses: int
+    reloads: int
+    hit_rate: float
+    age_seconds: Optional[float]
+
+
+def type_key(model_type: Any) -> str:
+    """
+    Normalizes a model type given as a service enum, a prisma enum or a plain string.
+    """
+    return getattr(model_type, "name", model_type)
+
+
+class ModelRegistry:
+    """
+    In-memory copy of the AIModel rows and their Features. The rows are reference data that change
+    almost never, so lookups are answered from memory. The registry is reloaded when it is invalidated
+    after a model is created or changed, and at most MODEL_REGISTRY_TTL_SECONDS after the last load so
+    that changes made by other processes are picked up.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._by_id: Dict[str, prisma.models.AIModel] = {}
+        self._by_type: Dict[str, prisma.models.AIModel] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        return cls(ttl=float(os.getenv("MODEL_REGISTRY_TTL_SECONDS", "300")))
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    async def load(self) -> None:
+        """
+        Replaces the registry contents with the current AIModel rows.
+        """
+        # The registry is shared by every request, so it never loads from a lagging replica.
+        with primary_reads():
+            models = await prisma.models.AIModel.prisma().find_many(
+                include={"Feature": True}, order={"createdAt": "asc"}
+            )
+        self._by_id = {model.id: model for model in models}
+        by_type: Dict[str, prisma.models.AIModel] = {}
+        for model in models:
+            # The oldest row wins, matching what find_first returned before the registry existed.
+            by_type.setdefault(type_key(model.modelType), model)
+        self._by_type = by_type
+        self._loaded_at = time.monotonic()
+        self.reloads += 1
+        logger.info("Loaded %d AI models into the registry", len(models))
+
+    async def _fresh(self) -> bool:
+        """
+        Reloads the registry if it is stale. Returns True when the lookup can be answered without a query.
+        """
+        if not self._stale():
+            return True
+        async with self._lock:
+            if self._stale():
+                await self.load()
+        return False
+
+    def invalidate(self) -> None:
+        """
+        Marks the registry stale so that the next lookup reloads it. Call after creating or changing an
+        AIModel or Feature row.
+        """
+        self._loaded_at = None
+
+    def _record(self, cached: bool, found: bool) -> None:
+        if cached and found:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    async def get_by_type(self, model_type: Any) -> Optional[prisma.models.AIModel]:
+        """
+        Returns the AIModel row for a model type, or None if there is none.
+        """
+        cached = await self._fresh()
+        model = self._by_type.get(type_key(model_type))
+        self._record(cached, model is not None)
+        return model
+
+    async def get_by_id(self, model_id: str) -> Optional[prisma.models.AIModel]:
+        """
+        Returns the AIModel row with the given id, including its Feature, or None if there is none.
+        """
+        cached = await self._fresh()
+        model = self._by_id.get(model_id)
+        self._record(cached, model is not None)
+        return model
+
+    async def ensure(
+        self, model_type: Any, feature_id: str = DEFAULT_FEATURE_ID
+    ) -> prisma.models.AIModel:
+        """
+        Returns the AIModel row for a model type, creating it on first use.
+
+        Args:
+            model_type (Any): The model type to look up.
+            feature_id (str): Feature to attach a newly created row to.
+
+        Returns:
+            prisma.models.AIModel: The existing or newly created row.
+        """
+        model = await self.get_by_type(model_type)
+        if model is not None:
+            return model
+        async with self._lock:
+            model = self._by_type.get(type_key(model_type))
+            if model is None:
+                model = await prisma.models.AIModel.prisma().create(
+                    data={"modelType": type_key(model_type), "featureId": feature_id}
+                )
+                self.invalidate()
+        return model
+
+    async def all(self) -> List[prisma.models.AIModel]:
+        """
+        Returns every AIModel row, each with its Feature included.
+        """
+        cached = await self._fresh()
+        self._record(cached, True)
+        return list(self._by_id.values())
+
+    def stats(self) -> RegistryStats:
+        lookups = self.hits + self.misses
+        return RegistryStats(
+            models=len(self._by_id),
+            hits=self.hits,
+            misses=self.misses,
+            reloads=self.reloads,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+            age_seconds=(
+                time.monotonic() - self._loaded_at
+                if self._loaded_at is not None
+                else None
+            ),
+        )
+
+
+model_registry = ModelRegistry.from_env()
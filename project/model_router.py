@@ -0,0 +1,290 @@
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from pydantic import BaseModel
+
+# Blended USD price per 1k tokens, used to rank deployments when no LLM_MODEL_COSTS override is set.
+DEFAULT_COSTS_PER_1K = {
+    "gpt-4-turbo": 0.02,
+    "gpt-4o": 0.01,
+    "gpt-4o-mini": 0.0004,
+    "gpt-3.5-turbo": 0.001,
+}
+
+
+class DeploymentHealth(BaseModel):
+    """
+    Live health of one deployment (a concrete model string) serving a model type.
+    """
+
+    modelType: str
+    model: str
+    available: bool
+    circuit: str
+    requests: int
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    error_rate: float
+    cost_per_1k_tokens: float
+    total_cost: float
+    score: float
+
+
+def _percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _Deployment:
+    def __init__(self, model_type: str, model: str, cost_per_1k: float, window: int):
+        self.model_type = model_type
+        self.model = model
+        self.cost_per_1k = cost_per_1k
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.requests = 0
+        self.total_cost = 0.0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.probe_started = 0.0
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class ModelRouter:
+    """
+    Chooses which deployment serves each model type. Every model type can be served by several
+    deployments (e.g. 'gpt-4-turbo' and 'azure/gpt-4-turbo'), configured as a comma-separated
+    LLM_MODEL_<TYPE> list. Deployments are ranked by a score built from their recent p95 latency,
+    error rate and token cost, and a deployment that keeps failing is taken out of rotation by a
+    circuit breaker until ROUTER_COOLDOWN_SECONDS have passed; then the next request tries it first, and
+    that one probe decides whether it comes back.
+    """
+
+    def __init__(
+        self,
+        deployments: Dict[str, List[str]],
+        costs: Optional[Dict[str, float]] = None,
+        window: int = 100,
+        failure_threshold: int = 5,
+        max_error_rate: float = 0.5,
+        min_samples: int = 10,
+        cooldown: float = 30.0,
+        probe_timeout: float = 120.0,
+        latency_weight: float = 1.0,
+        cost_weight: float = 100.0,
+    ):
+        costs = {**DEFAULT_COSTS_PER_1K, **(costs or {})}
+        self.failure_threshold = failure_threshold
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self.latency_weight = latency_weight
+        self.cost_weight = cost_weight
+        self._deployments: Dict[str, List[_Deployment]] = {
+            model_type: [
+                _Deployment(
+                    model_type, model, costs.get(model.split("/")[-1], 0.0), window
+                )
+                for model in models
+            ]
+            for model_type, models in deployments.items()
+        }
+
+    @classmethod
+    def from_env(cls, default_models: Dict[str, str]) -> "ModelRouter":
+        """
+        Builds the router from LLM_MODEL_<TYPE> deployment lists, LLM_MODEL_COSTS (a JSON object of
+        USD per 1k tokens keyed by model name) and the ROUTER_* settings.
+
+        Args:
+            default_models (Dict[str, str]): Deployment list per model type used when LLM_MODEL_<TYPE> is unset.
+
+        Returns:
+            ModelRouter: The configured router.
+        """
+        deployments = {
+            model_type: [
+                model.strip()
+                for model in os.getenv(f"LLM_MODEL_{model_type}", default).split(",")
+                if model.strip()
+            ]
+            for model_type, default in default_models.items()
+        }
+        return cls(
+            deployments,
+            costs=json.loads(os.getenv("LLM_MODEL_COSTS", "{}")),
+            window=int(os.getenv("ROUTER_WINDOW", "100")),
+            failure_threshold=int(os.getenv("ROUTER_FAILURE_THRESHOLD", "5")),
+            max_error_rate=float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5")),
+            min_samples=int(os.getenv("ROUTER_MIN_SAMPLES", "10")),
+            cooldown=float(os.getenv("ROUTER_COOLDOWN_SECONDS", "30")),
+            probe_timeout=float(os.getenv("ROUTER_PROBE_TIMEOUT_SECONDS", "120")),
+            latency_weight=float(os.getenv("ROUTER_LATENCY_WEIGHT", "1")),
+            cost_weight=float(os.getenv("ROUTER_COST_WEIGHT", "100")),
+        )
+
+    def _find(self, model_type: str, model: str) -> _Deployment:
+        for deployment in self._deployments.get(model_type, []):
+            if deployment.model == model:
+                return deployment
+        raise ValueError(f"{model} is not a deployment of model type {model_type}")
+
+    def _circuit(self, deployment: _Deployment) -> str:
+        if deployment.opened_at is None:
+            return "closed"
+        if time.monotonic() - deployment.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def _score(self, deployment: _Deployment) -> float:
+        """
+        Lower is better: expected seconds at p95 plus weighted cost, inflated by the expected number of
+        attempts given the recent error rate. Deployments without samples score as if instant, so new or
+        recovered deployments receive traffic and build up a history.
+        """
+        p95 = _percentile(list(deployment.latencies), 0.95) or 0.0
+        base = p95 * self.latency_weight + deployment.cost_per_1k * self.cost_weight
+        return base / max(1.0 - deployment.error_rate(), 0.05)
+
+    def _probe_free(self, deployment: _Deployment, now: float) -> bool:
+        # A reservation whose request never reported back expires instead of blocking recovery forever.
+        return (
+            not deployment.probing
+            or now - deployment.probe_started > self.probe_timeout
+        )
+
+    def candidates(self, model_type: str, probe: bool = False) -> List[str]:
+        """
+        Returns the deployments to try for a model type, best first. Deployments with an open circuit and
+        half-open deployments whose probe is already in flight are left out.
+
+        Args:
+            model_type (str): ModelType name.
+            probe (bool): Reserve the probe of one half-open deployment for the caller and put it first, so a
+                recovered deployment gets traffic even while healthier ones are ranked above it. The caller must
+                try it or `abandon` it. Without it, half-open deployments are listed after the closed ones.
+
+        Raises:
+            ValueError: If no deployment is configured for the model type.
+        """
+        deployments = self._deployments.get(model_type)
+        if not deployments:
+            raise ValueError(f"No model configured for model type {model_type}")
+        now = time.monotonic()
+        closed, half_open = [], []
+        for deployment in deployments:
+            circuit = self._circuit(deployment)
+            if circuit == "closed":
+                closed.append(deployment)
+            elif circuit == "half_open" and self._probe_free(deployment, now):
+                half_open.append(deployment)
+        closed.sort(key=self._score)
+        if probe and half_open:
+            reserved = half_open[0]
+            reserved.probing = True
+            reserved.probe_started = now
+            return [reserved.model] + [deployment.model for deployment in closed]
+        return [deployment.model for deployment in closed + half_open]
+
+    def available(self, model_type: str) -> bool:
+        """
+        True if at least one deployment of the model type can currently take requests.
+        """
+        return any(
+            self._circuit(deployment) != "open"
+            for deployment in self._deployments.get(model_type, [])
+        )
+
+    def begin(self, model_type: str, model: str) -> None:
+        """
+        Marks the start of a request; a half-open deployment admits only this one probe.
+        """
+        deployment = self._find(model_type, model)
+        if self._circuit(deployment) == "half_open":
+            deployment.probing = True
+            deployment.probe_started = time.monotonic()
+
+    def record_success(
+        self,
+        model_type: str,
+        model: str,
+        latency: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        deployment = self._find(model_type, model)
+        if deployment.probing:
+            # A recovered deployment starts over instead of being judged on the failures that opened it.
+            deployment.outcomes.clear()
+            deployment.latencies.clear()
+        deployment.requests += 1
+        deployment.latencies.append(latency)
+        deployment.outcomes.append(True)
+        deployment.total_cost += (
+            (prompt_tokens + completion_tokens) / 1000 * deployment.cost_per_1k
+        )
+        deployment.consecutive_failures = 0
+        deployment.opened_at = None
+        deployment.probing = False
+
+    def abandon(self, model_type: str, model: str) -> None:
+        """
+        Ends a request that was cancelled before it produced an outcome, or releases a probe reserved by
+        `candidates` that was never tried.
+        """
+        self._find(model_type, model).probing = False
+
+    def record_failure(self, model_type: str, model: str) -> None:
+        deployment = self._find(model_type, model)
+        deployment.requests += 1
+        deployment.outcomes.append(False)
+        deployment.consecutive_failures += 1
+        was_probe = deployment.probing
+        deployment.probing = False
+        if (
+            was_probe
+            or deployment.consecutive_failures >= self.failure_threshold
+            or (
+                len(deployment.outcomes) >= self.min_samples
+                and deployment.error_rate() > self.max_error_rate
+            )
+        ):
+            deployment.opened_at = time.monotonic()
+
+    def health(self) -> List[DeploymentHealth]:
+        return [
+            DeploymentHealth(
+                modelType=model_type,
+                model=deployment.model,
+                available=self._circuit(deployment) != "open",
+                circuit=self._circuit(deployment),
+                requests=deployment.requests,
+                p50_ms=(
+                    None
+                    if not deployment.latencies
+                    else _percentile(list(deployment.latencies), 0.5) * 1000
+                ),
+                p95_ms=(
+                    None
+                    if not deployment.latencies
+                    else _percentile(list(deployment.latencies), 0.95) * 1000
+                ),
+                error_rate=deployment.error_rate(),
+                cost_per_1k_tokens=deployment.cost_per_1k,
+                total_cost=deployment.total_cost,
+                score=self._score(deployment),
+            )
+            for model_type, deployments in self._deployments.items()
+            for deployment in deployments
+        ]
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import prisma
+import prisma.models
+from project.database import database
+
+DEFAULT_PAGE_SIZE = 50
+
+MAX_PAGE_SIZE = 500
+
+
+def _encode(key: Any, row_id: str) -> str:
+    payload = json.dumps([key, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> Tuple[Any, str]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, row_id = json.loads(payload)
+        return key, str(row_id)
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """
+    Encodes the (createdAt, id) key of the last row of a page as an opaque, URL-safe cursor.
+    """
+    return _encode(created_at.isoformat(), row_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor was not produced by `encode_cursor`.
+    """
+    created_at, row_id = _decode(cursor)
+    try:
+        return datetime.fromisoformat(created_at), row_id
+    except (TypeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def encode_rank_cursor(rank: float, row_id: str) -> str:
+    """
+    Encodes the (rank, id) key of the last row of a page of ranked search results.
+    """
+    return _encode(rank, row_id)
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, str]:
+    """
+    Decodes a cursor produced by `encode_rank_cursor`.
+
+    Raises:
+        ValueError: If the cursor was not produced by `encode_rank_cursor`.
+    """
+    rank, row_id = _decode(cursor)
+    if isinstance(rank, bool) or not isinstance(rank, (int, float)):
+        raise ValueError("Invalid pagination cursor")
+    return float(rank), row_id
+
+
+def after_cursor(cursor: Optional[str], descending: bool) -> Dict[str, Any]:
+    """
+    Prisma filter matching the rows that come after the cursor in (createdAt, id) order. Prisma cannot
+    express a row comparison, and Postgres cannot use the OR of the exact condition as an index bound,
+    so the filter also carries the redundant `createdAt <= cursor` (>= when ascending). That bound lets
+    the database start the (createdAt, id) index scan at the cursor instead of reading every row
+    before it; the OR then only filters the rows sharing the cursor's createdAt.
+    """
+    if not cursor:
+        return {}
+    created_at, row_id = decode_cursor(cursor)
+    op, bound = ("lt", "lte") if descending else ("gt", "gte")
+    return {
+        "createdAt": {bound: created_at},
+        "OR": [
+            {"createdAt": {op: created_at}},
+            {"createdAt": created_at, "id": {op: row_id}},
+        ],
+    }
+
+
+async def fetch_page(
+    model: Any,
+    where: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetches one page of a model ordered by (createdAt, id).
+
+    Args:
+        model (Any): The prisma.models class to query, e.g. prisma.models.Template.
+        where (Dict[str, Any]): Filter applied on top of the cursor.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+        cursor (Optional[str]): Cursor returned with the previous page; None for the first page.
+        descending (bool): Newest first when True.
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: The rows of the page and the cursor of the next page, None on the last page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    keyset = after_cursor(cursor, descending)
+    direction = "desc" if descending else "asc"
+    rows = await model.prisma().find_many(
+        where={"AND": [where, keyset]} if where and keyset else where or keyset,
+        take=limit + 1,
+        order=[{"createdAt": direction}, {"id": direction}],
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].createdAt, rows[-1].id)
+
+
+async def approximate_count(table: str, conditions: str = "", *params: Any) -> int:
+    """
+    Estimates how many rows of `table` match `conditions` from the planner statistics, which come from
+    pg_class.reltuples and the column histograms kept up to date by autovacuum. Unlike COUNT(*) this
+    costs the same on any table size, at the price of being off by a few percent.
+
+    Args:
+        table (str): Quoted table name, e.g. '"Template"'.
+        conditions (str): Optional SQL WHERE clause body referring to `params` as $1, $2, ...
+    """
+    rows = await prisma.get_client().query_raw(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table}"
+        + (f" WHERE {conditions}" if conditions else ""),
+        *params,
+    )
+    plan = rows[0]["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+BENCH_CATEGORY = "bench-pagination"
+
+
+async def bench(rows: int, page_size: int) -> Dict[str, Dict[str, float]]:
+    """
+    Inserts `rows` synthetic templates in a category of their own and pages through them the way
+    listTemplates does, timing one page at increasing depths with Prisma's skip (OFFSET) and with
+    `fetch_page` and a cursor, and COUNT(*) against `approximate_count`. Deletes the rows again.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Seconds per depth, keyed by method.
+    """
+    client = prisma.get_client()
+    feature = await prisma.models.Feature.prisma().create(
+        data={"name": BENCH_CATEGORY, "description": "Pagination benchmark rows"}
+    )
+    await client.execute_raw(
+        'INSERT INTO "Template" ("id", "title", "content", "category", "featureId", '
+        "\"createdAt\", \"updatedAt\") SELECT md5(i::text), '', repeat('x', 200), $1, $2, "
+        "now() - make_interval(secs => i), now() FROM generate_series(1, $3) i",
+        BENCH_CATEGORY,
+        feature.id,
+        rows,
+    )
+    await client.execute_raw('ANALYZE "Template"')
+    where = {"category": BENCH_CATEGORY}
+    order = [{"createdAt": "desc"}, {"id": "desc"}]
+    results: Dict[str, Dict[str, float]] = {"offset": {}, "keyset": {}}
+    try:
+        for fraction in (0.0, 0.01, 0.1, 0.5, 0.9):
+            depth = int(rows * fraction)
+            label = f"depth {depth}"
+            started = time.perf_counter()
+            await prisma.models.Template.prisma().find_many(
+                where=where, skip=depth, take=page_size, order=order
+            )
+            results["offset"][label] = time.perf_counter() - started
+            cursor = None
+            if depth:
+                last = await prisma.models.Template.prisma().find_first(
+                    where=where, skip=depth - 1, order=order
+                )
+                cursor = encode_cursor(last.createdAt, last.id)
+            started = time.perf_counter()
+            await fetch_page(prisma.models.Template, where, page_size, cursor)
+            results["keyset"][label] = time.perf_counter() - started
+        started = time.perf_counter()
+        await prisma.models.Template.prisma().count(where=where)
+        results["count"] = {"exact": time.perf_counter() - started}
+        started = time.perf_counter()
+        await approximate_count('"Template"', '"category" = $1', BENCH_CATEGORY)
+        results["count"]["approximate"] = time.perf_counter() - started
+    finally:
+        await prisma.models.Template.prisma().delete_many(where=where)
+        await prisma.models.Feature.prisma().delete(where={"id": feature.id})
+    return results
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    database.register()
+    await database.connect()
+    try:
+        for method, timings in (await bench(args.rows, args.page_size)).items():
+            for name, seconds in timings.items():
+                print(f"{method:8} {name:18} {seconds * 1000:10.1f} ms")
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Compares OFFSET and keyset pagination: `python -m project.pagination --rows 5000000`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark list pagination.")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    asyncio.run(_bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+from project.llm_engine import engine
+
+CHECKER_MODEL_TYPE = "CUSTOM_CHECKER"
+
+CHECKER_PROMPT = (
+    "You are the quality checker for AI-written B2B and B2C cold emails. You receive consecutive "
+    "excerpts of an email while it is still being written. Reject an excerpt only if it contains "
+    "false or unverifiable claims, offensive or manipulative language, spam patterns, or content that "
+    "is unrelated to a sales email. Reply with exactly 'PASS', or 'FAIL: <short reason>'."
+)
+
+
+class ContentRejectedError(Exception):
+    """
+    Raised when the checker model rejects the content being generated.
+    """
+
+    def __init__(self, reason: str, timings: Dict[str, int]):
+        super().__init__(f"Content rejected by quality check: {reason}")
+        self.reason = reason
+        self.timings = timings
+
+
+def parse_verdict(text: str) -> Optional[str]:
+    """
+    Returns the rejection reason from a checker reply, or None when the excerpt passed.
+    """
+    verdict = text.strip()
+    if verdict.upper().startswith("FAIL"):
+        return verdict[4:].lstrip(" :-") or "no reason given"
+    return None
+
+
+class QualityPipeline:
+    """
+    Runs the writer model and the checker model as overlapping stages. Writer tokens are forwarded as they
+    arrive and grouped into excerpts of about QUALITY_CHECK_CHUNK_CHARS characters. Each excerpt is scored
+    by the checker while the writer keeps streaming. A rejection stops the writer stream immediately, so
+    no further tokens are paid for.
+    """
+
+    def __init__(self, model_type: str, messages: List[Dict[str, str]]):
+        self.model_type = model_type
+        self.messages = messages
+        self.chunk_chars = int(os.getenv("QUALITY_CHECK_CHUNK_CHARS", "400"))
+        self.enabled = os.getenv("QUALITY_CHECK_ENABLED", "true").lower() == "true"
+        self._excerpts: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self._started = 0.0
+        self._first_token: Optional[float] = None
+        self._generation_done: Optional[float] = None
+        self._check_seconds = 0.0
+
+    def timings(self) -> Dict[str, int]:
+        """
+        Stage latencies in milliseconds, named after the Draft columns they are stored in.
+        """
+        now = time.perf_counter()
+
+        def ms(at: Optional[float]) -> Optional[int]:
+            return round((at - self._started) * 1000) if at is not None else None
+
+        return {
+            "firstTokenMs": ms(self._first_token),
+            "generationMs": ms(self._generation_done),
+            "checkMs": round(self._check_seconds * 1000),
+            "pipelineMs": ms(now),
+        }
+
+    async def _check(self) -> Optional[str]:
+        while True:
+            excerpt = await self._excerpts.get()
+            if excerpt is None:
+                return None
+            started = time.perf_counter()
+            completion = await engine.generate(
+                CHECKER_MODEL_TYPE,
+                [
+                    {"role": "system", "content": CHECKER_PROMPT},
+                    {"role": "user", "content": excerpt},
+                ],
+            )
+            self._check_seconds += time.perf_counter() - started
+            reason = parse_verdict(completion.text)
+            if reason is not None:
+                return reason
+
+    def _reject(self, checker: asyncio.Task) -> None:
+        reason = checker.result()
+        if reason is not None:
+            raise ContentRejectedError(reason, self.timings())
+
+    async def tokens(self) -> AsyncIterator[str]:
+        """
+        Streams the writer's tokens while the checker runs alongside.
+
+        Yields:
+            str: Writer text deltas.
+
+        Raises:
+            ContentRejectedError: As soon as the checker rejects an excerpt, including after the last token.
+        """
+        self._started = time.perf_counter()
+        writer = engine.stream(self.model_type, self.messages)
+        checker = asyncio.create_task(self._check()) if self.enabled else None
+        excerpt: List[str] = []
+        excerpt_chars = 0
+        try:
+            while True:
+                next_token = asyncio.ensure_future(anext(writer))
+                if checker is not None and not checker.done():
+                    await asyncio.wait(
+                        {next_token, checker}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                if checker is not None and checker.done():
+                    next_token.cancel()
+                    await asyncio.gather(next_token, return_exceptions=True)
+                    self._reject(checker)
+                try:
+                    token = await next_token
+                except StopAsyncIteration:
+                    break
+                if self._first_token is None:
+                    self._first_token = time.perf_counter()
+                yield token
+                if checker is not None:
+                    excerpt.append(token)
+                    excerpt_chars += len(token)
+                    if excerpt_chars >= self.chunk_chars:
+                        self._excerpts.put_nowait("".join(excerpt))
+                        excerpt.clear()
+                        excerpt_chars = 0
+            self._generation_done = time.perf_counter()
+            if checker is not None:
+                if excerpt:
+                    self._excerpts.put_nowait("".join(excerpt))
+                self._excerpts.put_nowait(None)
+                await checker
+                self._reject(checker)
+        finally:
+            await writer.aclose()
+            if checker is not None and not checker.done():
+                checker.cancel()
+                await asyncio.gather(checker, return_exceptions=True)
+
+    async def run(self) -> str:
+        """
+        Runs the pipeline to completion and returns the approved content.
+        """
+        return "".join([token async for token in self.tokens()])
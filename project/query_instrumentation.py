@@ -0,0 +1,72 @@
+import functools
+import logging
+import sys
+import time
+
+import prisma
+from project.metrics import query_duration, query_errors
+from project.tracing import end_query_span, slow_query_log, start_query_span
+
+logger = logging.getLogger(__name__)
+
+
+def calling_module() -> str:
+    """
+    The project module that issued the current query: the innermost *_service module if there is one,
+    otherwise the innermost other project module, such as job_queue or metric_rollups. Awaiting
+    coroutines are on the stack while the query runs, so this walks up the frames.
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        name = frame.f_globals.get("__name__", "")
+        if name.startswith("project.") and name != __name__:
+            if name.endswith("_service"):
+                return name[len("project.") :]
+            if fallback is None and name not in ("project.server", "project.tracing"):
+                fallback = name[len("project.") :]
+        frame = frame.f_back
+    return fallback or "other"
+
+
+def instrument_prisma() -> None:
+    """
+    Wraps the Prisma client's single query entry point, which model actions, raw queries and
+    transaction clients all go through, to record query metrics per module, trace spans for traced
+    requests and the slow-query log.
+    """
+    execute = getattr(prisma.Prisma, "_execute", None)
+    if execute is None or getattr(execute, "_instrumented", False):
+        if execute is None:
+            logger.warning(
+                "Prisma client has no _execute; query instrumentation is disabled"
+            )
+        return
+
+    @functools.wraps(execute)
+    async def instrumented_execute(self, *, method, arguments, model=None, **kwargs):
+        module = calling_module()
+        model_name = model.__name__ if model is not None else "raw"
+        labels = (module, model_name, method)
+        span = start_query_span(model_name, method, arguments)
+        response = None
+        failed = False
+        started = time.perf_counter()
+        try:
+            response = await execute(
+                self, method=method, arguments=arguments, model=model, **kwargs
+            )
+            return response
+        except Exception:
+            failed = True
+            query_errors.inc(labels)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            query_duration.observe(labels, elapsed)
+            if span is not None:
+                end_query_span(span, response, failed)
+            slow_query_log.observe(module, model_name, method, arguments, elapsed)
+
+    instrumented_execute._instrumented = True
+    prisma.Prisma._execute = instrumented_execute
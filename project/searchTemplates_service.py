@@ -0,0 +1,67 @@
+from typing import List, Optional
+
+from project import template_search
+from project.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from pydantic import BaseModel
+
+
+class TemplateMatch(BaseModel):
+    """
+    A template matching a search query, with the relevance it was ranked by.
+    """
+
+    templateId: str
+    title: str
+    content: str
+    category: Optional[str] = None
+    rank: float
+
+
+class SearchTemplatesResponse(BaseModel):
+    """
+    Templates matching a search query, best match first, with the cursor of the next page.
+    """
+
+    templates: List[TemplateMatch]
+    nextCursor: Optional[str] = None
+
+
+async def searchTemplates(
+    query: str,
+    limit: Optional[int] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> SearchTemplatesResponse:
+    """
+    Searches the template library by title and content. Matching uses Postgres full-text search, so word forms like 'launch' and 'launches' match, and trigram similarity on titles, so misspelled queries still find the template. Results are ranked by relevance with title matches first.
+
+    Args:
+        query (str): Search terms; quoted phrases, 'or' and -exclusions are supported.
+        limit (Optional[int]): Number of templates per page. Defaults to DEFAULT_PAGE_SIZE.
+        category (Optional[str]): Optional filter to search only one category.
+        cursor (Optional[str]): The nextCursor of the previous page; omitted for the first page.
+
+    Returns:
+        SearchTemplatesResponse: Templates matching a search query, best match first, with the cursor of the next page.
+    """
+    if not query.strip():
+        raise ValueError("Search query must not be empty")
+    rows, next_cursor = await template_search.search(
+        query,
+        max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)),
+        category,
+        cursor,
+    )
+    return SearchTemplatesResponse(
+        templates=[
+            TemplateMatch(
+                templateId=row["id"],
+                title=row["title"] or row["content"][:30],
+                content=row["content"],
+                category=row["category"],
+                rank=row["rank"],
+            )
+            for row in rows
+        ],
+        nextCursor=next_cursor,
+    )
@@ -1,7 +1,7 @@
 from enum import Enum
 
-import prisma
-import prisma.models
+from project.llm_engine import engine
+from project.model_registry import model_registry
 from pydantic import BaseModel
 
 
@@ -25,7 +25,7 @@ class ModelSelectionResponse(BaseModel):
 
 async def selectModel(modelIdentifier: ModelType) -> ModelSelectionResponse:
     """
-    Allows a user to select a specific AI model for their session of content generation. Sends the chosen model name (e.g., gpt-4-turbo) to the AI Writing Module and stores this preference for future use. The request should include the model identifier. The expected response would confirm the successful selection, including the model name and status.
+    Allows a user to select a specific AI model for their session of content generation. Sends the chosen model name (e.g., gpt-4-turbo) to the AI Writing Module and stores this preference for future use. The request should include the model identifier. The model name is the deployment the model router currently prefers for that model type; selection fails when none is available. The expected response would confirm the successful selection, including the model name and status.
 
     Args:
         modelIdentifier (ModelType): The unique identifier of the AI model selected by the user.
@@ -33,14 +33,12 @@ async def selectModel(modelIdentifier: ModelType) -> ModelSelectionResponse:
     Returns:
         ModelSelectionResponse: Confirmation of the selected AI model including the model name and selection status.
     """
-    model_name = modelIdentifier.value
-    model = await prisma.models.AIModel.prisma().find_first(
-        where={"modelType": modelIdentifier}
-    )
-    if model is None:
-        model = await prisma.models.AIModel.prisma().create(
-            data={"modelType": modelIdentifier, "featureId": "DefaultFeatureID"}
-        )
+    model = await model_registry.ensure(modelIdentifier, feature_id="DefaultFeatureID")
+    try:
+        model_name = engine.resolve_model(modelIdentifier.name)
+    except ValueError:
+        model_name = modelIdentifier.value
+        model = None
     selection_status = "Selection successful" if model else "Selection failed"
     response = ModelSelectionResponse(
         modelName=model_name, selectionStatus=selection_status
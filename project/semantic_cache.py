@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import prisma
+import prisma.enums
+import prisma.models
+from project.database import database
+from pydantic import BaseModel
+
+EMBEDDING_DIMENSIONS = 256
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SemanticMatch(BaseModel):
+    """
+    An earlier draft whose prompt embedding is close enough to the incoming request to be reused.
+    """
+
+    draftId: str
+    content: str
+    similarity: float
+
+
+class SemanticCacheStats(BaseModel):
+    """
+    Counters of the semantic near-duplicate cache.
+    """
+
+    enabled: bool
+    threshold: float
+    hits: int
+    misses: int
+    average_lookup_ms: float
+
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free embedder based on signed feature hashing of words and word bigrams.
+    It is the local stand-in for a real embedding model in development and tests.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    async def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if value & (1 << 63) else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+
+class LiteLLMEmbedder:
+    """
+    Embedder backed by a LiteLLM embedding model, truncated to the column's dimensionality.
+    """
+
+    def __init__(self, model: str, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.dimensions = dimensions
+
+    async def embed(self, text: str) -> List[float]:
+        import litellm
+
+        response = await litellm.aembedding(
+            model=self.model, input=[text], dimensions=self.dimensions
+        )
+        return list(response.data[0]["embedding"])
+
+
+def to_vector_literal(embedding: List[float]) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in embedding) + "]"
+
+
+def personalization_key(intro: str, closing: str) -> str:
+    """
+    Digest of the fields that name the recipient and the sender. They are left out of the embedding and
+    must match exactly for a draft to be reused.
+    """
+    return hashlib.blake2b(
+        f"{intro}\0{closing}".encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class SemanticCache:
+    """
+    Finds earlier drafts generated from semantically similar content parameters, using the HNSW index
+    on Draft.promptEmbedding (cosine distance), so near-duplicate requests skip the model call.
+    """
+
+    def __init__(self, embedder, threshold: float, enabled: bool = True):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lookup_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        if os.getenv("SEMANTIC_CACHE_EMBEDDER", "hashing") == "litellm":
+            embedder = LiteLLMEmbedder(
+                os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+            )
+        else:
+            embedder = HashingEmbedder()
+        return cls(
+            embedder,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            enabled=os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true",
+        )
+
+    async def embed(self, context: str) -> List[float]:
+        return await self.embedder.embed(context)
+
+    async def lookup(
+        self, embedding: List[float], model_id: str, intro: str, closing: str
+    ) -> Optional[SemanticMatch]:
+        """
+        Returns the nearest draft for the same model and the exact same intro and closing if its cosine
+        similarity reaches the threshold. Only the context is embedded: requests that differ in the
+        recipient's name would otherwise embed almost identically and get another prospect's email.
+
+        Args:
+            embedding (List[float]): Embedding of the incoming context.
+            model_id (str): AIModel id the draft must have been generated with.
+            intro (str): Intro of the incoming request, matched exactly.
+            closing (str): Closing of the incoming request, matched exactly.
+
+        Returns:
+            Optional[SemanticMatch]: The reusable draft, or None on a miss.
+        """
+        started = time.perf_counter()
+        rows = await prisma.get_client().query_raw(
+            'SELECT "id", "content", 1 - ("promptEmbedding" <=> $1::vector) AS "similarity" '
+            'FROM "Draft" WHERE "modelId" = $2 AND "promptPersonalization" = $3 '
+            'AND "promptEmbedding" IS NOT NULL '
+            'ORDER BY "promptEmbedding" <=> $1::vector LIMIT 1',
+            to_vector_literal(embedding),
+            model_id,
+            personalization_key(intro, closing),
+        )
+        self._lookup_seconds += time.perf_counter() - started
+        if rows and rows[0]["similarity"] >= self.threshold:
+            self.hits += 1
+            return SemanticMatch(
+                draftId=rows[0]["id"],
+                content=rows[0]["content"],
+                similarity=rows[0]["similarity"],
+            )
+        self.misses += 1
+        return None
+
+    async def store(
+        self, draft_id: str, embedding: List[float], intro: str, closing: str
+    ) -> None:
+        await prisma.get_client().execute_raw(
+            'UPDATE "Draft" SET "promptEmbedding" = $1::vector, "promptPersonalization" = $2 '
+            'WHERE "id" = $3',
+            to_vector_literal(embedding),
+            personalization_key(intro, closing),
+            draft_id,
+        )
+
+    def stats(self) -> SemanticCacheStats:
+        lookups = self.hits + self.misses
+        return SemanticCacheStats(
+            enabled=self.enabled,
+            threshold=self.threshold,
+            hits=self.hits,
+            misses=self.misses,
+            average_lookup_ms=(
+                self._lookup_seconds / lookups * 1000 if lookups else 0.0
+            ),
+        )
+
+
+semantic_cache = SemanticCache.from_env()
+
+
+def _median_ms(samples: List[float]) -> float:
+    return sorted(samples)[len(samples) // 2] * 1000
+
+
+async def bench(drafts: int, lookups: int) -> Dict[str, float]:
+    """
+    Seeds `drafts` drafts with prompt embeddings for a throwaway user, then measures the median latency
+    of a cache hit (embed and lookup of a seeded prompt), a cache miss (an unseen prompt) and a fresh
+    generation through the writer/checker pipeline. The seeded rows are deleted afterwards.
+
+    Returns:
+        Dict[str, float]: Median milliseconds per variant.
+    """
+    from project.createContentRequest_service import (
+        ContentParameters,
+        build_messages,
+    )
+    from project.model_registry import model_registry
+    from project.quality_pipeline import QualityPipeline
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.95)
+    model = await model_registry.ensure("GPT_4_TURBO")
+    user = await prisma.models.User.prisma().create(
+        data={
+            "email": f"bench-{uuid.uuid4().hex}@example.com",
+            "password": "",
+            "role": prisma.enums.UserRole.EDITOR,
+        }
+    )
+    prompts = [
+        ("Hi Dana,", f"Routing software for logistics team {i}", "Best regards, Sam")
+        for i in range(drafts)
+    ]
+    samples: Dict[str, List[float]] = {"hit": [], "miss": [], "generation": []}
+    try:
+        for intro, context, closing in prompts:
+            draft = await prisma.models.Draft.prisma().create(
+                data={
+                    "content": context,
+                    "status": prisma.enums.DraftStatus.GENERATED,
+                    "userId": user.id,
+                    "modelId": model.id,
+                }
+            )
+            await cache.store(draft.id, await cache.embed(context), intro, closing)
+        for i in range(lookups):
+            intro, context, closing = prompts[i % drafts]
+            for label, lookup_context in (
+                ("hit", context),
+                ("miss", uuid.uuid4().hex),
+            ):
+                started = time.perf_counter()
+                await cache.lookup(
+                    await cache.embed(lookup_context), model.id, intro, closing
+                )
+                samples[label].append(time.perf_counter() - started)
+            parameters = ContentParameters(
+                intro=intro, context=context, closing=closing
+            )
+            pipeline = QualityPipeline("GPT_4_TURBO", build_messages(parameters))
+            started = time.perf_counter()
+            await pipeline.run()
+            samples["generation"].append(time.perf_counter() - started)
+    finally:
+        await prisma.models.Draft.prisma().delete_many(where={"userId": user.id})
+        await prisma.models.User.prisma().delete(where={"id": user.id})
+    return {label: _median_ms(values) for label, values in samples.items()}
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    database.register()
+    await database.connect()
+    try:
+        for label, ms in (await bench(args.drafts, args.lookups)).items():
+            print(f"{label:10} {ms:8.2f} ms")
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Semantic cache lookup latency against a fresh generation: `python -m project.semantic_cache`. Set
+    LLM_PROVIDER=stub with LLM_STUB_*_MS delays to simulate the model.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the semantic cache.")
+    parser.add_argument("--drafts", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=50)
+    asyncio.run(_bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
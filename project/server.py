@@ -1,8 +1,15 @@
+import asyncio
 import io
 import logging
+import math
+import os
 from contextlib import asynccontextmanager
+from typing import List
 
 import prisma
+import prisma.enums
+import project.bulkDrafts_service
+import project.createBulkContentRequest_service
 import project.createContentRequest_service
 import project.createDraft_service
 import project.createEmailAnalysis_service
@@ -12,17 +19,24 @@ import project.deleteEmailAnalytics_service
 import project.deleteGeneratedContent_service
 import project.deleteTemplate_service
 import project.deleteValidation_service
+import project.exportEmailAnalytics_service
 import project.fetchGeneratedContent_service
 import project.getAnalytics_service
 import project.getDraftById_service
 import project.getDrafts_service
 import project.getEmailPerformance_service
+import project.getJobStatus_service
 import project.getModelFeedback_service
+import project.getSystemStats_service
 import project.getTemplate_service
 import project.getValidationStatus_service
+import project.ingestCampaignEvents_service
+import project.job_queue
 import project.listModels_service
 import project.listTemplates_service
 import project.listValidations_service
+import project.renderTemplate_service
+import project.searchTemplates_service
 import project.selectModel_service
 import project.updateDraft_service
 import project.updateEmailAnalysis_service
@@ -30,29 +44,88 @@ import project.updateGeneratedContent_service
 import project.updateTemplate_service
 import project.updateValidation_service
 import project.validateContent_service
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import Response, StreamingResponse
-from prisma import Prisma
+from project.database import ReadConsistencyMiddleware, database
+from project.db_setup import ensure_database_objects
+from project.event_ingest import BufferFullError, event_buffer
+from project.http_caching import apply_headers, is_fresh, not_modified
+from project.http_encoding import CompressionMiddleware, FastJSONResponse
+from project.job_queue import WorkerPool
+from project.llm_engine import engine
+from project.metric_partitions import maintain_forever
+from project.metric_rollups import refresh_forever
+from project.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from project.model_registry import model_registry
+from project.query_instrumentation import instrument_prisma
+from project.tracing import TracingMiddleware, tracer
 
 logger = logging.getLogger(__name__)
 
-db_client = Prisma(auto_register=True)
+database.register()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await db_client.connect()
+    await database.connect()
+    await ensure_database_objects(database.primary)
+    await model_registry.load()
+    workers = None
+    if os.getenv("JOB_WORKER_MODE", "asyncio") == "asyncio":
+        workers = WorkerPool.from_env()
+        workers.start()
+    event_buffer.start()
+    rollups = None
+    rollup_interval = float(os.getenv("ROLLUP_REFRESH_SECONDS", "60"))
+    if rollup_interval > 0:
+        rollups = asyncio.create_task(refresh_forever(rollup_interval))
+    partitions = asyncio.create_task(
+        maintain_forever(float(os.getenv("PARTITION_MAINTENANCE_SECONDS", "86400")))
+    )
+    replica_monitor = None
+    if database.replica is not None:
+        replica_monitor = asyncio.create_task(database.monitor_forever())
     yield
-    await db_client.disconnect()
+    if replica_monitor is not None:
+        replica_monitor.cancel()
+        await asyncio.gather(replica_monitor, return_exceptions=True)
+    partitions.cancel()
+    await asyncio.gather(partitions, return_exceptions=True)
+    if rollups is not None:
+        rollups.cancel()
+        await asyncio.gather(rollups, return_exceptions=True)
+    if workers is not None:
+        await workers.stop()
+    await event_buffer.stop()
+    await engine.aclose()
+    await tracer.aclose()
+    await database.disconnect()
 
 
 app = FastAPI(
     title="test_nice",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     description="""a project that allows users to write B2B and B2C cold emails utilizing AI. In the program use LiteLLM so I can call multiple models like gpt-4-turbo and another model for checking output of gpt-4-turbo""",
 )
 
+app.add_middleware(CompressionMiddleware, **CompressionMiddleware.options_from_env())
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(
+    ReadConsistencyMiddleware, **ReadConsistencyMiddleware.options_from_env()
+)
+instrument_prisma()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def api_get_metrics() -> Response:
+    """
+    Exposes per-route request latency, in-flight requests, server errors, and Prisma query latency per project module in the Prometheus text format.
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 
 @app.patch(
     "/ai-writing/content/{contentId}",
@@ -73,7 +146,78 @@ async def api_patch_updateGeneratedContent(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/templates/search",
+    response_model=project.searchTemplates_service.SearchTemplatesResponse,
+)
+async def api_get_searchTemplates(
+    query: str,
+    limit: Optional[int] = None,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> project.searchTemplates_service.SearchTemplatesResponse | Response:
+    """
+    Searches templates by title and content with typo tolerance, best match first. Pass the returned nextCursor to fetch the following page.
+    """
+    try:
+        res = await project.searchTemplates_service.searchTemplates(
+            query, limit, category, cursor
+        )
+        return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/templates/{templateId}/render",
+    response_model=project.renderTemplate_service.RenderTemplateResponse,
+)
+async def api_post_renderTemplate(
+    templateId: str, recipients: List[project.renderTemplate_service.Recipient]
+) -> project.renderTemplate_service.RenderTemplateResponse | Response:
+    """
+    Personalizes a template for a batch of recipients in one call. The compiled template is cached in memory, so the batch costs at most one database query regardless of its size.
+    """
+    try:
+        res = await project.renderTemplate_service.renderTemplate(
+            templateId, recipients
+        )
+        return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -86,18 +230,26 @@ async def api_patch_updateGeneratedContent(
 )
 async def api_get_getTemplate(
     templateId: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
 ) -> project.getTemplate_service.GetTemplateResponse | Response:
     """
     Fetches a specific template by its unique identifier, 'templateId'. The response includes complete details of the template such as title, content, and creation date. Useful for template previews or editing.
     """
     try:
+        current = await project.getTemplate_service.getTemplateVersion(templateId)
+        if current is not None and is_fresh(current, if_none_match, if_modified_since):
+            return not_modified(current)
         res = await project.getTemplate_service.getTemplate(templateId)
+        if current is not None:
+            apply_headers(response, current)
         return res
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -120,7 +272,103 @@ async def api_delete_deleteDraft(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/drafts/bulk/update",
+    response_model=project.bulkDrafts_service.BulkDraftsResponse,
+)
+async def api_post_bulkUpdateDrafts(
+    request: project.bulkDrafts_service.BulkUpdateDraftsRequest,
+) -> project.bulkDrafts_service.BulkDraftsResponse | Response:
+    """
+    Replaces the content of many drafts in one transaction and records each new version in the draft's edit history. Responds with an outcome per draft, so unknown ids do not fail the rest.
+    """
+    try:
+        res = await project.bulkDrafts_service.bulkUpdateDrafts(request)
+        return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/drafts/bulk/status",
+    response_model=project.bulkDrafts_service.BulkDraftsResponse,
+)
+async def api_post_bulkTransitionDrafts(
+    request: project.bulkDrafts_service.BulkTransitionDraftsRequest,
+) -> project.bulkDrafts_service.BulkDraftsResponse | Response:
+    """
+    Moves many drafts to one status, e.g. finalizing a reviewed batch, in one transaction. Responds with an outcome per draft: updated, unchanged, not found, or an invalid transition such as changing a FINALIZED draft.
+    """
+    try:
+        res = await project.bulkDrafts_service.bulkTransitionDrafts(request)
+        return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/drafts/bulk/delete",
+    response_model=project.bulkDrafts_service.BulkDraftsResponse,
+)
+async def api_post_bulkDeleteDrafts(
+    request: project.bulkDrafts_service.BulkDeleteDraftsRequest,
+) -> project.bulkDrafts_service.BulkDraftsResponse | Response:
+    """
+    Deletes many drafts and their edit history in one transaction. This operation is irreversible. Responds with an outcome per draft, so unknown ids do not fail the rest.
+    """
+    try:
+        res = await project.bulkDrafts_service.bulkDeleteDrafts(request)
+        return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -144,7 +392,7 @@ async def api_delete_deleteValidation(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -161,11 +409,19 @@ async def api_get_getDrafts(
     try:
         res = await project.getDrafts_service.getDrafts(request)
         return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -191,7 +447,7 @@ async def api_delete_deleteGeneratedContent(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -215,7 +471,7 @@ async def api_delete_deleteEmailAnalytics(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -239,7 +495,7 @@ async def api_delete_deleteTemplate(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -265,7 +521,7 @@ async def api_put_updateTemplate(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -277,18 +533,26 @@ async def api_put_updateTemplate(
 )
 async def api_get_getDraftById(
     draftId: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
 ) -> project.getDraftById_service.FetchDraftResponse | Response:
     """
     Fetches a specific draft by its unique identifier. This route is used to retrieve detailed information about a draft to allow for focused editing. Response includes fields like content, status, and last edited timestamp. Expected output: {draftId: string, content: string, status: string, lastEdited: timestamp}.
     """
     try:
+        current = await project.getDraftById_service.getDraftVersion(draftId)
+        if current is not None and is_fresh(current, if_none_match, if_modified_since):
+            return not_modified(current)
         res = await project.getDraftById_service.getDraftById(draftId)
+        if current is not None:
+            apply_headers(response, current)
         return res
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -312,7 +576,7 @@ async def api_get_getEmailPerformance(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -322,18 +586,26 @@ async def api_get_getEmailPerformance(
 @app.get("/models", response_model=project.listModels_service.GetModelsResponse)
 async def api_get_listModels(
     request: project.listModels_service.GetModelsRequest,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
 ) -> project.listModels_service.GetModelsResponse | Response:
     """
     Retrieves a list of available AI models that users can select for content generation. This endpoint might internally call LiteLLM to fetch supported models like gpt-4-turbo. The response includes an array of models with details such as model name, description, and availability.
     """
     try:
+        current = await project.listModels_service.listModelsVersion()
+        if current is not None and is_fresh(current, if_none_match, if_modified_since):
+            return not_modified(current)
         res = await project.listModels_service.listModels(request)
+        if current is not None:
+            apply_headers(response, current)
         return res
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -358,7 +630,7 @@ async def api_post_createTemplate(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -384,7 +656,7 @@ async def api_get_getModelFeedback(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -408,7 +680,7 @@ async def api_post_validateContent(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -429,7 +701,7 @@ async def api_post_createDraft(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -440,21 +712,33 @@ async def api_post_createDraft(
     "/templates", response_model=project.listTemplates_service.GetTemplatesResponse
 )
 async def api_get_listTemplates(
-    page: int, limit: int, category: Optional[str], sortBy: str
+    limit: int,
+    category: Optional[str],
+    sortBy: str,
+    cursor: Optional[str] = None,
+    includeTotal: bool = False,
 ) -> project.listTemplates_service.GetTemplatesResponse | Response:
     """
-    Retrieves a list of all available email templates. It returns an array of template objects, sorted by most recently updated. This endpoint supports pagination and filtering parameters to handle large volumes of data.
+    Retrieves a list of all available email templates. It returns an array of template objects, sorted by creation date. Pass the returned nextCursor to fetch the following page; includeTotal adds an approximate number of matching templates.
     """
     try:
         res = await project.listTemplates_service.listTemplates(
-            page, limit, category, sortBy
+            limit, category, sortBy, cursor, includeTotal
         )
         return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -477,7 +761,7 @@ async def api_put_updateDraft(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -503,7 +787,7 @@ async def api_post_createEmailAnalysis(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -516,20 +800,30 @@ async def api_post_createEmailAnalysis(
 )
 async def api_get_fetchGeneratedContent(
     contentId: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
 ) -> project.fetchGeneratedContent_service.GetAIContentResponse | Response:
     """
     Retrieves the generated content from a prior request, identified by contentId. It outputs the full content if it's been validated by the Quality Check Module, along with metadata regarding the used model and validation status.
     """
     try:
+        current = await project.fetchGeneratedContent_service.getContentVersion(
+            contentId
+        )
+        if current is not None and is_fresh(current, if_none_match, if_modified_since):
+            return not_modified(current)
         res = await project.fetchGeneratedContent_service.fetchGeneratedContent(
             contentId
         )
+        if current is not None:
+            apply_headers(response, current)
         return res
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -543,7 +837,7 @@ async def api_get_fetchGeneratedContent(
 async def api_post_createContentRequest(
     userId: str,
     contentParameters: project.createContentRequest_service.ContentParameters,
-    modelType: project.createContentRequest_service.ModelType,
+    modelType: prisma.enums.ModelType,
 ) -> project.createContentRequest_service.ContentGenerationResponse | Response:
     """
     Creates a new content generation request using the gpt-4-turbo model, potentially redirected by the Model Selection Module based on availability and suitability. Once content is generated, it's submitted to the Quality Check Module for validation. Expected to return the new content's ID and a status of the creation process.
@@ -557,7 +851,81 @@ async def api_post_createContentRequest(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post("/ai-writing/content/stream")
+async def api_post_streamContentRequest(
+    userId: str,
+    contentParameters: project.createContentRequest_service.ContentParameters,
+    modelType: prisma.enums.ModelType,
+) -> StreamingResponse:
+    """
+    Streaming variant of the content generation request. Model tokens are sent to the client as server-sent events while the draft is written, followed by a final 'done' event carrying the new content's ID and status.
+    """
+    return StreamingResponse(
+        project.createContentRequest_service.streamContentRequest(
+            userId, contentParameters, modelType
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ai-writing/content/bulk")
+async def api_post_createBulkContentRequest(
+    userId: str,
+    contentParameters: List[project.createContentRequest_service.ContentParameters],
+    modelType: prisma.enums.ModelType,
+) -> StreamingResponse | Response:
+    """
+    Generates drafts for a whole campaign in one request. Per-item results are streamed back as newline-delimited JSON as they are stored; the first line carries the batch id needed to resume an interrupted batch.
+    """
+    try:
+        lines = await project.createBulkContentRequest_service.createBulkContentRequest(
+            userId, contentParameters, modelType
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post("/ai-writing/content/bulk/{batchId}/resume")
+async def api_post_resumeBulkContentRequest(
+    batchId: str,
+) -> StreamingResponse | Response:
+    """
+    Resumes an interrupted bulk generation batch. Items that already have drafts are reported without calling the model again; the rest are generated and streamed back in the same format as the bulk endpoint.
+    """
+    try:
+        lines = await project.createBulkContentRequest_service.resumeBulkContentRequest(
+            batchId
+        )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -569,19 +937,31 @@ async def api_post_createContentRequest(
     response_model=project.listValidations_service.ListQualityChecksResponse,
 )
 async def api_get_listValidations(
-    limit: Optional[int], offset: Optional[int]
+    limit: Optional[int],
+    cursor: Optional[str] = None,
+    includeTotal: bool = False,
 ) -> project.listValidations_service.ListQualityChecksResponse | Response:
     """
-    Lists recent content validations submitted to the module. Provides a summary of each validation, including IDs, submission times, and status.
+    Lists recent content validations submitted to the module. Provides a summary of each validation, including IDs, submission times, and status. Pass the returned nextCursor to fetch the following page.
     """
     try:
-        res = await project.listValidations_service.listValidations(limit, offset)
+        res = await project.listValidations_service.listValidations(
+            limit, cursor, includeTotal
+        )
         return res
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
     except Exception as e:
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -604,7 +984,7 @@ async def api_get_getAnalytics(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -630,7 +1010,7 @@ async def api_patch_updateEmailAnalysis(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -656,7 +1036,7 @@ async def api_get_getValidationStatus(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -679,7 +1059,7 @@ async def api_post_selectModel(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
@@ -708,7 +1088,183 @@ async def api_put_updateValidation(
         logger.exception("Error processing request")
         res = dict()
         res["error"] = str(e)
-        return Response(
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get(
+    "/system/stats", response_model=project.getSystemStats_service.SystemStatsResponse
+)
+async def api_get_getSystemStats() -> (
+    project.getSystemStats_service.SystemStatsResponse | Response
+):
+    """
+    Reports live runtime counters such as generation queue depth and in-flight model calls per provider.
+    """
+    try:
+        res = await project.getSystemStats_service.getSystemStats()
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/ai-writing/content/jobs", response_model=project.job_queue.JobEnqueuedResponse
+)
+async def api_post_enqueueContentRequest(
+    userId: str,
+    contentParameters: project.createContentRequest_service.ContentParameters,
+    modelType: prisma.enums.ModelType,
+) -> project.job_queue.JobEnqueuedResponse | Response:
+    """
+    Queues a content generation request instead of generating inline, so slow model calls never stall the API workers. Returns a job id whose outcome can be polled from /jobs/{jobId}.
+    """
+    try:
+        res = await project.createContentRequest_service.enqueueContentRequest(
+            userId, contentParameters, modelType
+        )
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/quality-check/validate/jobs", response_model=project.job_queue.JobEnqueuedResponse
+)
+async def api_post_enqueueValidation(
+    content: str,
+) -> project.job_queue.JobEnqueuedResponse | Response:
+    """
+    Queues content for validation by the Quality Check Module instead of validating inline. Returns a job id whose validation result can be polled from /jobs/{jobId}.
+    """
+    try:
+        res = await project.validateContent_service.enqueueValidation(content)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get("/jobs/{jobId}", response_model=project.getJobStatus_service.JobStatusResponse)
+async def api_get_getJobStatus(
+    jobId: str,
+) -> project.getJobStatus_service.JobStatusResponse | Response:
+    """
+    Retrieves the status of a queued generation or validation job, with its result once it has succeeded or its last error while it is being retried.
+    """
+    try:
+        res = await project.getJobStatus_service.getJobStatus(jobId)
+        return res
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.post(
+    "/analytics/events",
+    response_model=project.ingestCampaignEvents_service.EventIngestResponse,
+    status_code=202,
+)
+async def api_post_ingestCampaignEvents(
+    events: List[project.ingestCampaignEvents_service.CampaignEventInput],
+) -> project.ingestCampaignEvents_service.EventIngestResponse | Response:
+    """
+    Ingests a batch of open, click, conversion and delivery events, e.g. from an email service provider webhook. Events are buffered and stored in bulk; when the buffer is full the endpoint answers 429 with a Retry-After header so that senders back off.
+    """
+    try:
+        res = await project.ingestCampaignEvents_service.ingestCampaignEvents(events)
+        return res
+    except BufferFullError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=429,
+            media_type="application/json",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=500,
+            media_type="application/json",
+        )
+
+
+@app.get("/analytics/export")
+async def api_get_exportEmailAnalytics(
+    date_from: datetime,
+    date_to: datetime,
+    campaign_id: Optional[str] = None,
+    format: project.exportEmailAnalytics_service.ExportFormat = project.exportEmailAnalytics_service.ExportFormat.CSV,
+) -> StreamingResponse | Response:
+    """
+    Exports the metrics of the emails sent within a date range as a CSV or Parquet file. Rows are streamed in batches as they are read, so exports of any size use the same amount of memory.
+    """
+    try:
+        chunks = await project.exportEmailAnalytics_service.exportEmailAnalytics(
+            date_from, date_to, campaign_id, format
+        )
+        return StreamingResponse(
+            chunks,
+            media_type=project.exportEmailAnalytics_service.MEDIA_TYPES[format],
+            headers={
+                "Content-Disposition": f'attachment; filename="email-analytics.{format.value}"'
+            },
+        )
+    except ValueError as e:
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
+            content=jsonable_encoder(res),
+            status_code=400,
+            media_type="application/json",
+        )
+    except Exception as e:
+        logger.exception("Error processing request")
+        res = dict()
+        res["error"] = str(e)
+        return FastJSONResponse(
             content=jsonable_encoder(res),
             status_code=500,
             media_type="application/json",
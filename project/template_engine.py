@@ -0,0 +1,225 @@
+import asyncio
+import os
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+import prisma
+import prisma.models
+from project.database import primary_reads
+from project.generation_cache import LRUCache
+from pydantic import BaseModel
+
+# {{ first_name }}, {{ company.name }} or {{ first_name | there }} with a fallback for recipients
+# without the field. Anything else between braces is left as literal text.
+PLACEHOLDER = re.compile(
+    r"\{\{\s*([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)\s*(?:\|([^{}]*))?\}\}"
+)
+
+_MISSING = object()
+
+
+class Placeholder:
+    """
+    A field reference in a compiled template.
+    """
+
+    __slots__ = ("name", "path", "default")
+
+    def __init__(self, name: str, default: Optional[str]):
+        self.name = name
+        self.path = tuple(name.split("."))
+        self.default = default
+
+    def resolve(self, values: Mapping[str, Any]) -> Any:
+        value: Any = values
+        for key in self.path:
+            if not isinstance(value, Mapping):
+                return _MISSING
+            value = value.get(key, _MISSING)
+            if value is _MISSING:
+                return _MISSING
+        return value
+
+
+Node = Union[str, Placeholder]
+
+
+def compile_text(text: str) -> Tuple[Node, ...]:
+    """
+    Parses text into a flat AST of literal strings and placeholders, e.g. "Hi {{ name }}!" becomes
+    ("Hi ", Placeholder("name"), "!"). Empty literals are dropped.
+    """
+    nodes: List[Node] = []
+    position = 0
+    for match in PLACEHOLDER.finditer(text):
+        if match.start() > position:
+            nodes.append(text[position : match.start()])
+        default = match.group(2)
+        nodes.append(
+            Placeholder(
+                match.group(1), default.strip() if default is not None else None
+            )
+        )
+        position = match.end()
+    if position < len(text):
+        nodes.append(text[position:])
+    return tuple(nodes)
+
+
+def render_nodes(
+    nodes: Tuple[Node, ...], values: Mapping[str, Any], missing: List[str]
+) -> str:
+    """
+    Renders a compiled AST. Placeholders without a value render their fallback, or nothing; their
+    names are appended to `missing`.
+    """
+    parts = []
+    for node in nodes:
+        if node.__class__ is str:
+            parts.append(node)
+            continue
+        value = node.resolve(values)
+        if value is _MISSING or value is None:
+            if node.default is None:
+                missing.append(node.name)
+            else:
+                parts.append(node.default)
+        else:
+            parts.append(str(value))
+    return "".join(parts)
+
+
+class CompiledTemplate:
+    """
+    A template with its title and content parsed once, ready to be rendered for any number of
+    recipients without touching the database.
+    """
+
+    __slots__ = ("record", "title", "content", "fields")
+
+    def __init__(self, record: prisma.models.Template):
+        self.record = record
+        self.title = compile_text(record.title)
+        self.content = compile_text(record.content)
+        self.fields = sorted(
+            {
+                node.name
+                for node in self.title + self.content
+                if isinstance(node, Placeholder)
+            }
+        )
+
+    def render(self, values: Mapping[str, Any]) -> Tuple[str, str, List[str]]:
+        """
+        Returns the personalized title and content and the fields the recipient had no value for.
+        """
+        missing: List[str] = []
+        title = render_nodes(self.title, values, missing)
+        content = render_nodes(self.content, values, missing)
+        return title, content, sorted(set(missing))
+
+
+class TemplateStoreStats(BaseModel):
+    """
+    Counters of the in-process compiled template cache.
+    """
+
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    invalidations: int
+    evictions: int
+    expirations: int
+
+
+class TemplateStore:
+    """
+    LRU cache of compiled templates. updateTemplate and deleteTemplate invalidate the entry of the
+    template they change; entries also expire after TEMPLATE_CACHE_TTL_SECONDS so that changes made
+    through other processes are picked up.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.cache = LRUCache(max_entries, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> "TemplateStore":
+        return cls(
+            max_entries=int(os.getenv("TEMPLATE_CACHE_MAX_ENTRIES", "5000")),
+            ttl=float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "300")),
+        )
+
+    async def get(self, template_id: str) -> Optional[CompiledTemplate]:
+        """
+        Returns the compiled template, loading and compiling it on a miss. Concurrent misses for the
+        same template share one query; if the request running it is cancelled, a waiting one takes over.
+
+        Args:
+            template_id (str): The Template to look up.
+
+        Returns:
+            Optional[CompiledTemplate]: None if the template does not exist.
+        """
+        compiled = self.cache.get(template_id)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
+        self.misses += 1
+        pending = self._loading.get(template_id)
+        while pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # The request that was loading the template was cancelled; load it here instead.
+            pending = self._loading.get(template_id)
+        future = asyncio.get_running_loop().create_future()
+        self._loading[template_id] = future
+        try:
+            # Always from the primary: a replica could still hold the row an update just invalidated.
+            with primary_reads():
+                record = await prisma.models.Template.prisma().find_unique(
+                    where={"id": template_id}
+                )
+            compiled = CompiledTemplate(record) if record is not None else None
+            # Skip caching if the template was invalidated while it was being loaded.
+            if compiled is not None and self._loading.get(template_id) is future:
+                self.cache.set(template_id, compiled)
+            future.set_result(compiled)
+            return compiled
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting for it.
+            future.exception()
+            raise
+        finally:
+            if self._loading.get(template_id) is future:
+                del self._loading[template_id]
+
+    def invalidate(self, template_id: str) -> None:
+        self.cache.delete(template_id)
+        self._loading.pop(template_id, None)
+        self.invalidations += 1
+
+    def stats(self) -> TemplateStoreStats:
+        return TemplateStoreStats(
+            entries=len(self.cache),
+            max_entries=self.cache.max_entries,
+            hits=self.hits,
+            misses=self.misses,
+            invalidations=self.invalidations,
+            evictions=self.cache.evictions,
+            expirations=self.cache.expirations,
+        )
+
+
+template_store = TemplateStore.from_env()
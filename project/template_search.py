@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import prisma
+from project.database import database
+from project.pagination import decode_rank_cursor, encode_rank_cursor
+
+TEXT_SEARCH_CONFIG = "english"
+
+# Also the expression of the "Template_search_idx" GIN index created in project/db_setup.py; queries
+# must use it verbatim for Postgres to pick the index. Titles weigh more than body text in the ranking.
+SEARCH_VECTOR_SQL = (
+    f"(setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', \"title\"), 'A') || "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', \"content\"), 'B'))"
+)
+
+# Full-text matches anywhere in the template, plus titles within trigram distance of the query so that
+# typos still find the template. Both predicates are served by GIN indexes.
+_SEARCH_SQL = (
+    'SELECT * FROM (SELECT t."id", t."title", t."content", t."category", t."createdAt", '
+    f'(ts_rank_cd({SEARCH_VECTOR_SQL}, q.query) + similarity(t."title", $1))::float8 AS "rank" '
+    "FROM {table} t, "
+    f"(SELECT websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', $1) AS query) q "
+    f'WHERE ({SEARCH_VECTOR_SQL} @@ q.query OR t."title" % $1) {{scope}}) s '
+    '{after} ORDER BY s."rank" DESC, s."id" LIMIT $2'
+)
+
+
+async def search(
+    query: str,
+    limit: int,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    table: str = '"Template"',
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Ranks templates against a free-text query, best match first.
+
+    Args:
+        query (str): Search terms in web search syntax: quoted phrases, "or" and -exclusions are supported.
+        limit (int): Page size.
+        category (Optional[str]): Restricts results to one category.
+        cursor (Optional[str]): Cursor returned with the previous page; None for the first page.
+        table (str): Table to search, only overridden by the benchmark.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: The matching rows with their rank and the cursor of the next page, None on the last page.
+    """
+    params: List[Any] = [query, limit + 1]
+    scope = ""
+    if category:
+        params.append(category)
+        scope = f'AND t."category" = ${len(params)}'
+    after = ""
+    if cursor:
+        rank, row_id = decode_rank_cursor(cursor)
+        params.extend([rank, row_id])
+        after = (
+            f'WHERE (s."rank" < ${len(params) - 1}::float8 '
+            f'OR (s."rank" = ${len(params) - 1}::float8 AND s."id" > ${len(params)}))'
+        )
+    rows = await prisma.get_client().query_raw(
+        _SEARCH_SQL.format(table=table, scope=scope, after=after), *params
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_rank_cursor(rows[-1]["rank"], rows[-1]["id"])
+
+
+_WORDS = (
+    "welcome newsletter discount offer summer winter launch product update event webinar "
+    "invitation reminder survey feedback holiday sale exclusive member loyalty reward thank "
+    "onboarding renewal subscription announcement release feature customer partner report "
+    "quarterly monthly weekly digest promotion coupon abandoned cart shipping order receipt"
+).split()
+
+
+async def bench(templates: int, queries: int) -> Dict[str, float]:
+    """
+    Copies the Template table definition and its indexes into a scratch table, fills it with synthetic
+    templates, runs random one- and two-word queries plus misspelled titles against it and drops it again.
+
+    Returns:
+        Dict[str, float]: p50, p95 and max query latency in seconds.
+    """
+    client = prisma.get_client()
+    table = '"bench_template"'
+    await client.execute_raw(f"DROP TABLE IF EXISTS {table}")
+    await client.execute_raw(f'CREATE TABLE {table} (LIKE "Template" INCLUDING ALL)')
+    words = "ARRAY[" + ", ".join(f"'{word}'" for word in _WORDS) + "]"
+    pick = f"{words}[1 + floor(random() * {len(_WORDS)})::int]"
+    await client.execute_raw(
+        f'INSERT INTO {table} ("id", "title", "content", "category", "featureId", "createdAt") '
+        f"SELECT 'bench' || i, initcap({pick} || ' ' || {pick} || ' ' || {pick}), "
+        f"(SELECT string_agg({pick}, ' ') FROM generate_series(1, 120 + (i % 3)) w), "
+        f"'category-' || (i % 20), 'bench', now() - make_interval(secs => i) "
+        "FROM generate_series(1, $1) i",
+        templates,
+    )
+    await client.execute_raw(f"ANALYZE {table}")
+    latencies = []
+    for _ in range(queries):
+        terms = random.sample(_WORDS, random.choice([1, 2]))
+        text = " ".join(terms)
+        if random.random() < 0.3:
+            # Drop a letter to exercise the trigram path.
+            position = random.randrange(1, len(text) - 1)
+            text = text[:position] + text[position + 1 :]
+        started = time.perf_counter()
+        await search(text, 20, table=table)
+        latencies.append(time.perf_counter() - started)
+    await client.execute_raw(f"DROP TABLE {table}")
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+    }
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    database.register()
+    await database.connect()
+    try:
+        for name, seconds in (await bench(args.templates, args.queries)).items():
+            print(f"{name:4} {seconds * 1000:8.1f} ms")
+    finally:
+        await database.disconnect()
+
+
+def main() -> None:
+    """
+    Measures search latency: `python -m project.template_search --templates 100000`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark template search.")
+    parser.add_argument("--templates", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    asyncio.run(_bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
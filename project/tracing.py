@@ -0,0 +1,471 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+import prisma
+from project.generation_cache import LRUCache
+from project.metrics import route_template
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "test-nice"
+
+# Statements EXPLAIN accepts; anything else (DDL, SET, ...) is logged without a plan.
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_explaining: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "explaining", default=False
+)
+
+
+class Span:
+    """
+    A timed operation within a trace. Children are collected on the root span and exported together
+    when the request finishes.
+    """
+
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "error",
+        "root",
+        "children",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        root: Optional["Span"] = None,
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error = False
+        self.root = root or self
+        self.children: List["Span"] = []
+
+    def child(self, name: str, kind: str = "client") -> "Span":
+        span = Span(name, kind, self.trace_id, self.span_id, self.root)
+        self.root.children.append(span)
+        return span
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start_ns,
+            "durationMs": ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonFileExporter:
+    """
+    Appends finished spans to a local file, one JSON object per line. Spans are serialized and written
+    by a background thread, so the event loop never blocks on the disk; when the queue is full new spans
+    are dropped.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000):
+        self.path = path
+        self.dropped = 0
+        self._file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="trace-json-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                break
+            try:
+                for span in spans:
+                    self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+                if self._queue.empty():
+                    self._file.flush()
+            except Exception:
+                self.dropped += len(spans)
+                logger.exception("Failed to write spans to %s", self.path)
+        self._file.close()
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self._queue.put, None)
+        await asyncio.to_thread(self._thread.join)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value)}
+
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class OtlpExporter:
+    """
+    Sends spans to an OpenTelemetry collector with OTLP/HTTP JSON. Spans are queued and posted in
+    batches from a background task, so requests never wait for the collector; when the queue is full
+    new spans are dropped.
+    """
+
+    def __init__(self, endpoint: str, max_queue: int = 10000, interval: float = 1.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.max_queue = max_queue
+        self.interval = interval
+        self.dropped = 0
+        self._queue: List[Span] = []
+        self._client = httpx.AsyncClient(timeout=5.0)
+        self._task: Optional[asyncio.Task] = None
+
+    def export(self, spans: List[Span]) -> None:
+        if len(self._queue) + len(spans) > self.max_queue:
+            self.dropped += len(spans)
+            return
+        self._queue.extend(spans)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": _otlp_value(SERVICE_NAME)}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    **(
+                                        {"parentSpanId": span.parent_id}
+                                        if span.parent_id
+                                        else {}
+                                    ),
+                                    "name": span.name,
+                                    "kind": _OTLP_KINDS.get(span.kind, 1),
+                                    "startTimeUnixNano": str(span.start_ns),
+                                    "endTimeUnixNano": str(
+                                        span.end_ns or span.start_ns
+                                    ),
+                                    "attributes": [
+                                        {"key": key, "value": _otlp_value(value)}
+                                        for key, value in span.attributes.items()
+                                        if value is not None
+                                    ],
+                                    "status": {"code": 2 if span.error else 1},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    async def _flush(self) -> None:
+        spans, self._queue = self._queue, []
+        if not spans:
+            return
+        try:
+            response = await self._client.post(self.url, json=self._payload(spans))
+            response.raise_for_status()
+        except Exception:
+            self.dropped += len(spans)
+            logger.warning("Failed to export %d spans to %s", len(spans), self.url)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._flush()
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._flush()
+        await self._client.aclose()
+
+
+class Tracer:
+    """
+    Opt-in request tracing. With TRACING_EXPORTER unset every hook returns after one attribute check,
+    so the disabled path costs next to nothing.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        kind = os.getenv("TRACING_EXPORTER", "none").lower()
+        exporter = None
+        if kind == "json":
+            exporter = JsonFileExporter(os.getenv("TRACING_JSON_PATH", "traces.jsonl"))
+        elif kind == "otlp":
+            exporter = OtlpExporter(
+                os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+            )
+        elif kind != "none":
+            logger.warning("Unknown TRACING_EXPORTER %r, tracing disabled", kind)
+        return cls(exporter, float(os.getenv("TRACING_SAMPLE_RATE", "1.0")))
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_request(self, name: str, traceparent: Optional[str]) -> Optional[Span]:
+        """
+        Starts the root span of a request, continuing the caller's trace from a W3C traceparent header.
+        """
+        trace_id, parent_id = None, None
+        if traceparent:
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                trace_id, parent_id = parts[1], parts[2]
+        if trace_id is None and random.random() >= self.sample_rate:
+            return None
+        return Span(name, "server", trace_id or os.urandom(16).hex(), parent_id)
+
+    def finish_request(self, span: Span) -> None:
+        span.end()
+        try:
+            self.exporter.export([span, *span.children])
+        except Exception:
+            logger.exception("Failed to export trace %s", span.trace_id)
+
+    async def aclose(self) -> None:
+        if self.exporter is not None:
+            await self.exporter.aclose()
+
+
+tracer = Tracer.from_env()
+
+
+class TracingMiddleware:
+    """
+    Opens one span per request; queries issued while handling it become its children.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        span = tracer.start_request(
+            f"{scope['method']} {route_template(scope)}",
+            Headers(scope=scope).get("traceparent"),
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+        span.attributes["http.method"] = scope["method"]
+        span.attributes["http.target"] = scope["path"]
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                span.error = message["status"] >= 500
+            await send(message)
+
+        token = _current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            span.error = True
+            raise
+        finally:
+            _current_span.reset(token)
+            tracer.finish_request(span)
+
+
+def args_shape(value: Any, depth: int = 0) -> Any:
+    """
+    The structure of query arguments with values replaced by their type names, so spans and logs show
+    what was asked without leaking data.
+    """
+    if depth > 5:
+        return "..."
+    if isinstance(value, dict):
+        return {key: args_shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [args_shape(item, depth + 1) for item in value[:3]]
+        return shapes + ["..."] if len(value) > 3 else shapes
+    return type(value).__name__
+
+
+def row_count(response: Any) -> Optional[int]:
+    result = (
+        response.get("data", {}).get("result") if isinstance(response, dict) else None
+    )
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        count = result.get("count")
+        return count if isinstance(count, int) else 1
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 0 if result is None else None
+
+
+def start_query_span(
+    model: str, method: str, arguments: Dict[str, Any]
+) -> Optional[Span]:
+    """
+    A child span of the current request for one Prisma query, or None when the request is not traced.
+    """
+    parent = _current_span.get()
+    if parent is None or _explaining.get():
+        return None
+    span = parent.child(f"prisma {model}.{method}")
+    span.attributes["db.system"] = "postgresql"
+    span.attributes["db.prisma.model"] = model
+    span.attributes["db.operation"] = method
+    if "query" in arguments:
+        span.attributes["db.statement"] = arguments["query"]
+    else:
+        span.attributes["db.prisma.args"] = json.dumps(args_shape(arguments))
+    return span
+
+
+def end_query_span(span: Span, response: Any, failed: bool) -> None:
+    span.end()
+    span.error = failed
+    if not failed:
+        span.attributes["db.rows"] = row_count(response)
+
+
+class SlowQueryLog:
+    """
+    Logs queries slower than SLOW_QUERY_MS with their plan. Raw SQL is explained (without ANALYZE, so
+    nothing runs twice) in a background task; Prisma model queries are logged with their argument
+    shape, since the engine does not expose the SQL it generates. Each statement is explained at most
+    once per `explain_interval` seconds; the last `max_statements` explained statements are remembered.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        explain_interval: float = 300.0,
+        max_statements: int = 1000,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.explain_interval = explain_interval
+        self._explained = LRUCache(max_statements, explain_interval)
+        # The event loop only keeps weak references to tasks.
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls) -> "SlowQueryLog":
+        return cls(float(os.getenv("SLOW_QUERY_MS", "500")))
+
+    def observe(
+        self,
+        module: str,
+        model: str,
+        method: str,
+        arguments: Dict[str, Any],
+        elapsed: float,
+    ) -> None:
+        if self.threshold <= 0 or elapsed < self.threshold or _explaining.get():
+            return
+        sql = arguments.get("query")
+        if sql is None:
+            logger.warning(
+                "Slow query (%.0f ms) from %s: %s.%s %s",
+                elapsed * 1000,
+                module,
+                model,
+                method,
+                json.dumps(args_shape(arguments)),
+            )
+            return
+        key = hashlib.sha1(sql.encode("utf-8")).hexdigest()
+        explain = (
+            sql.lstrip().lower().startswith(_EXPLAINABLE)
+            and self._explained.get(key) is None
+        )
+        if not explain:
+            logger.warning(
+                "Slow query (%.0f ms) from %s: %s", elapsed * 1000, module, sql
+            )
+            return
+        self._explained.set(key, True)
+        task = asyncio.get_running_loop().create_task(
+            self._explain(module, sql, arguments.get("parameters", ()), elapsed)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(
+        self, module: str, sql: str, parameters: Any, elapsed: float
+    ) -> None:
+        _explaining.set(True)
+        try:
+            rows = await prisma.get_client().query_raw(f"EXPLAIN {sql}", *parameters)
+            plan = "\n".join(str(row.get("QUERY PLAN", row)) for row in rows)
+        except Exception as e:
+            plan = f"(EXPLAIN failed: {e})"
+        logger.warning(
+            "Slow query (%.0f ms) from %s: %s\n%s", elapsed * 1000, module, sql, plan
+        )
+
+
+slow_query_log = SlowQueryLog.from_env()
@@ -1,6 +1,7 @@
 import prisma
 import prisma.enums
 import prisma.models
+from project.data_access import update_by_id
 from pydantic import BaseModel
 
 
@@ -24,12 +25,9 @@ async def updateDraft(draftId: str, content: str) -> UpdateDraftResponse:
     Returns:
         UpdateDraftResponse: Model representing the response after attempting to update a draft. It indicates whether the update was successful or not.
     """
-    draft = await prisma.models.Draft.prisma().find_unique(where={"id": draftId})
-    if draft:
-        updated_draft = await prisma.models.Draft.prisma().update(
-            where={"id": draftId},
-            data={"content": content, "status": prisma.enums.DraftStatus.EDITED},
-        )
-        return UpdateDraftResponse(draftId=draftId, updated=True)
-    else:
-        return UpdateDraftResponse(draftId=draftId, updated=False)
+    updated = await update_by_id(
+        prisma.models.Draft,
+        draftId,
+        {"content": content, "status": prisma.enums.DraftStatus.EDITED},
+    )
+    return UpdateDraftResponse(draftId=draftId, updated=updated)
@@ -2,6 +2,7 @@ from typing import Optional
 
 import prisma
 import prisma.models
+from project import metric_rollups
 from pydantic import BaseModel
 
 
@@ -48,8 +49,15 @@ async def updateEmailAnalysis(
         updated_data["conversionRate"] = conversionRate
     if updated_data:
         updated_metric = await prisma.models.CampaignMetric.prisma().update(
-            where={"id": current_metric.id}, data=updated_data
+            where={
+                "id_createdAt": {
+                    "id": current_metric.id,
+                    "createdAt": current_metric.createdAt,
+                }
+            },
+            data=updated_data,
         )
+        await metric_rollups.refresh_campaign(emailId)
         updateStatus = "Success: Metrics updated"
     else:
         updated_metric = current_metric
@@ -2,6 +2,8 @@ from typing import Optional
 
 import prisma
 import prisma.models
+from project.data_access import update_returning
+from project.template_engine import template_store
 from pydantic import BaseModel
 
 
@@ -39,15 +41,20 @@ async def updateTemplate(
     Returns:
         UpdateTemplateResponse: Outputs the updated template object reflecting the changes made
     """
-    template_record = await prisma.models.Template.prisma().find_unique(
-        where={"id": templateId}, include={"Feature": True}
-    )
-    if not template_record:
-        raise ValueError("Template not found")
     updated_fields = {"title": title, "content": content}
     if category is not None:
         updated_fields["category"] = category
-    updated_template = await prisma.models.Template.prisma().update(
-        where={"id": templateId}, data=updated_fields
+    updated_template = await update_returning(
+        prisma.models.Template, templateId, updated_fields
+    )
+    if updated_template is None:
+        raise ValueError("Template not found")
+    template_store.invalidate(templateId)
+    return UpdateTemplateResponse(
+        template=Template(
+            templateId=updated_template.id,
+            title=updated_template.title,
+            content=updated_template.content,
+            category=updated_template.category,
+        )
     )
-    return UpdateTemplateResponse(template=Template(**updated_template.__dict__))
@@ -2,6 +2,8 @@ from typing import Dict, Optional
 
 import prisma
 import prisma.models
+from project.data_access import update_returning
+from project.model_registry import model_registry
 from pydantic import BaseModel
 
 
@@ -33,18 +35,9 @@ async def updateValidation(
     Returns:
         QualityCheckUpdateResponse: Response model representing the updated state of the validation request.
     """
-    draft = await prisma.models.Draft.prisma().find_unique(where={"id": validationId})
-    if draft is None:
-        return QualityCheckUpdateResponse(
-            success=False,
-            updatedValidationId=validationId,
-            updatedDetails={"error": "Validation with the provided ID does not exist."},
-        )
     update_data = {"content": newContent}
     if newModelType:
-        model = await prisma.models.AIModel.prisma().find_first(
-            where={"modelType": newModelType}
-        )
+        model = await model_registry.get_by_type(newModelType)
         if model:
             update_data["modelId"] = model.id
         else:
@@ -53,20 +46,23 @@ async def updateValidation(
                 updatedValidationId=validationId,
                 updatedDetails={"error": "Specified model type does not exist."},
             )
-    await prisma.models.Draft.prisma().update(
-        where={"id": validationId}, data=update_data
-    )
+    if additionalNotes:
+        # Written together with the draft, in one round-trip and transaction.
+        update_data["Edits"] = {"create": [{"content": additionalNotes}]}
+    draft = await update_returning(prisma.models.Draft, validationId, update_data)
+    if draft is None:
+        return QualityCheckUpdateResponse(
+            success=False,
+            updatedValidationId=validationId,
+            updatedDetails={"error": "Validation with the provided ID does not exist."},
+        )
     updatedDetails = {
         "newContent": newContent,
         "newModelType": newModelType if newModelType else "Unchanged",
-        "additionalNotes": additionalNotes
-        if additionalNotes
-        else "No additional notes provided",
+        "additionalNotes": (
+            additionalNotes if additionalNotes else "No additional notes provided"
+        ),
     }
-    if additionalNotes:
-        await prisma.models.Edit.prisma().create(
-            data={"content": additionalNotes, "draftId": validationId}
-        )
     return QualityCheckUpdateResponse(
         success=True, updatedValidationId=validationId, updatedDetails=updatedDetails
     )
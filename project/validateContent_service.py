@@ -1,10 +1,27 @@
-from typing import List
+import argparse
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Dict, List
 
-import prisma
-import prisma.enums
-import prisma.models
+from project import job_queue
+from project.content_rules import ContentRule, rule_set
+from project.llm_engine import engine
+from project.quality_pipeline import CHECKER_MODEL_TYPE, CHECKER_PROMPT, parse_verdict
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
+BENCH_CONTENT = (
+    "Hi Dana, I noticed Northwind recently opened a second warehouse in Leeds. Our routing software "
+    "helped similar logistics teams cut empty miles by 18% within one quarter, without changing "
+    "their existing fleet systems. Would you be open to a 20 minute call next week to see whether "
+    "it fits your expansion plans? Best regards, Sam Patel, Account Executive. "
+    "Reply STOP to unsubscribe."
+)
+
 
 class ContentValidationResponse(BaseModel):
     """
@@ -19,6 +36,8 @@ class ContentValidationResponse(BaseModel):
 async def validateContent(content: str) -> ContentValidationResponse:
     """
     Validates AI-generated content by submitting it to a secondary AI model. Expects a string of content from the AI Writing Module. Returns validation results including error checks and suggestions.
+    The compiled local rules (spam words, greeting, length, links, unsubscribe text) run first; the checker model is only called when they found no errors and QUALITY_CHECK_ENABLED is true.
+    If the checker model is unconfigured, unavailable, times out or fails, the result of the local rules is returned.
 
     Args:
         content (str): The AI-generated content that needs to be validated.
@@ -31,24 +50,108 @@ async def validateContent(content: str) -> ContentValidationResponse:
         print(validateContent(content))
         # Output: ContentValidationResponse(isValid=True, errorMessages=[], suggestions=["Consider personalizing the greeting with the recipient's name."])
     """
-    errors, suggestions = ([], [])
-    if "Dear Partner" in content:
-        suggestions.append(
-            "Consider personalizing the greeting with the recipient's name."
-        )
-    if len(content) < 100:
-        errors.append(
-            "Content is too short, consider adding more detailed information."
-        )
-    ai_model = await prisma.models.AIModel.prisma().find_first(
-        where={"model_type": prisma.enums.ModelType.CUSTOM_CHECKER}
-    )
-    if not ai_model:
-        is_valid = True
-    else:
-        is_valid = len(errors) == 0
+    report = rule_set().evaluate(content)
+    errors, suggestions = (report.errors, report.suggestions)
+    if not errors and os.getenv("QUALITY_CHECK_ENABLED", "true").lower() == "true":
+        try:
+            completion = await engine.generate(
+                CHECKER_MODEL_TYPE,
+                [
+                    {"role": "system", "content": CHECKER_PROMPT},
+                    {"role": "user", "content": content},
+                ],
+            )
+        except Exception as e:
+            logger.warning("Checker model failed, using the rule result: %s", e)
+        else:
+            reason = parse_verdict(completion.text)
+            if reason is not None:
+                errors.append(reason)
+    is_valid = len(errors) == 0
     if not is_valid:
         errors.append("Content validation failed by the AI model standards.")
     return ContentValidationResponse(
         isValid=is_valid, errorMessages=errors, suggestions=suggestions
     )
+
+
+async def enqueueValidation(content: str) -> job_queue.JobEnqueuedResponse:
+    """
+    Deferred variant of validateContent. The content is queued on the 'validation' queue and the job id is
+    returned immediately; the validation result can be polled from the job status endpoint.
+
+    Args:
+        content (str): The AI-generated content that needs to be validated.
+
+    Returns:
+        job_queue.JobEnqueuedResponse: The queued job's id and status.
+    """
+    return await job_queue.enqueue("validation", {"content": content})
+
+
+@job_queue.handler("validation")
+async def run_validation_job(payload: Dict) -> Dict:
+    response = await validateContent(payload["content"])
+    return response.model_dump()
+
+
+def _naive_evaluate(rules: List[ContentRule], content: str) -> int:
+    """
+    Baseline for the benchmark: one phrase alternation per rule, each scanning the whole content.
+    """
+    failed = 0
+    for rule in rules:
+        if rule.patterns:
+            alternation = "|".join(
+                p if rule.regex else re.escape(p) for p in rule.patterns
+            )
+            failed += bool(re.findall(f"(?i)(?<!\\w)(?:{alternation})", content))
+    return failed
+
+
+async def bench(iterations: int, content: str) -> Dict[str, float]:
+    """
+    Measures validations per second for the naive per-rule scan, the compiled rules alone and the
+    full validateContent with the checker model (use LLM_PROVIDER=stub to leave the provider out).
+
+    Returns:
+        Dict[str, float]: Validations per second per variant.
+    """
+    rules = rule_set()
+    results: Dict[str, float] = {}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        _naive_evaluate(rules.rules, content)
+    results["naive"] = iterations / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        rules.evaluate(content)
+    results["rules"] = iterations / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await validateContent(content)
+    results["validateContent"] = iterations / (time.perf_counter() - started)
+    return results
+
+
+def main() -> None:
+    """
+    Validation throughput: `LLM_PROVIDER=stub python -m project.validateContent_service`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark content validation.")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument(
+        "--content-file", help="Validate this file instead of a sample email."
+    )
+    args = parser.parse_args()
+    content = BENCH_CONTENT
+    if args.content_file:
+        with open(args.content_file) as f:
+            content = f.read()
+    print(f"{len(content)} characters")
+    for label, rate in asyncio.run(bench(args.iterations, content)).items():
+        print(f"{label:16} {rate:10.0f} validations/s")
+
+
+if __name__ == "__main__":
+    main()
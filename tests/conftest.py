@@ -0,0 +1,4 @@
+import os
+
+# Module-level engines are built from the environment on import; keep them off the network.
+os.environ.setdefault("LLM_PROVIDER", "stub")
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import types
+
+import pytest
+
+prisma_models = pytest.importorskip(
+    "prisma.models", reason="the Prisma client is not generated"
+)
+import prisma.enums
+from project import createBulkContentRequest_service, createContentRequest_service
+from project.generation_cache import generation_cache
+from project.semantic_cache import semantic_cache
+
+PARAMETERS = {
+    "intro": "Hi Dana,",
+    "context": "Routing software for logistics teams",
+    "closing": "Best regards, Sam",
+}
+
+
+class FakeActions:
+    """
+    In-memory stand-in for the Prisma actions the generation services call.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def create(self, data):
+        row = types.SimpleNamespace(**{"id": f"row-{len(self.rows)}", **data})
+        self.rows[row.id] = row
+        return row
+
+    async def create_many(self, data, skip_duplicates=False):
+        for item in data:
+            if not (skip_duplicates and item["id"] in self.rows):
+                await self.create(item)
+        return len(data)
+
+    async def update(self, where, data):
+        row = self.rows.get(where["id"])
+        if row is not None:
+            vars(row).update(data)
+        return row
+
+
+def fake_model(rows):
+    return types.SimpleNamespace(prisma=lambda client=None: FakeActions(rows))
+
+
+@pytest.fixture
+def drafts(monkeypatch):
+    rows = {}
+    monkeypatch.setattr(prisma_models, "Draft", fake_model(rows))
+
+    async def get_ai_model(modelType):
+        return types.SimpleNamespace(id=f"model-{modelType.name}")
+
+    monkeypatch.setattr(createContentRequest_service, "get_ai_model", get_ai_model)
+    monkeypatch.setattr(createBulkContentRequest_service, "get_ai_model", get_ai_model)
+    monkeypatch.setattr(generation_cache, "db_enabled", False)
+    monkeypatch.setattr(semantic_cache, "enabled", False)
+    generation_cache.memory.clear()
+    return rows
+
+
+def test_generation_job_creates_a_draft(drafts):
+    result = asyncio.run(
+        createContentRequest_service.run_content_job(
+            {
+                "userId": "user-1",
+                "contentParameters": PARAMETERS,
+                "modelType": "GPT_4_TURBO",
+            }
+        )
+    )
+    assert result["status"] == "success"
+    draft = drafts[result["contentId"]]
+    assert draft.modelId == "model-GPT_4_TURBO"
+    assert "Routing software for logistics teams" in draft.content
+
+
+def test_bulk_batch_skips_stored_items_and_completes(drafts, monkeypatch):
+    batches = {}
+    monkeypatch.setattr(prisma_models, "GenerationBatch", fake_model(batches))
+
+    async def completed_indices(batch_id, total):
+        return {1}
+
+    monkeypatch.setattr(
+        createBulkContentRequest_service, "_completed_indices", completed_indices
+    )
+    batch = types.SimpleNamespace(
+        id="batch-1",
+        userId="user-1",
+        items=[
+            dict(PARAMETERS, intro=f"Hi {name},") for name in ("Dana", "Sam", "Lee")
+        ],
+        modelType=prisma.enums.ModelType.GPT_4_TURBO,
+        status=prisma.enums.BatchStatus.RUNNING,
+    )
+    batches[batch.id] = batch
+
+    async def collect():
+        return [
+            json.loads(line)
+            async for line in createBulkContentRequest_service._run_batch(batch)
+        ]
+
+    lines = asyncio.run(collect())
+    assert lines[0] == {"batchId": "batch-1", "total": 3}
+    results = {line["index"]: line for line in lines[1:-1]}
+    assert sorted(results) == [0, 1, 2]
+    assert all(result["status"] == "success" for result in results.values())
+    assert sorted(drafts) == ["batch-1-0", "batch-1-2"]
+    assert lines[-1]["failed"] == 0
+    assert batch.status == prisma.enums.BatchStatus.COMPLETED
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+from project.llm_engine import GenerationEngine, StubProvider
+from project.model_router import ModelRouter
+
+MESSAGES = [{"role": "user", "content": "hello cold email world"}]
+
+
+class CountingProvider(StubProvider):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def complete(self, model, messages):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().complete(model, messages)
+        finally:
+            self.active -= 1
+
+
+def make_engine(provider, deployments=None, **kwargs) -> GenerationEngine:
+    router = ModelRouter(deployments or {"GPT_4_TURBO": ["gpt-4-turbo"]})
+    return GenerationEngine(provider, router=router, **kwargs)
+
+
+def test_generate_echoes_prompt_and_counts_tokens():
+    engine = make_engine(StubProvider())
+    completion = asyncio.run(engine.generate("GPT_4_TURBO", MESSAGES))
+    assert completion.text == "hello cold email world"
+    assert completion.model == "gpt-4-turbo"
+    assert completion.completion_tokens == 4
+    [stats] = engine.stats()
+    assert (stats.provider, stats.completed, stats.in_flight) == ("openai", 1, 0)
+
+
+def test_concurrency_is_limited_per_provider():
+    provider = CountingProvider(latency=0.02)
+    engine = make_engine(provider, concurrency=3)
+
+    async def burst():
+        await asyncio.gather(
+            *(engine.generate("GPT_4_TURBO", MESSAGES) for _ in range(12))
+        )
+
+    asyncio.run(burst())
+    assert provider.peak == 3
+    [stats] = engine.stats()
+    assert stats.completed == 12
+    assert stats.queued == 0
+    assert stats.in_flight == 0
+
+
+def test_providers_have_separate_limits():
+    provider = CountingProvider(latency=0.02)
+    engine = make_engine(
+        provider,
+        {"GPT_4_TURBO": ["gpt-4-turbo"], "CUSTOM_CHECKER": ["azure/gpt-35"]},
+        concurrency=2,
+    )
+
+    async def burst():
+        await asyncio.gather(
+            *(
+                engine.generate(model_type, MESSAGES)
+                for model_type in ("GPT_4_TURBO", "CUSTOM_CHECKER") * 4
+            )
+        )
+
+    asyncio.run(burst())
+    assert provider.peak == 4
+    assert {stats.provider: stats.completed for stats in engine.stats()} == {
+        "openai": 4,
+        "azure": 4,
+    }
+
+
+def test_model_type_budget_is_separate_from_the_provider():
+    provider = CountingProvider(latency=0.02)
+    engine = make_engine(
+        provider,
+        {"GPT_4_TURBO": ["gpt-4-turbo"], "CUSTOM_CHECKER": ["gpt-3.5-turbo"]},
+        concurrency=2,
+        type_concurrency={"CUSTOM_CHECKER": 1},
+    )
+
+    async def burst():
+        writers = [engine.generate("GPT_4_TURBO", MESSAGES) for _ in range(4)]
+        checkers = [engine.generate("CUSTOM_CHECKER", MESSAGES) for _ in range(4)]
+        await asyncio.gather(*writers, *checkers)
+
+    asyncio.run(burst())
+    assert provider.peak == 3
+    assert {stats.provider: stats.concurrency_limit for stats in engine.stats()} == {
+        "openai": 2,
+        "openai:CUSTOM_CHECKER": 1,
+    }
+
+
+def test_timeout_is_raised_and_counted():
+    engine = make_engine(StubProvider(latency=0.5), timeout=0.01)
+    with pytest.raises(TimeoutError):
+        asyncio.run(engine.generate("GPT_4_TURBO", MESSAGES))
+    [stats] = engine.stats()
+    assert (stats.timed_out, stats.completed, stats.in_flight) == (1, 0, 0)
+
+
+def test_failure_is_counted_and_releases_the_slot():
+    engine = make_engine(
+        StubProvider(failure_rates={"gpt-4-turbo": 1.0}), concurrency=1
+    )
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(engine.generate("GPT_4_TURBO", MESSAGES))
+    [stats] = engine.stats()
+    assert (stats.failed, stats.in_flight) == (2, 0)
+
+
+def test_stream_yields_tokens_in_order():
+    engine = make_engine(StubProvider())
+
+    async def collect():
+        return [token async for token in engine.stream("GPT_4_TURBO", MESSAGES)]
+
+    assert asyncio.run(collect()) == ["hello ", "cold ", "email ", "world"]
+    [stats] = engine.stats()
+    assert (stats.completed, stats.in_flight) == (1, 0)
+
+
+def test_closed_stream_releases_the_slot():
+    engine = make_engine(StubProvider(), concurrency=1)
+
+    async def first_token_twice():
+        for _ in range(2):
+            tokens = engine.stream("GPT_4_TURBO", MESSAGES)
+            assert await anext(tokens) == "hello "
+            await tokens.aclose()
+
+    asyncio.run(first_token_twice())
+    [stats] = engine.stats()
+    assert stats.in_flight == 0
+
+
+def test_unknown_model_type_is_a_value_error():
+    engine = make_engine(StubProvider())
+    with pytest.raises(ValueError):
+        asyncio.run(engine.generate("UNKNOWN", MESSAGES))
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import Counter
+
+from project.llm_engine import GenerationEngine, StubProvider
+from project.model_router import ModelRouter
+
+MESSAGES = [{"role": "user", "content": "hello cold email world"}]
+
+
+class RecordingProvider(StubProvider):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = Counter()
+
+    async def _connect(self, model):
+        self.calls[model] += 1
+        await super()._connect(model)
+
+
+def open_circuit(router: ModelRouter, model: str) -> None:
+    for _ in range(router.failure_threshold):
+        router.record_failure("T", model)
+
+
+def test_candidates_are_ranked_by_latency_and_cost():
+    router = ModelRouter({"T": ["slow", "fast", "pricey"]}, costs={"pricey": 1.0})
+    router.record_success("T", "slow", 2.0)
+    router.record_success("T", "fast", 0.1)
+    router.record_success("T", "pricey", 0.1)
+    assert router.candidates("T") == ["fast", "slow", "pricey"]
+
+
+def test_open_circuit_is_skipped_until_cooldown():
+    router = ModelRouter({"T": ["a", "b"]}, failure_threshold=2, cooldown=60)
+    open_circuit(router, "a")
+    assert router.candidates("T", probe=True) == ["b"]
+    assert router.available("T")
+    open_circuit(router, "b")
+    assert router.candidates("T") == []
+    assert not router.available("T")
+
+
+def test_half_open_probe_is_reserved_and_tried_first():
+    router = ModelRouter({"T": ["a", "b"]}, failure_threshold=1, cooldown=0)
+    router.record_success("T", "b", 0.1)
+    open_circuit(router, "a")
+    assert router.candidates("T", probe=True) == ["a", "b"]
+    # Only one request may probe; the next ones are served by the closed deployment.
+    assert router.candidates("T", probe=True) == ["b"]
+    router.abandon("T", "a")
+    assert router.candidates("T", probe=True) == ["a", "b"]
+
+
+def test_unreported_probe_reservation_expires():
+    router = ModelRouter({"T": ["a"]}, failure_threshold=1, cooldown=0, probe_timeout=0)
+    open_circuit(router, "a")
+    assert router.candidates("T", probe=True) == ["a"]
+    time.sleep(0.001)
+    assert router.candidates("T", probe=True) == ["a"]
+
+
+def test_probe_outcome_closes_or_reopens_the_circuit():
+    router = ModelRouter({"T": ["a"]}, failure_threshold=1, cooldown=0)
+    open_circuit(router, "a")
+    router.candidates("T", probe=True)
+    router.begin("T", "a")
+    router.record_success("T", "a", 0.1)
+    [health] = router.health()
+    assert (health.circuit, health.error_rate) == ("closed", 0.0)
+
+    router.cooldown = 60
+    open_circuit(router, "a")
+    router.cooldown = 0
+    router.candidates("T", probe=True)
+    router.begin("T", "a")
+    router.cooldown = 60
+    router.record_failure("T", "a")
+    assert router.health()[0].circuit == "open"
+
+
+def test_engine_routes_around_a_failing_deployment():
+    provider = RecordingProvider(failure_rates={"bad": 1.0})
+    router = ModelRouter({"T": ["bad", "good"]}, failure_threshold=3, cooldown=60)
+    engine = GenerationEngine(provider, router=router)
+
+    async def requests():
+        for _ in range(20):
+            completion = await engine.generate("T", MESSAGES)
+            assert completion.model == "good"
+
+    asyncio.run(requests())
+    assert provider.calls["bad"] == 3
+    assert provider.calls["good"] == 20
+    assert {h.model: h.circuit for h in router.health()} == {
+        "bad": "open",
+        "good": "closed",
+    }
+
+
+def test_engine_prefers_the_faster_deployment():
+    provider = RecordingProvider(model_latencies={"slow": 0.02, "fast": 0.0})
+    engine = GenerationEngine(provider, router=ModelRouter({"T": ["slow", "fast"]}))
+
+    async def requests():
+        for _ in range(20):
+            await engine.generate("T", MESSAGES)
+
+    asyncio.run(requests())
+    assert provider.calls["fast"] > 15
+
+
+def test_engine_sends_a_probe_to_a_recovered_deployment():
+    provider = RecordingProvider(failure_rates={"flaky": 1.0})
+    router = ModelRouter({"T": ["flaky", "good"]}, failure_threshold=1, cooldown=0)
+    engine = GenerationEngine(provider, router=router)
+
+    async def requests():
+        await engine.generate("T", MESSAGES)
+        provider.failure_rates.clear()
+        return await engine.generate("T", MESSAGES)
+
+    completion = asyncio.run(requests())
+    assert completion.model == "flaky"
+    assert router.health()[0].circuit == "closed"
+
+
+def test_engine_releases_a_probe_it_did_not_try():
+    provider = StubProvider()
+    router = ModelRouter({"T": ["a", "b"]}, failure_threshold=1, cooldown=0)
+    engine = GenerationEngine(provider, router=router)
+    open_circuit(router, "a")
+
+    async def cancelled_request():
+        task = asyncio.create_task(engine.generate("T", MESSAGES))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancelled_request())
+    assert router.candidates("T", probe=True) == ["a", "b"]
+
+
+def test_stream_latency_excludes_the_consumer():
+    router = ModelRouter({"T": ["m"]})
+    engine = GenerationEngine(StubProvider(), router=router)
+
+    async def slow_consumer():
+        async for _ in engine.stream("T", MESSAGES):
+            await asyncio.sleep(0.02)
+
+    asyncio.run(slow_consumer())
+    [health] = router.health()
+    assert health.requests == 1
+    assert health.p95_ms < 20
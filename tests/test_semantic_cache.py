@@ -0,0 +1,62 @@
+import asyncio
+import math
+
+import pytest
+
+pytest.importorskip("prisma.models", reason="the Prisma client is not generated")
+import prisma
+from project.semantic_cache import HashingEmbedder, SemanticCache, personalization_key
+
+CONTEXT = "Routing software for logistics teams that cuts empty miles"
+
+
+class VectorClient:
+    """
+    In-memory stand-in for the two raw queries of the semantic cache.
+    """
+
+    def __init__(self):
+        self.drafts = {}
+
+    async def execute_raw(self, query, vector, personalization, draft_id):
+        self.drafts[draft_id] = (_parse(vector), personalization)
+
+    async def query_raw(self, query, vector, model_id, personalization):
+        embedding = _parse(vector)
+        rows = [
+            {
+                "id": draft_id,
+                "content": f"draft {draft_id}",
+                "similarity": sum(a * b for a, b in zip(embedding, stored)),
+            }
+            for draft_id, (stored, key) in self.drafts.items()
+            if key == personalization
+        ]
+        return sorted(rows, key=lambda row: -row["similarity"])[:1]
+
+
+def _parse(literal):
+    vector = [float(x) for x in literal.strip("[]").split(",")]
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def test_drafts_are_only_reused_for_the_same_recipient(monkeypatch):
+    client = VectorClient()
+    monkeypatch.setattr(prisma, "get_client", lambda: client)
+    cache = SemanticCache(HashingEmbedder(), threshold=0.95)
+
+    async def scenario():
+        embedding = await cache.embed(CONTEXT)
+        await cache.store("dana", embedding, "Hi Dana,", "Best regards, Sam")
+        same = await cache.lookup(embedding, "m", "Hi Dana,", "Best regards, Sam")
+        other = await cache.lookup(embedding, "m", "Hi Lee,", "Best regards, Sam")
+        return same, other
+
+    same, other = asyncio.run(scenario())
+    assert same is not None and same.draftId == "dana"
+    assert other is None
+    assert cache.hits == 1 and cache.misses == 1
+    assert personalization_key("Hi Dana,", "Best regards, Sam") != personalization_key(
+        "Hi Lee,", "Best regards, Sam"
+    )